@@ -0,0 +1,119 @@
+"""Benchmark the patient summary query strategies against MongoDB.
+
+Runs each strategy in service_db_api/db/patient_summary.py (aggregate,
+concurrent, sequential) over the same MRNs with a fixed number of
+concurrent workers, checks that they return the same summaries, and reports
+latency percentiles and throughput.
+
+Usage:
+    python scripts/benchmark_patient_summary.py
+    python scripts/benchmark_patient_summary.py --requests 2000 --concurrency 20
+    python scripts/benchmark_patient_summary.py --strategies aggregate,sequential
+    python scripts/benchmark_patient_summary.py --view compact
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from service_db_api.db.patient_summary import SUMMARY_STRATEGIES  # noqa: E402
+from service_db_api.db.projection import SUMMARY_VIEWS  # noqa: E402
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+async def run_strategy(db, strategy: str, mrns: List[str], requests: int, concurrency: int, view=None) -> Dict[str, float]:
+    """Issue `requests` summary fetches with `concurrency` workers and collect latencies."""
+    fetch = SUMMARY_STRATEGIES[strategy]
+    latencies: List[float] = []
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < requests:
+            mrn = mrns[next_index % len(mrns)]
+            next_index += 1
+            start = time.perf_counter()
+            await fetch(db, mrn, view)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "mean_ms": sum(latencies) / len(latencies),
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": latencies[-1],
+        "rps": len(latencies) / elapsed,
+    }
+
+
+async def check_equivalence(db, strategies: List[str], mrns: List[str], view=None) -> int:
+    """Count MRNs for which the strategies return different summaries."""
+    mismatches = 0
+    for mrn in mrns:
+        results = [json.dumps(await SUMMARY_STRATEGIES[s](db, mrn, view), sort_keys=True, default=str) for s in strategies]
+        if len(set(results)) > 1:
+            mismatches += 1
+            print(f"\t Warning: strategies disagree for {mrn}")
+    return mismatches
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark patient summary query strategies")
+    parser.add_argument("--mongodb-uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default=os.getenv("MONGODB_DB_NAME", "carepath"))
+    parser.add_argument("--strategies", default=",".join(SUMMARY_STRATEGIES),
+                        help="Comma-separated strategies to compare")
+    parser.add_argument("--view", default="full", choices=list(SUMMARY_VIEWS), help="Summary view to fetch")
+    parser.add_argument("--patients", type=int, default=50, help="Number of distinct MRNs to cycle through")
+    parser.add_argument("--requests", type=int, default=1000, help="Summary fetches per strategy")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent workers")
+    args = parser.parse_args()
+
+    strategies = [s.strip() for s in args.strategies.split(",") if s.strip()]
+    unknown = [s for s in strategies if s not in SUMMARY_STRATEGIES]
+    if unknown:
+        sys.exit(f"Unknown strategies: {', '.join(unknown)}")
+
+    client = AsyncIOMotorClient(args.mongodb_uri)
+    db = client[args.db_name]
+    mrns = [p["mrn"] for p in await db.patients.find({}, {"mrn": 1}).limit(args.patients).to_list(length=args.patients)]
+    if not mrns:
+        sys.exit("No patients found. Run `make load-synthetic` first.")
+
+    view = SUMMARY_VIEWS[args.view]
+    print(f"Database: {args.db_name}, {len(mrns)} MRNs, {args.requests} requests per strategy, "
+          f"concurrency {args.concurrency}, view {args.view}")
+    checked = mrns[:10]
+    mismatches = await check_equivalence(db, strategies, checked, view)
+    print(f"\t Equivalence check: {len(checked) - mismatches}/{len(checked)} MRNs identical across strategies")
+
+    print(f"\n{'strategy':<12} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'req/s':>9}")
+    for strategy in strategies:
+        # Warm up connections and the server's plan cache
+        await run_strategy(db, strategy, mrns, min(len(mrns), args.requests), args.concurrency, view)
+        result = await run_strategy(db, strategy, mrns, args.requests, args.concurrency, view)
+        print(
+            f"{strategy:<12} {result['mean_ms']:>7.2f}ms {result['p50_ms']:>7.2f}ms {result['p95_ms']:>7.2f}ms "
+            f"{result['p99_ms']:>7.2f}ms {result['max_ms']:>7.2f}ms {result['rps']:>9.1f}"
+        )
+
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
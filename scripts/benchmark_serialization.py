@@ -0,0 +1,130 @@
+"""Micro-benchmark of the db_api response serialization paths.
+
+Compares, on the same Motor-shaped documents (ObjectId ``_id`` values):
+
+- ``jsonable``: the previous path. ``_id`` values are converted to strings
+  in a loop, then the result goes through FastAPI's ``jsonable_encoder`` and
+  ``JSONResponse`` (``json.dumps``)
+- ``orjson``: ``BSONJSONResponse`` from service_db_api/responses.py, which
+  encodes the raw documents in one orjson call
+
+Payloads are built from the synthetic data files by repeating each record up
+to the patient summary limits (a summary) or to a full list page. No
+database is needed.
+
+Usage:
+    python scripts/benchmark_serialization.py
+    python scripts/benchmark_serialization.py --iterations 5000 --text-chars 8000
+"""
+import argparse
+import copy
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from bson import ObjectId, json_util
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from service_db_api.db.patient_summary import (  # noqa: E402
+    CLAIM_LIMIT, DOCUMENT_LIMIT, ENCOUNTER_LIMIT, _build_summary
+)
+from service_db_api.responses import BSONJSONResponse  # noqa: E402
+
+DATA_DIR = Path("data/synthetic")
+
+
+def load(collection: str) -> List[Dict[str, Any]]:
+    """Records of a synthetic data file, with $oid values decoded to ObjectId (as Motor returns them)."""
+    with open(DATA_DIR / f"{collection}.jsonl") as f:
+        return [json_util.loads(line) for line in f if line.strip()]
+
+
+def repeat(records: List[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+    """count copies of the records, each with its own ObjectId."""
+    docs = []
+    for i in range(count):
+        doc = copy.deepcopy(records[i % len(records)])
+        doc["_id"] = ObjectId()
+        docs.append(doc)
+    return docs
+
+
+def build_payloads(text_chars: int, page_size: int) -> Dict[str, Callable[[], Any]]:
+    """Factories of fresh payloads (the old path mutates its input)."""
+    patient = load("patients")[0]
+    encounters, claims, documents = load("encounters"), load("claims"), load("documents")
+    for document in documents:
+        base = (document.get("text") or "Clinical note.") + " "
+        document["text"] = (base * (text_chars // len(base) + 1))[:text_chars]
+
+    def summary():
+        return _build_summary(
+            patient["mrn"], copy.deepcopy(patient),
+            repeat(encounters, ENCOUNTER_LIMIT), repeat(claims, CLAIM_LIMIT), repeat(documents, DOCUMENT_LIMIT)
+        )
+
+    def page():
+        return {"items": repeat(encounters, page_size), "total": None, "skip": 0, "limit": page_size, "next_cursor": None}
+
+    return {"summary": summary, f"encounters page ({page_size})": page}
+
+
+def render_jsonable(payload: Any) -> bytes:
+    """The previous path: stringify _id in place, jsonable_encoder, JSONResponse."""
+    sections = [payload["patient"], *payload["recent_encounters"], *payload["recent_claims"], *payload["documents"]] \
+        if "patient" in payload else payload["items"]
+    for doc in sections:
+        if "_id" in doc:
+            doc["_id"] = str(doc["_id"])
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def render_orjson(payload: Any) -> bytes:
+    return BSONJSONResponse(payload).body
+
+
+def run(render: Callable[[Any], bytes], make_payload: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    payloads = [make_payload() for _ in range(iterations)]
+    timings = []
+    for payload in payloads:
+        start = time.perf_counter()
+        render(payload)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    timings.sort()
+    return {
+        "mean_us": sum(timings) / len(timings),
+        "p50_us": timings[len(timings) // 2],
+        "p95_us": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark db_api response serialization")
+    parser.add_argument("--iterations", type=int, default=2000, help="Serializations per path and payload")
+    parser.add_argument("--text-chars", type=int, default=4000, help="Length of each document's text")
+    parser.add_argument("--page-size", type=int, default=100, help="Records in the list page payload")
+    args = parser.parse_args()
+
+    if not (DATA_DIR / "patients.jsonl").exists():
+        sys.exit("No synthetic data found. Run `make generate-synthetic` first.")
+
+    paths = {"jsonable": render_jsonable, "orjson": render_orjson}
+    for name, make_payload in build_payloads(args.text_chars, args.page_size).items():
+        payload = make_payload()
+        outputs = {path: render(copy.deepcopy(payload)) for path, render in paths.items()}
+        same = json.loads(outputs["jsonable"]) == json.loads(outputs["orjson"])
+        print(f"\n{name}: {len(outputs['orjson']) / 1024:.1f} KiB, identical JSON: {same}")
+        print(f"{'path':<10} {'mean':>10} {'p50':>10} {'p95':>10}")
+
+        results = {path: run(render, make_payload, args.iterations) for path, render in paths.items()}
+        for path, result in results.items():
+            print(f"{path:<10} {result['mean_us']:>8.1f}us {result['p50_us']:>8.1f}us {result['p95_us']:>8.1f}us")
+        print(f"speedup (mean): {results['jsonable']['mean_us'] / results['orjson']['mean_us']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
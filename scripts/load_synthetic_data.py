@@ -1,11 +1,17 @@
 """Load synthetic data from JSONL files into MongoDB."""
+import asyncio
 import json
 import os
 import sys
 from pathlib import Path
+from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import MongoClient
 from bson import ObjectId
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from service_db_api.db.indexes import INDEXES  # noqa: E402
+from service_db_api.db.summaries import rebuild_all  # noqa: E402
+
 
 def convert_objectid(data):
     """Convert $oid format to ObjectId."""
@@ -19,7 +25,16 @@ def convert_objectid(data):
     return data
 
 
-def load_synthetic_data(mongodb_uri=None, db_name=None, drop_collections=False):
+async def rebuild_summaries(mongodb_uri, db_name):
+    """Rebuild every materialized patient summary (patient_summaries) in bulk."""
+    client = AsyncIOMotorClient(mongodb_uri)
+    try:
+        return await rebuild_all(client[db_name])
+    finally:
+        client.close()
+
+
+def load_synthetic_data(mongodb_uri=None, db_name=None, drop_collections=False, summaries=True):
     """Load synthetic data into MongoDB."""
 
     # Get connection info from environment or use defaults
@@ -84,38 +99,25 @@ def load_synthetic_data(mongodb_uri=None, db_name=None, drop_collections=False):
         else:
             print(f"[WARN] No documents found in {filename}")
 
-    # Create indexes
+    # Create indexes (same specification as `python -m service_db_api.db.migrate`)
     print("\nCreating indexes...")
 
     try:
-        db.patients.create_index("mrn", unique=True)
-        print("\t Created index: patients.mrn")
-
-        db.encounters.create_index("patient_mrn")
-        db.encounters.create_index("encounter_id", unique=True)
-        print("\t Created indexes: encounters.patient_mrn, encounters.encounter_id")
-
-        db.claims.create_index("patient_mrn")
-        db.claims.create_index("claim_id", unique=True)
-        print("\t Created indexes: claims.patient_mrn, claims.claim_id")
-
-        db.documents.create_index("doc_id", unique=True)
-        db.documents.create_index("patient_mrn")
-        print("\t Created indexes: documents.doc_id, documents.patient_mrn")
-
-        db.chat_logs.create_index("conversation_id", unique=True)
-        db.chat_logs.create_index("patient_mrn")
-        print("\t Created indexes: chat_logs.conversation_id, chat_logs.patient_mrn")
-
-        db.providers.create_index("provider_id", unique=True)
-        print("\t Created index: providers.provider_id")
-
-        db.audit_logs.create_index("event_id", unique=True)
-        print("\t Created index: audit_logs.event_id")
+        for collection, models in INDEXES.items():
+            names = db[collection].create_indexes(models)
+            print(f"\t Created indexes: {', '.join(f'{collection}.{name}' for name in names)}")
 
     except Exception as e:
         print(f"Error creating indexes: {e}")
 
+    if summaries:
+        print("\nRebuilding patient summaries...")
+        try:
+            written = asyncio.run(rebuild_summaries(mongodb_uri, db_name))
+            print(f"\t Rebuilt {written} patient summaries")
+        except Exception as e:
+            print(f"Error rebuilding patient summaries: {e}")
+
     print("\n\t Synthetic data loaded successfully!")
     client.close()
 
@@ -127,11 +129,13 @@ if __name__ == "__main__":
     parser.add_argument("--drop", action="store_true", help="Drop collections before loading")
     parser.add_argument("--uri", help="MongoDB URI")
     parser.add_argument("--db", help="Database name")
+    parser.add_argument("--no-summaries", action="store_true", help="Don't rebuild the materialized patient summaries")
 
     args = parser.parse_args()
 
     load_synthetic_data(
         mongodb_uri=args.uri,
         db_name=args.db,
-        drop_collections=args.drop
+        drop_collections=args.drop,
+        summaries=not args.no_summaries
     )
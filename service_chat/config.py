@@ -9,25 +9,103 @@ class Settings(BaseSettings):
     CHAT_API_PORT: int = 8002
     DB_API_BASE_URL: str = "http://localhost:8001"
 
+    # Pooled HTTP clients (one long-lived client per upstream)
+    DB_API_TIMEOUT_SECONDS: float = 30.0  # Default timeout for service_db_api calls
+    DB_API_MAX_CONNECTIONS: int = 100  # Connection pool size for service_db_api
+    DB_API_MAX_KEEPALIVE_CONNECTIONS: int = 20  # Idle connections kept open to service_db_api
+    HF_MAX_CONNECTIONS: int = 20  # Connection pool size for the HF router
+    HF_MAX_KEEPALIVE_CONNECTIONS: int = 10  # Idle connections kept open to the HF router
+    HF_HTTP2: bool = False  # Use HTTP/2 for the HF router (requires: pip install 'httpx[http2]')
+    HTTP_POOL_TIMEOUT_SECONDS: float = 5.0  # Max wait for a free pooled connection
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0  # Idle time before a pooled connection is closed
+
     # LLM settings
-    DEFAULT_LLM_MODE: str = "hf-qwen2.5"  # "mock", "gguf", "qwen", "Qwen3-4B-Thinking-2507", or "hf-qwen2.5"
+    DEFAULT_LLM_MODE: str = "hf-qwen2.5"  # "mock", "gguf", "gguf-speculative", "qwen", "Qwen3-4B-Thinking-2507", "hf-qwen2.5", or "auto"
     LLM_BACKEND: str = "auto"  # "auto", "transformers", or "gguf" (auto infers from DEFAULT_LLM_MODE)
     MODEL_CACHE_DIR: str = "./models"  # Directory for downloaded models
 
+    # Prompt construction
+    PROMPT_CONTEXT_FORMAT: str = "compact"  # "compact" (token-budgeted clinical sections) or "json" (full summary dump)
+    PROMPT_CONTEXT_MAX_TOKENS: int = 1024  # Token budget for the rendered patient context (compact format)
+    SUMMARY_VIEW: str = "auto"  # Summary view requested from service_db_api: "full", "compact" or "auto" (compact unless PROMPT_CONTEXT_FORMAT=json)
+
+    # Admission control (bounded inference queue)
+    ADMISSION_MAX_CONCURRENCY: int = 4  # Requests generating at once (e.g. GGUF_BATCH_SLOTS * GGUF_REPLICAS)
+    ADMISSION_MAX_QUEUE: int = 32  # Requests waiting for a slot before new ones get 429
+    ADMISSION_DEFAULT_TIMEOUT_SECONDS: float = 600.0  # Queue deadline without X-Request-Deadline/Timeout (the ELB timeout); generation is then not cut off
+
+    # Latency-aware backend routing (for LLM_MODE=auto)
+    LLM_AUTO_BACKENDS: str = "hf-qwen2.5,gguf,qwen"  # Comma-separated candidate backends
+    LLM_AUTO_PRIOR_LATENCY_SECONDS: float = 5.0  # Assumed latency of a backend with no samples yet
+    LLM_AUTO_HEDGE: bool = False  # Send a second request to the runner-up when the primary is slow
+    LLM_AUTO_HEDGE_PERCENTILE: float = 0.95  # Hedge once the primary exceeds this latency percentile
+
+    # Transformers (qwen) backend batching
+    QWEN_MAX_BATCH_SIZE: int = 4  # Max prompts per batched model.generate call
+    QWEN_BATCH_WINDOW_MS: int = 50  # How long to wait for more requests before generating
+
     # GGUF model settings (for LLM_BACKEND=gguf or LLM_MODE=gguf)
     GGUF_MODEL_REPO: str = "Qwen/Qwen2.5-1.5B-Instruct-GGUF"  # HuggingFace repo
     GGUF_MODEL_FILE: str = "qwen2.5-1.5b-instruct-q4_k_m.gguf"  # Specific GGUF file
     GGUF_N_CTX: int = 4096  # Context window size
     GGUF_N_THREADS: int = 4  # Number of CPU threads
     GGUF_MAX_TOKENS: int = 256  # Max tokens to generate
+    GGUF_BATCH_SLOTS: int = 4  # Sequences decoded together by the continuous-batching scheduler
+    GGUF_BATCH_SIZE: int = 512  # Max tokens per llama_decode step (decode tokens + prompt chunks)
+    GGUF_REPLICAS: int = 1  # llama.cpp replicas sharing the mmapped weights (0 = available cores // GGUF_N_THREADS)
+    GGUF_CPU_AFFINITY: bool = False  # Pin each replica to its own GGUF_N_THREADS cores
+    GGUF_PREFIX_CACHE_MB: int = 512  # Memory bound of the prefix KV-state cache (0 = disabled)
+
+    # Speculative decoding (for LLM_MODE=gguf-speculative)
+    GGUF_DRAFT_MODE: str = "prompt-lookup"  # "prompt-lookup" (n-grams from the prompt) or "model" (small draft GGUF)
+    GGUF_DRAFT_MODEL_REPO: str = "Qwen/Qwen2.5-0.5B-Instruct-GGUF"  # Draft model repo (GGUF_DRAFT_MODE=model)
+    GGUF_DRAFT_MODEL_FILE: str = "qwen2.5-0.5b-instruct-q4_k_m.gguf"  # Draft model file (GGUF_DRAFT_MODE=model)
+    GGUF_DRAFT_TOKENS: int = 8  # Draft tokens proposed per verification step
 
     # Hugging Face Inference API settings (for DEFAULT_LLM_MODE=hf-qwen2.5)
     HF_API_TOKEN: str = ""  # HuggingFace API token
+    HF_BASE_URL: str = "https://router.huggingface.co"  # Point at service_chat.utils.mock_hf_server for offline load tests
     HF_QWEN_MODEL_ID: str = "Qwen/Qwen2.5-7B-Instruct:together"  # Router with Together AI provider
     HF_TIMEOUT_SECONDS: int = 30  # Request timeout
     HF_MAX_NEW_TOKENS: int = 256  # Max tokens to generate
     HF_TEMPERATURE: float = 0.7  # Sampling temperature
 
+    # HF circuit breaker (per endpoint) and retry budget
+    HF_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failures that open the breaker
+    HF_BREAKER_RESET_SECONDS: float = 30.0  # How long the breaker stays open before probing
+    HF_BREAKER_HALF_OPEN_MAX_CALLS: int = 1  # Concurrent probe requests while half-open
+    HF_RETRY_MAX_ATTEMPTS: int = 2  # Retries per request for 429/503 responses
+    HF_RETRY_BASE_DELAY_MS: int = 250  # Base of the jittered exponential backoff
+    HF_RETRY_MAX_DELAY_SECONDS: float = 5.0  # Longest backoff or Retry-After we wait for in-request
+    HF_RETRY_BUDGET_RATIO: float = 0.2  # Retry tokens earned per request (retries <= ~20% of traffic)
+    HF_RETRY_BUDGET_MIN_PER_SECOND: float = 0.5  # Retry tokens earned per second regardless of traffic
+    HF_RETRY_BUDGET_MAX_TOKENS: float = 10.0  # Retry token bucket size
+
+    # Background chat log writer (batched POST /chat-logs/bulk)
+    CHAT_LOG_BATCH_SIZE: int = 50  # Flush when this many logs are queued
+    CHAT_LOG_FLUSH_INTERVAL_MS: int = 500  # ...or when the oldest queued log is this old
+    CHAT_LOG_MAX_QUEUE: int = 10000  # Logs beyond this are spilled to CHAT_LOG_SPILL_PATH
+    CHAT_LOG_MAX_RETRIES: int = 3  # Retries per batch (jittered exponential backoff)
+    CHAT_LOG_RETRY_BACKOFF_MS: int = 200  # Base backoff between retries
+    CHAT_LOG_SPILL_PATH: str = "./chat_log_spill.jsonl"  # Local file for logs that couldn't be written
+
+    # Patient summary cache (in-process copy of GET /patients/{mrn}/summary, revalidated by ETag)
+    SUMMARY_CACHE_ENABLED: bool = True
+    SUMMARY_CACHE_MAX_ENTRIES: int = 1024  # LRU size limit
+    SUMMARY_CACHE_TTL_SECONDS: float = 5.0  # Serve without contacting the DB API for this long, then revalidate
+
+    # Response cache settings (exact-match cache of triage answers)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024  # LRU size limit
+    RESPONSE_CACHE_TTL_SECONDS: int = 600  # Max age of a cached answer
+
+    # Semantic cache settings (reuse answers to paraphrased questions)
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"  # Small CPU embedding model
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92  # Min cosine similarity to reuse an answer
+    SEMANTIC_CACHE_MAX_PATIENTS: int = 512  # LRU bound on (MRN, llm_mode) buckets
+    SEMANTIC_CACHE_MAX_PER_PATIENT: int = 32  # Max cached queries per bucket
+
     # Vector DB settings
     VECTOR_MODE: str = "mock"  # "mock" or "pinecone"
 
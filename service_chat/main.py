@@ -4,7 +4,7 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from service_chat.routers import health, triage
+from service_chat.routers import health, metrics, triage
 from service_chat.config import settings
 
 # Global flag to track model readiness
@@ -34,6 +34,37 @@ def is_model_ready() -> bool:
     return _model_ready
 
 
+def _load_model(mode: str) -> None:
+    """Load the model behind an LLM mode (no-op for mock)."""
+    if mode == "gguf":
+        from service_chat.services.llm_client import _get_gguf_pool
+        _get_gguf_pool()
+    elif mode == "gguf-speculative":
+        from service_chat.services.llm_client import _load_speculative_cached
+        _load_speculative_cached()
+    elif mode in ("qwen", "Qwen3-4B-Thinking-2507"):
+        from service_chat.services.llm_client import _load_model_cached, _get_qwen_batcher
+        _load_model_cached()
+        _get_qwen_batcher()
+    elif mode == "hf-qwen2.5":
+        from service_chat.services.hf_client import warmup_hf_model
+        warmup_hf_model()
+    elif mode == "auto":
+        # The router only uses local backends whose model is loaded, so load every candidate.
+        # One failing backend shouldn't stop the others from serving.
+        from service_chat.services.llm_router import llm_router
+        for backend in llm_router.backends:
+            if backend == "auto":
+                continue
+            try:
+                logger.info("Loading auto-routing backend %s...", backend)
+                _load_model(backend)
+            except Exception as e:
+                logger.error("Failed to load auto-routing backend %s: %s", backend, e)
+    elif mode != "mock":
+        logger.warning("Unknown LLM mode %s - skipping model loading", mode)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -45,20 +76,18 @@ async def lifespan(app: FastAPI):
     """
     global _model_ready
 
+    # Long-lived pooled HTTP clients for service_db_api and the HF router
+    from service_chat.services.http_clients import http_clients
+    http_clients.start()
+
+    # Background batched chat log writer
+    from service_chat.services.chat_log_client import chat_log_writer
+    chat_log_writer.start()
+
     if settings.DEFAULT_LLM_MODE not in ("mock",):
         logger.info("Starting eager model loading (DEFAULT_LLM_MODE=%s)...", settings.DEFAULT_LLM_MODE)
         try:
-            if settings.DEFAULT_LLM_MODE == "gguf":
-                from service_chat.services.llm_client import _load_gguf_model_cached
-                _load_gguf_model_cached()
-            elif settings.DEFAULT_LLM_MODE in ("qwen", "Qwen3-4B-Thinking-2507"):
-                from service_chat.services.llm_client import _load_model_cached
-                _load_model_cached()
-            elif settings.DEFAULT_LLM_MODE == "hf-qwen2.5":
-                from service_chat.services.hf_client import warmup_hf_model
-                warmup_hf_model()
-            else:
-                logger.warning("Unknown DEFAULT_LLM_MODE=%s - skipping model loading", settings.DEFAULT_LLM_MODE)
+            _load_model(settings.DEFAULT_LLM_MODE)
             logger.info("Model loaded successfully - pod is ready to serve requests")
         except Exception as e:
             logger.error("Failed to load model during startup: %s", e)
@@ -68,8 +97,13 @@ async def lifespan(app: FastAPI):
 
     _model_ready = True
     yield
-    # Cleanup (if needed)
+    # Cleanup
     logger.info("Shutting down CarePath Chat API")
+    from service_chat.services.llm_client import shutdown_gguf_pool, shutdown_qwen_batcher
+    shutdown_gguf_pool()
+    shutdown_qwen_batcher()
+    await chat_log_writer.stop()
+    await http_clients.aclose()
 
 
 # Create FastAPI app with lifespan handler
@@ -92,6 +126,7 @@ app.add_middleware(
 # Include routers
 app.include_router(health.router, tags=["health"])
 app.include_router(triage.router, tags=["triage"])
+app.include_router(metrics.router, tags=["metrics"])
 
 
 @app.get("/")
@@ -0,0 +1,38 @@
+"""Runtime metrics endpoint for service_chat."""
+from fastapi import APIRouter
+
+from service_chat.services import llm_client
+from service_chat.services.db_client import summary_cache, summary_fetches
+from service_chat.services.hf_client import get_resilience_stats
+from service_chat.services.admission import admission_controller
+from service_chat.services.chat_log_client import chat_log_writer
+from service_chat.services.http_clients import http_clients
+from service_chat.services.llm_router import llm_router
+from service_chat.services.response_cache import response_cache
+from service_chat.services.semantic_cache import semantic_cache
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def metrics():
+    """
+    Runtime metrics for admission control, upstream connection pools, inference capacity and caches.
+
+    Sections are null when the corresponding component hasn't been started
+    (e.g. the GGUF pool only exists when gguf mode has been used).
+    """
+    return {
+        "admission": admission_controller.stats(),
+        "http_clients": http_clients.stats(),
+        "hf_resilience": get_resilience_stats(),
+        "chat_log_writer": chat_log_writer.stats(),
+        "llm_router": llm_router.stats(),
+        "gguf_pool": llm_client.get_gguf_stats(),
+        "qwen_batcher": llm_client.get_qwen_stats(),
+        "speculative": llm_client.get_speculative_stats(),
+        "summary_fetches": summary_fetches.stats(),
+        "summary_cache": summary_cache.stats() if summary_cache is not None else None,
+        "response_cache": response_cache.stats() if response_cache is not None else None,
+        "semantic_cache": semantic_cache.stats() if semantic_cache is not None else None
+    }
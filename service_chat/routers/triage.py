@@ -1,15 +1,25 @@
 """Triage endpoint for AI-powered patient assistance."""
+import asyncio
+import json
+import math
 import time
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, List, Dict, Any
-from fastapi import APIRouter, HTTPException
+from typing import Optional, List, Dict, Any, AsyncIterator, Awaitable
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from service_chat.config import settings
 from service_chat.tracing import start_trace, log_span
 from service_chat.scrub_phi import scrub
-from service_chat.services import db_client, llm_client, rag_service
+from service_chat.services import db_client, llm_client
 from service_chat.services import chat_log_client
+from service_chat.services.admission import admission_controller, AdmissionRejected
+from service_chat.services.llm_router import llm_router, NoBackendAvailable, RouteDecision
+from service_chat.services.resilience import CircuitOpenError
+from service_chat.services.response_cache import response_cache, summary_hash, CacheKey
+from service_chat.services.semantic_cache import semantic_cache
 
 router = APIRouter()
 
@@ -19,6 +29,7 @@ class TriageRequest(BaseModel):
     patient_mrn: str
     query: str
     llm_mode: Optional[str] = None  # Optional: uses DEFAULT_LLM_MODE if not provided
+    cache: Optional[str] = None  # "bypass" skips the response cache lookup (the fresh answer is still cached)
 
 
 class TriageResponse(BaseModel):
@@ -29,11 +40,338 @@ class TriageResponse(BaseModel):
     llm_mode: str
     response: str
     inference_time_ms: float
-    conversation_id: Optional[str] = None  # ID of stored chat log
+    conversation_id: Optional[str] = None  # ID of the chat log (stored in the background)
+    llm_backend: Optional[str] = None  # Backend that answered when llm_mode is "auto"
+    cached: bool = False  # True if the response was served from the response cache
+
+
+async def _fetch_patient_summary(
+    trace_id: str,
+    patient_mrn: str,
+    retrieval_events: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Fetch the patient summary from service_db_api and record the retrieval event.
+
+    Raises:
+        HTTPException: 404 if the patient is not found, 500 on DB API errors
+    """
+    start_time = time.time()
+    log_span(trace_id, "db_api_patient_summary_start", patient_mrn=patient_mrn)
+
+    try:
+        patient_summary = await db_client.get_patient_summary(patient_mrn)
+    except db_client.PatientNotFoundError:
+        log_span(
+            trace_id,
+            "error",
+            error_type="patient_not_found",
+            patient_mrn=patient_mrn
+        )
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": "Patient not found",
+                "trace_id": trace_id,
+                "patient_mrn": patient_mrn
+            }
+        )
+    except db_client.DBAPIError as e:
+        log_span(
+            trace_id,
+            "error",
+            error_type="db_api_error",
+            error_message=str(e)
+        )
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Error fetching patient data",
+                "trace_id": trace_id
+            }
+        )
+
+    db_elapsed_ms = round((time.time() - start_time) * 1000, 2)
+    log_span(
+        trace_id,
+        "db_api_patient_summary_end",
+        elapsed_ms=db_elapsed_ms
+    )
+
+    # Record the retrieval event for patient summary fetch
+    retrieval_events.append({
+        "step_id": 1,
+        "query_type": "db_query",
+        "query": "Fetch patient summary by MRN",
+        "endpoint": f"/patients/{patient_mrn}/summary",
+        "latency_ms": db_elapsed_ms,
+        "record_count": 1
+    })
+    return patient_summary
+
+
+def _build_messages(
+    query: str,
+    llm_response: str,
+    llm_mode: str,
+    llm_elapsed_ms: float,
+    route: Optional[RouteDecision] = None
+) -> List[Dict[str, Any]]:
+    """Build the user/assistant message pair for chat log storage."""
+    now = datetime.utcnow().isoformat() + "Z"
+    assistant = {
+        "role": "assistant",
+        "content": llm_response,
+        "timestamp": now,
+        "model_name": route.backend if route is not None else llm_mode,
+        "latency_ms": llm_elapsed_ms
+    }
+    if route is not None:
+        # Record which backend answered under llm_mode="auto" and why
+        assistant["routing"] = route.as_dict()
+    return [
+        {
+            "role": "user",
+            "content": query,
+            "timestamp": now
+        },
+        assistant
+    ]
+
+
+def _route_stream(trace_id: str, llm_mode: str) -> Optional[RouteDecision]:
+    """
+    Choose a backend up front for a streamed llm_mode="auto" request.
+
+    Raises:
+        HTTPException: 503 if no backend is eligible
+    """
+    if llm_mode != "auto":
+        return None
+    try:
+        route = llm_router.choose()
+    except NoBackendAvailable as e:
+        log_span(trace_id, "error", error_type="no_llm_backend", error_message=str(e))
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": "No LLM backend available",
+                "trace_id": trace_id
+            }
+        )
+    log_span(trace_id, "llm_route", **route.as_dict())
+    return route
+
+
+@dataclass
+class _RequestDeadline:
+    """When a request must be answered by; only a client-supplied deadline bounds generation."""
+    at: float
+    from_client: bool
+
+    def generation_timeout(self) -> Optional[float]:
+        """Seconds left for generation, or None to let it run to completion."""
+        return max(self.at - time.time(), 0.0) if self.from_client else None
+
+    def passed(self) -> bool:
+        return self.from_client and time.time() > self.at
+
+
+def _request_deadline(x_request_deadline: Optional[str], x_request_timeout: Optional[str]) -> _RequestDeadline:
+    """
+    Resolve the deadline of a request.
+
+    X-Request-Deadline is an absolute Unix timestamp in seconds and
+    X-Request-Timeout a relative number of seconds; the earlier wins.
+    Without either, ADMISSION_DEFAULT_TIMEOUT_SECONDS bounds only the time
+    spent queued: a local CPU generation can take minutes and is not cut off.
+
+    Raises:
+        HTTPException: 400 if a header is not a number
+    """
+    now = time.time()
+    candidates = []
+    try:
+        if x_request_deadline is not None:
+            candidates.append(float(x_request_deadline))
+        if x_request_timeout is not None:
+            candidates.append(now + float(x_request_timeout))
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "X-Request-Deadline and X-Request-Timeout must be numbers of seconds"}
+        )
+    if candidates:
+        return _RequestDeadline(at=min(candidates), from_client=True)
+    return _RequestDeadline(at=now + settings.ADMISSION_DEFAULT_TIMEOUT_SECONDS, from_client=False)
+
+
+@dataclass
+class _AdmissionSlot:
+    """An admitted inference slot; release() is idempotent."""
+    admitted_at: float
+    released: bool = False
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            admission_controller.release(time.time() - self.admitted_at)
+
+
+async def _generate_in_slot(slot: _AdmissionSlot, generation: Awaitable[Any], timeout: Optional[float]) -> Any:
+    """
+    Await a generation that holds an admission slot, with an optional timeout.
+
+    On timeout (or if the caller is cancelled) the generation is cancelled,
+    but the slot is only released once the generation task has finished
+    unwinding, i.e. once the backend has stopped. Releasing it as soon as the
+    caller gives up would let the controller admit new work on top of
+    generations that are still running.
+
+    Raises:
+        asyncio.TimeoutError: If the generation didn't finish within timeout
+    """
+    task = asyncio.ensure_future(generation)
+
+    def finished(done: asyncio.Future) -> None:
+        slot.release()
+        if not done.cancelled():
+            done.exception()  # Retrieved here if nobody awaits it any more
+
+    task.add_done_callback(finished)
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+    finally:
+        task.cancel()
+
+
+async def _admit(trace_id: str, deadline: _RequestDeadline) -> _AdmissionSlot:
+    """
+    Wait for an inference slot from the admission controller.
+
+    Returns:
+        _AdmissionSlot: Must be released once generation ends
+
+    Raises:
+        HTTPException: 429 (queue full) or 503 (deadline) with a Retry-After header
+    """
+    log_span(trace_id, "admission_start", **admission_controller.stats())
+    try:
+        queue_wait_ms = await admission_controller.acquire(deadline.at, predict=deadline.from_client)
+    except AdmissionRejected as e:
+        log_span(
+            trace_id,
+            "admission_rejected",
+            status_code=e.status_code,
+            reason=e.reason,
+            retry_after=e.retry_after
+        )
+        raise HTTPException(
+            status_code=e.status_code,
+            detail={
+                "error": e.reason,
+                "trace_id": trace_id
+            },
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    log_span(trace_id, "admission_admitted", queue_wait_ms=queue_wait_ms)
+    return _AdmissionSlot(admitted_at=time.time())
+
+
+@dataclass
+class _CacheLookup:
+    """Result of looking up the response caches for a request."""
+    summary_digest: str
+    cache_key: Optional[CacheKey] = None
+    response: Optional[str] = None
+
+
+async def _cache_lookup(
+    trace_id: str,
+    request: TriageRequest,
+    llm_mode: str,
+    patient_summary: Dict[str, Any]
+) -> _CacheLookup:
+    """
+    Look up the exact-match cache, then the semantic cache, for this request.
+
+    With cache="bypass" both lookups are skipped (the fresh answer is still stored).
+    """
+    lookup = _CacheLookup(summary_digest=summary_hash(patient_summary))
+    if request.cache == "bypass":
+        log_span(trace_id, "response_cache_bypass")
+        if response_cache is not None:
+            lookup.cache_key = response_cache.make_key(request.patient_mrn, request.query, llm_mode, lookup.summary_digest)
+        return lookup
+
+    if response_cache is not None:
+        lookup.cache_key = response_cache.make_key(request.patient_mrn, request.query, llm_mode, lookup.summary_digest)
+        lookup.response = response_cache.get(lookup.cache_key)
+        log_span(trace_id, "response_cache_hit" if lookup.response is not None else "response_cache_miss")
+
+    if lookup.response is None and semantic_cache is not None:
+        hit = await semantic_cache.lookup(request.patient_mrn, llm_mode, lookup.summary_digest, request.query)
+        if hit is not None:
+            lookup.response = hit["response"]
+            log_span(trace_id, "semantic_cache_hit", similarity=hit["similarity"], saved_ms=hit["saved_ms"])
+        else:
+            log_span(trace_id, "semantic_cache_miss")
+    return lookup
+
+
+# Semantic cache stores still running in the background (keeps the tasks referenced)
+_pending_stores: "set[asyncio.Task[None]]" = set()
+
+
+def _cache_store(
+    trace_id: str,
+    request: TriageRequest,
+    llm_mode: str,
+    lookup: _CacheLookup,
+    llm_response: str,
+    llm_elapsed_ms: float
+) -> None:
+    """
+    Store a freshly generated answer in the exact-match and semantic caches.
+
+    The semantic store embeds the query (loading the embedding model on first
+    use), so it runs as a background task: the answer is returned first, and a
+    failed store is only logged.
+    """
+    if lookup.cache_key is not None:
+        response_cache.put(lookup.cache_key, llm_response)
+    if semantic_cache is None:
+        return
+
+    task = asyncio.ensure_future(semantic_cache.store(
+        request.patient_mrn,
+        llm_mode,
+        lookup.summary_digest,
+        request.query,
+        llm_response,
+        llm_elapsed_ms
+    ))
+
+    def finished(done: "asyncio.Task[None]") -> None:
+        _pending_stores.discard(done)
+        if not done.cancelled() and done.exception() is not None:
+            log_span(
+                trace_id,
+                "semantic_cache_store_failed",
+                error_type=type(done.exception()).__name__,
+                error_message=str(done.exception())
+            )
+
+    _pending_stores.add(task)
+    task.add_done_callback(finished)
 
 
 @router.post("/triage", response_model=TriageResponse)
-async def triage(request: TriageRequest):
+async def triage(
+    request: TriageRequest,
+    x_request_deadline: Optional[str] = Header(None),
+    x_request_timeout: Optional[str] = Header(None)
+):
     """
     AI-powered triage endpoint.
 
@@ -44,8 +382,16 @@ async def triage(request: TriageRequest):
     4. Generates a response using LLM (mock in MVP)
     5. Returns the response with tracing information
 
+    Cache misses go through the admission controller: when the inference
+    queue is full or the request's deadline can't be met, the request is
+    rejected immediately with 429/503 and a Retry-After header. If the
+    client sent a deadline, generation still running at it is cancelled
+    with 504; without one, the default deadline only bounds the queue wait.
+
     Args:
         request: Triage request with patient_mrn and query
+        x_request_deadline: Optional absolute deadline (Unix timestamp, seconds)
+        x_request_timeout: Optional relative timeout in seconds
 
     Returns:
         TriageResponse with AI-generated response and trace ID
@@ -53,6 +399,7 @@ async def triage(request: TriageRequest):
     # Start trace
     trace_id = start_trace()
     log_span(trace_id, "request_received", patient_mrn=request.patient_mrn)
+    deadline = _request_deadline(x_request_deadline, x_request_timeout)
 
     # Scrub PHI before logging (MVP: no-op, but structure is in place)
     scrubbed_request = scrub(request.dict())
@@ -61,125 +408,123 @@ async def triage(request: TriageRequest):
     retrieval_events: List[Dict[str, Any]] = []
 
     try:
-        # Fetch patient summary from DB API
-        start_time = time.time()
-        log_span(trace_id, "db_api_patient_summary_start", patient_mrn=request.patient_mrn)
-
-        try:
-            patient_summary = await db_client.get_patient_summary(request.patient_mrn)
-        except db_client.PatientNotFoundError:
-            log_span(
-                trace_id,
-                "error",
-                error_type="patient_not_found",
-                patient_mrn=request.patient_mrn
-            )
-            raise HTTPException(
-                status_code=404,
-                detail={
-                    "error": "Patient not found",
-                    "trace_id": trace_id,
-                    "patient_mrn": request.patient_mrn
-                }
-            )
-        except db_client.DBAPIError as e:
-            log_span(
-                trace_id,
-                "error",
-                error_type="db_api_error",
-                error_message=str(e)
-            )
-            raise HTTPException(
-                status_code=500,
-                detail={
-                    "error": "Error fetching patient data",
-                    "trace_id": trace_id
-                }
-            )
-
-        db_elapsed_ms = round((time.time() - start_time) * 1000, 2)
-        log_span(
-            trace_id,
-            "db_api_patient_summary_end",
-            elapsed_ms=db_elapsed_ms
-        )
-
-        # Record the retrieval event for patient summary fetch
-        retrieval_events.append({
-            "step_id": 1,
-            "query_type": "db_query",
-            "query": "Fetch patient summary by MRN",
-            "endpoint": f"/patients/{request.patient_mrn}/summary",
-            "latency_ms": db_elapsed_ms,
-            "record_count": 1
-        })
-
-        # Build prompt using RAG service
-        prompt = rag_service.build_prompt(request.query, patient_summary)
+        patient_summary = await _fetch_patient_summary(trace_id, request.patient_mrn, retrieval_events)
 
         # Determine which LLM mode to use (request parameter or default)
         llm_mode = request.llm_mode if request.llm_mode is not None else settings.DEFAULT_LLM_MODE
 
-        # Generate LLM response
+        # Serve repeated questions from the response cache
         start_time = time.time()
-        log_span(trace_id, "llm_inference_start", llm_mode=llm_mode)
+        lookup = await _cache_lookup(trace_id, request, llm_mode, patient_summary)
+        llm_response = lookup.response
+        cached = llm_response is not None
+        route: Optional[RouteDecision] = None
 
-        try:
-            llm_response = await llm_client.generate_response(
-                llm_mode,
-                request.query,
-                patient_summary
-            )
-        except Exception as e:
-            log_span(
-                trace_id,
-                "error",
-                error_type="llm_error",
-                error_message=str(e)
-            )
-            raise HTTPException(
-                status_code=500,
-                detail={
-                    "error": "Error generating response",
-                    "trace_id": trace_id
-                }
-            )
+        if not cached:
+            # Wait for an inference slot (or fail fast under overload)
+            slot = await _admit(trace_id, deadline)
+
+            # Generate LLM response
+            log_span(trace_id, "llm_inference_start", llm_mode=llm_mode)
+
+            # The slot is released once the generation has actually finished
+            try:
+                if llm_mode == "auto":
+                    # Latency-aware routing across backends, with failover
+                    llm_response, route = await _generate_in_slot(
+                        slot,
+                        llm_router.generate(request.query, patient_summary),
+                        timeout=deadline.generation_timeout()
+                    )
+                    log_span(trace_id, "llm_route", **route.as_dict())
+                else:
+                    llm_response = await _generate_in_slot(
+                        slot,
+                        llm_client.generate_response(
+                            llm_mode,
+                            request.query,
+                            patient_summary
+                        ),
+                        timeout=deadline.generation_timeout()
+                    )
+            except asyncio.TimeoutError:
+                log_span(
+                    trace_id,
+                    "error",
+                    error_type="deadline_exceeded"
+                )
+                raise HTTPException(
+                    status_code=504,
+                    detail={
+                        "error": "Request deadline exceeded during generation",
+                        "trace_id": trace_id
+                    }
+                )
+            except CircuitOpenError as e:
+                log_span(
+                    trace_id,
+                    "error",
+                    error_type="circuit_open",
+                    error_message=str(e)
+                )
+                raise HTTPException(
+                    status_code=503,
+                    detail={
+                        "error": "LLM provider unavailable",
+                        "trace_id": trace_id
+                    },
+                    headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+                )
+            except NoBackendAvailable as e:
+                log_span(
+                    trace_id,
+                    "error",
+                    error_type="no_llm_backend",
+                    error_message=str(e)
+                )
+                raise HTTPException(
+                    status_code=503,
+                    detail={
+                        "error": "No LLM backend available",
+                        "trace_id": trace_id
+                    }
+                )
+            except Exception as e:
+                log_span(
+                    trace_id,
+                    "error",
+                    error_type="llm_error",
+                    error_message=str(e)
+                )
+                raise HTTPException(
+                    status_code=500,
+                    detail={
+                        "error": "Error generating response",
+                        "trace_id": trace_id
+                    }
+                )
 
         llm_elapsed_ms = round((time.time() - start_time) * 1000, 2)
+        if not cached:
+            _cache_store(trace_id, request, llm_mode, lookup, llm_response, llm_elapsed_ms)
         log_span(
             trace_id,
             "llm_inference_end",
-            elapsed_ms=llm_elapsed_ms
+            elapsed_ms=llm_elapsed_ms,
+            cached=cached
         )
 
-        # Build messages for chat log storage
-        now = datetime.utcnow().isoformat() + "Z"
-        messages = [
-            {
-                "role": "user",
-                "content": request.query,
-                "timestamp": now
-            },
-            {
-                "role": "assistant",
-                "content": llm_response,
-                "timestamp": now,
-                "model_name": llm_mode,
-                "latency_ms": llm_elapsed_ms
-            }
-        ]
+        messages = _build_messages(request.query, llm_response, llm_mode, llm_elapsed_ms, route)
 
-        # Store chat log (non-blocking, errors are logged but don't fail the request)
-        log_span(trace_id, "chat_log_storage_start")
-        chat_log_result = await chat_log_client.store_chat_log(
+        # Queue the chat log for the background writer (the response never waits on storage)
+        conversation_id = chat_log_client.chat_log_writer.enqueue(
             patient_mrn=request.patient_mrn,
             messages=messages,
             retrieval_events=retrieval_events,
             trace_id=trace_id,
             channel="api"
         )
-        conversation_id = chat_log_result.get("conversation_id") if chat_log_result else None
-        log_span(trace_id, "chat_log_storage_end", conversation_id=conversation_id)
+        log_span(trace_id, "chat_log_enqueued", conversation_id=conversation_id)
 
         # Log completion
         log_span(trace_id, "request_completed")
@@ -191,7 +536,9 @@ async def triage(request: TriageRequest):
             llm_mode=llm_mode,
             response=llm_response,
             inference_time_ms=llm_elapsed_ms,
-            conversation_id=conversation_id
+            conversation_id=conversation_id,
+            llm_backend=route.backend if route is not None else None,
+            cached=cached
         )
 
     except HTTPException:
@@ -212,3 +559,203 @@ async def triage(request: TriageRequest):
                 "trace_id": trace_id
             }
         )
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format a Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _cached_events(response: str) -> AsyncIterator[Dict[str, Any]]:
+    """Stream events for a response served from the response cache."""
+    yield {"event": "token", "text": response}
+
+
+async def _triage_event_stream(
+    request: TriageRequest,
+    trace_id: str,
+    llm_mode: str,
+    patient_summary: Dict[str, Any],
+    retrieval_events: List[Dict[str, Any]],
+    lookup: _CacheLookup,
+    deadline: _RequestDeadline,
+    slot: Optional[_AdmissionSlot],
+    route: Optional[RouteDecision] = None
+) -> AsyncIterator[str]:
+    """
+    Generate the SSE event stream for /triage/stream.
+
+    For cache misses the caller has already acquired an admission slot; it is
+    released when generation ends, or when the stream is closed early. With
+    llm_mode="auto" the caller has also chosen the backend (route).
+
+    Events:
+    - start: trace_id, patient_mrn, llm_mode
+    - timing: {"stage": "queue_wait" | "ttft", "elapsed_ms": float}
+    - token: {"text": str}
+    - done: same fields as TriageResponse, plus ttft_ms
+    - error: {"error": str, "trace_id": str}
+    """
+    yield _sse("start", {
+        "trace_id": trace_id,
+        "patient_mrn": request.patient_mrn,
+        "llm_mode": llm_mode
+    })
+
+    start_time = time.time()
+    ttft_ms: Optional[float] = None
+    chunks: List[str] = []
+    cached = lookup.response is not None
+    log_span(trace_id, "llm_inference_start", llm_mode=llm_mode, stream=True, cached=cached)
+
+    if cached:
+        # Replay the cached answer as a single token event
+        events = _cached_events(lookup.response)
+    elif route is not None:
+        events = llm_router.stream(route, request.query, patient_summary)
+    else:
+        events = llm_client.stream_response(llm_mode, request.query, patient_summary)
+
+    try:
+        while True:
+            # Bound each wait, not just the gaps between events: a slow prefill
+            # or a stalled backend produces nothing to check the deadline against.
+            # On timeout the pending step is cancelled, which unwinds the backend
+            # stream before the slot is released below.
+            try:
+                event = await asyncio.wait_for(events.__anext__(), timeout=deadline.generation_timeout())
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                await events.aclose()
+                log_span(
+                    trace_id,
+                    "error",
+                    error_type="deadline_exceeded"
+                )
+                yield _sse("error", {
+                    "error": "Request deadline exceeded during generation",
+                    "trace_id": trace_id
+                })
+                return
+            if event["event"] == "token":
+                if ttft_ms is None:
+                    ttft_ms = round((time.time() - start_time) * 1000, 2)
+                    log_span(trace_id, "llm_first_token", elapsed_ms=ttft_ms)
+                    yield _sse("timing", {"stage": "ttft", "elapsed_ms": ttft_ms})
+                chunks.append(event["text"])
+                yield _sse("token", {"text": event["text"]})
+            elif event["event"] == "timing":
+                log_span(trace_id, f"llm_{event['stage']}", elapsed_ms=event["elapsed_ms"])
+                yield _sse("timing", {"stage": event["stage"], "elapsed_ms": event["elapsed_ms"]})
+    except Exception as e:
+        log_span(
+            trace_id,
+            "error",
+            error_type="llm_error",
+            error_message=str(e)
+        )
+        yield _sse("error", {
+            "error": "Error generating response",
+            "trace_id": trace_id
+        })
+        return
+    finally:
+        if slot is not None:
+            slot.release()
+
+    llm_elapsed_ms = round((time.time() - start_time) * 1000, 2)
+    llm_response = "".join(chunks).strip()
+    log_span(
+        trace_id,
+        "llm_inference_end",
+        elapsed_ms=llm_elapsed_ms,
+        ttft_ms=ttft_ms,
+        cached=cached
+    )
+    if not cached:
+        _cache_store(trace_id, request, llm_mode, lookup, llm_response, llm_elapsed_ms)
+
+    # Queue the chat log once the stream has finished
+    messages = _build_messages(request.query, llm_response, llm_mode, llm_elapsed_ms, route)
+    conversation_id = chat_log_client.chat_log_writer.enqueue(
+        patient_mrn=request.patient_mrn,
+        messages=messages,
+        retrieval_events=retrieval_events,
+        trace_id=trace_id,
+        channel="api"
+    )
+    log_span(trace_id, "chat_log_enqueued", conversation_id=conversation_id)
+
+    log_span(trace_id, "request_completed")
+    yield _sse("done", {
+        **TriageResponse(
+            trace_id=trace_id,
+            patient_mrn=request.patient_mrn,
+            query=request.query,
+            llm_mode=llm_mode,
+            response=llm_response,
+            inference_time_ms=llm_elapsed_ms,
+            conversation_id=conversation_id,
+            llm_backend=route.backend if route is not None else None,
+            cached=cached
+        ).dict(),
+        "ttft_ms": ttft_ms
+    })
+
+
+@router.post("/triage/stream")
+async def triage_stream(
+    request: TriageRequest,
+    x_request_deadline: Optional[str] = Header(None),
+    x_request_timeout: Optional[str] = Header(None)
+):
+    """
+    Streaming variant of /triage using Server-Sent Events.
+
+    The patient summary is fetched before the stream opens, so a missing
+    patient or DB API failure still returns a normal 404/500 response, and
+    an admission rejection a normal 429/503 with Retry-After.
+    Tokens are then streamed as they are generated, with timing events for
+    queue wait and time-to-first-token. After the last token the chat log is
+    queued for the background writer, then the final "done" event is sent.
+
+    Args:
+        request: Triage request with patient_mrn and query
+        x_request_deadline: Optional absolute deadline (Unix timestamp, seconds)
+        x_request_timeout: Optional relative timeout in seconds
+
+    Returns:
+        StreamingResponse with media type text/event-stream
+    """
+    trace_id = start_trace()
+    log_span(trace_id, "request_received", patient_mrn=request.patient_mrn, stream=True)
+    deadline = _request_deadline(x_request_deadline, x_request_timeout)
+
+    retrieval_events: List[Dict[str, Any]] = []
+    patient_summary = await _fetch_patient_summary(trace_id, request.patient_mrn, retrieval_events)
+    llm_mode = request.llm_mode if request.llm_mode is not None else settings.DEFAULT_LLM_MODE
+
+    lookup = await _cache_lookup(trace_id, request, llm_mode, patient_summary)
+    route = _route_stream(trace_id, llm_mode) if lookup.response is None else None
+    slot = await _admit(trace_id, deadline) if lookup.response is None else None
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async for chunk in _triage_event_stream(
+                request, trace_id, llm_mode, patient_summary, retrieval_events, lookup, deadline, slot, route
+            ):
+                yield chunk
+        finally:
+            # Covers a client disconnecting before generation started
+            if slot is not None:
+                slot.release()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering so tokens flush immediately
+        }
+    )
@@ -0,0 +1,190 @@
+"""Admission control for LLM inference.
+
+Without a bound, every /triage request queues behind the inference backend
+and holds its connection until it times out, so overload turns into a wall
+of slow failures. The controller admits at most ``max_concurrency`` requests
+into generation and keeps a bounded FIFO queue of waiters, each with a
+deadline:
+
+- Queue full: reject immediately with 429
+- Client deadline can't be met given the queue depth and observed service
+  time: reject immediately with 503
+- Deadline passes while waiting: drop from the queue with 503
+
+Rejections carry a Retry-After estimate derived from the same numbers.
+Everything runs on the event loop, so no locking is needed.
+"""
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional
+
+from service_chat.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is not admitted for inference."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Waiter:
+    future: asyncio.Future
+    deadline: float
+
+
+class AdmissionController:
+    """Bounded inference queue with per-request deadlines."""
+
+    def __init__(self, max_concurrency: int, max_queue: int, ewma_alpha: float = 0.2):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.ewma_alpha = ewma_alpha
+        self._active = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._service_seconds: Optional[float] = None  # EWMA of generation time
+        self._recent_waits_ms: Deque[float] = deque(maxlen=512)
+
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_deadline = 0
+        self.expired_in_queue = 0
+
+    def estimated_wait_seconds(self) -> float:
+        """Expected queue wait for a new request (0 until a service time has been observed)."""
+        if self._service_seconds is None or (self._active < self.max_concurrency and not self._waiters):
+            return 0.0
+        return self._service_seconds * (len(self._waiters) + 1) / self.max_concurrency
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait before retrying."""
+        service = self._service_seconds or 1.0
+        return max(1, math.ceil(service * (len(self._waiters) + 1) / self.max_concurrency))
+
+    async def acquire(self, deadline: float, predict: bool = True) -> float:
+        """
+        Wait for an inference slot.
+
+        Args:
+            deadline: Absolute time.time() by which the request must be answered
+            predict: Reject up front if the observed service time says the
+                deadline can't be met (False for the default deadline, which
+                only bounds the queue wait)
+
+        Returns:
+            float: Time spent queued in milliseconds
+
+        Raises:
+            AdmissionRejected: 429 if the queue is full, 503 if the deadline has
+                passed, can't be met, or expires while queued
+        """
+        now = time.time()
+        if deadline <= now:
+            self.rejected_deadline += 1
+            raise AdmissionRejected(503, "Request deadline already passed", self.retry_after())
+
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            self._admit(0.0)
+            return 0.0
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_queue_full += 1
+            logger.warning(f"Inference queue full ({len(self._waiters)} waiting, {self._active} active); rejecting request")
+            raise AdmissionRejected(429, "Inference queue is full", self.retry_after())
+
+        if predict and now + self.estimated_wait_seconds() + (self._service_seconds or 0.0) > deadline:
+            self.rejected_deadline += 1
+            raise AdmissionRejected(503, "Request deadline cannot be met at current load", self.retry_after())
+
+        waiter = _Waiter(future=asyncio.get_running_loop().create_future(), deadline=deadline)
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter.future, timeout=deadline - now)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            self.expired_in_queue += 1
+            raise AdmissionRejected(503, "Request deadline expired while queued", self.retry_after())
+        except asyncio.CancelledError:
+            # Client went away while queued
+            self._abandon(waiter)
+            raise
+
+        wait_ms = round((time.time() - now) * 1000, 2)
+        self._admit(wait_ms)
+        return wait_ms
+
+    def release(self, service_seconds: float) -> None:
+        """Free a slot after generation and record how long it took."""
+        self._active -= 1
+        if self._service_seconds is None:
+            self._service_seconds = service_seconds
+        else:
+            self._service_seconds += self.ewma_alpha * (service_seconds - self._service_seconds)
+        self._wake()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, wait times and rejection counters."""
+        waits = sorted(self._recent_waits_ms)
+        return {
+            "active": self._active,
+            "queued": len(self._waiters),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_deadline": self.rejected_deadline,
+            "expired_in_queue": self.expired_in_queue,
+            "avg_wait_ms": round(sum(waits) / len(waits), 2) if waits else 0.0,
+            "p95_wait_ms": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+            "service_time_ms": round(self._service_seconds * 1000, 2) if self._service_seconds is not None else None,
+            "estimated_wait_ms": round(self.estimated_wait_seconds() * 1000, 2),
+        }
+
+    def _admit(self, wait_ms: float) -> None:
+        self.admitted += 1
+        self._recent_waits_ms.append(wait_ms)
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """Remove a waiter that stopped waiting, handing back a slot it was granted concurrently."""
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+        if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+            self._active -= 1
+            self._wake()
+        else:
+            waiter.future.cancel()
+
+    def _wake(self) -> None:
+        """Hand free slots to queued requests in FIFO order, dropping expired ones."""
+        while self._waiters and self._active < self.max_concurrency:
+            waiter = self._waiters.popleft()
+            if waiter.future.done():
+                continue
+            if time.time() >= waiter.deadline:
+                self.expired_in_queue += 1
+                waiter.future.set_exception(
+                    AdmissionRejected(503, "Request deadline expired while queued", self.retry_after())
+                )
+                continue
+            self._active += 1
+            waiter.future.set_result(None)
+
+
+# Global admission controller for LLM inference
+admission_controller = AdmissionController(
+    max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+    max_queue=settings.ADMISSION_MAX_QUEUE
+)
@@ -1,10 +1,28 @@
-"""HTTP client for storing chat logs to service_db_api."""
+"""HTTP client for storing chat logs to service_db_api.
+
+Triage requests don't wait on chat log storage: they enqueue the log on the
+background ChatLogWriter, which flushes batches to ``POST /chat-logs/bulk``
+when a batch fills up or the flush interval passes. Failed batches are
+retried with jittered exponential backoff. Batches that still fail, and logs
+arriving while the queue is full, are spilled to a local JSONL file and
+replayed after the next successful flush. All spill file I/O runs on worker
+threads so a large backlog or a slow disk doesn't stall the event loop.
+"""
+import asyncio
+import json
 import logging
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
 from typing import Dict, Any, Optional, List
 
 import httpx
 
 from service_chat.config import settings
+from service_chat.services.http_clients import http_clients
 
 logger = logging.getLogger(__name__)
 
@@ -14,69 +32,250 @@ class ChatLogStorageError(Exception):
     pass
 
 
-async def store_chat_log(
-    patient_mrn: str,
-    messages: List[Dict[str, Any]],
-    retrieval_events: Optional[List[Dict[str, Any]]] = None,
-    trace_id: Optional[str] = None,
-    channel: str = "api"
-) -> Optional[Dict[str, Any]]:
-    """
-    Store a chat log to service_db_api.
-
-    This function handles errors gracefully - it logs errors but doesn't
-    raise exceptions to avoid failing the triage response if logging fails.
-
-    Args:
-        patient_mrn: Patient Medical Record Number
-        messages: List of message dicts with role, content, timestamp, etc.
-        retrieval_events: List of retrieval event dicts
-        trace_id: Trace ID for request correlation
-        channel: Channel identifier (default: "api")
-
-    Returns:
-        dict: Created chat log including conversation_id, or None if storage failed
-    """
-    url = f"{settings.DB_API_BASE_URL}/chat-logs"
-
-    payload = {
-        "patient_mrn": patient_mrn,
-        "channel": channel,
-        "messages": messages,
-        "retrieval_events": retrieval_events,
-        "trace_id": trace_id
-    }
+def new_conversation_id(patient_mrn: str) -> str:
+    """Generate a conversation ID (same format as service_db_api) so it can be returned before the log is stored."""
+    date_str = datetime.utcnow().strftime("%Y-%m-%d")
+    return f"CONV-{date_str}-{patient_mrn}-{uuid.uuid4().hex[:8]}"
+
 
+def _ends_mid_line(path: str) -> bool:
+    """Check whether a non-empty file's last line is missing its newline (e.g. torn by a crash)."""
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(url, json=payload)
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+    except OSError:
+        return False  # Missing or empty
+
+
+class ChatLogWriter:
+    """Background batched writer of chat logs with retry and file spill-over."""
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_interval_ms: float,
+        max_queue: int,
+        max_retries: int,
+        retry_backoff_ms: float,
+        spill_path: str,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_ms / 1000
+        self.max_retries = max_retries
+        self.retry_backoff_s = retry_backoff_ms / 1000
+        self.spill_path = spill_path
+        self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional["asyncio.Task[None]"] = None
+        # Spills from enqueue() and the flush loop run on different worker threads and share the file
+        self._spill_lock = threading.Lock()
+
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.spilled = 0
+        self.replayed = 0
+
+    def start(self) -> None:
+        """Start the flush loop on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(
+                f"Started chat log writer (batch_size={self.batch_size}, "
+                f"flush_interval={self.flush_interval_s * 1000:.0f}ms, max_queue={self._queue.maxsize})"
+            )
+
+    def enqueue(
+        self,
+        patient_mrn: str,
+        messages: List[Dict[str, Any]],
+        retrieval_events: Optional[List[Dict[str, Any]]] = None,
+        trace_id: Optional[str] = None,
+        channel: str = "api",
+        conversation_id: Optional[str] = None
+    ) -> str:
+        """
+        Queue a chat log for storage without waiting for it.
+
+        If the queue is full the log is spilled to the spill file on a worker
+        thread instead.
+
+        Args:
+            patient_mrn: Patient Medical Record Number
+            messages: List of message dicts with role, content, timestamp, etc.
+            retrieval_events: List of retrieval event dicts
+            trace_id: Trace ID for request correlation
+            channel: Channel identifier (default: "api")
+            conversation_id: Conversation ID (generated if not provided)
+
+        Returns:
+            str: The chat log's conversation_id
+        """
+        conversation_id = conversation_id or new_conversation_id(patient_mrn)
+        payload = {
+            "patient_mrn": patient_mrn,
+            "channel": channel,
+            "messages": messages,
+            "retrieval_events": retrieval_events,
+            "trace_id": trace_id,
+            "conversation_id": conversation_id
+        }
+        self.enqueued += 1
+        try:
+            self._queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            logger.warning(f"Chat log queue full; spilling conversation_id={conversation_id} to {self.spill_path}")
+            asyncio.get_running_loop().run_in_executor(None, self._spill, [payload])
+        return conversation_id
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write (or spill) everything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while not self._queue.empty():
+            batch = [self._queue.get_nowait() for _ in range(min(self.batch_size, self._queue.qsize()))]
+            if not await self._write(batch):
+                await asyncio.to_thread(self._spill, batch)
 
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and write/retry/spill counters."""
+        return {
+            "queued": self._queue.qsize(),
+            "max_queue": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "retries": self.retries,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "spill_file_bytes": os.path.getsize(self.spill_path) if os.path.exists(self.spill_path) else 0,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval_s
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                if await self._write(batch):
+                    await self._replay_spill()
+                else:
+                    await asyncio.to_thread(self._spill, batch)
+            except Exception as e:
+                logger.exception(f"Unexpected error writing chat log batch: {e}")
+                await asyncio.to_thread(self._spill, batch)
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> bool:
+        """POST a batch to /chat-logs/bulk, retrying with jittered exponential backoff."""
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.retries += 1
+                await asyncio.sleep(self.retry_backoff_s * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+            try:
+                response = await http_clients.get("db_api").post("/chat-logs/bulk", json={"chat_logs": batch})
+            except httpx.RequestError as e:
+                logger.warning(f"Chat log batch write failed (attempt {attempt + 1}): {e}")
+                continue
             if response.status_code == 201:
                 result = response.json()
-                logger.info(
-                    f"Chat log stored successfully: conversation_id={result.get('conversation_id')}, "
-                    f"trace_id={trace_id}"
-                )
-                return result
-
-            # Log the error but don't raise - chat log storage is non-critical
-            logger.error(
-                f"Failed to store chat log: status={response.status_code}, "
-                f"response={response.text}, trace_id={trace_id}"
-            )
-            return None
-
-    except httpx.RequestError as e:
-        # Log the error but don't raise - chat log storage is non-critical
-        logger.error(
-            f"Error communicating with DB API for chat log storage: {str(e)}, "
-            f"trace_id={trace_id}"
-        )
-        return None
-
-    except Exception as e:
-        # Catch any unexpected errors
-        logger.error(
-            f"Unexpected error storing chat log: {str(e)}, trace_id={trace_id}"
-        )
-        return None
+                self.written += result["inserted"] + result["duplicates"]
+                self.batches += 1
+                for error in result.get("errors", []):
+                    logger.error(f"Chat log rejected by DB API: {error}")
+                return True
+            if response.status_code < 500 and response.status_code != 429:
+                # Not retryable; retrying would get the same answer
+                logger.error(f"Chat log batch rejected: status={response.status_code}, response={response.text}")
+                return True
+            logger.warning(f"Chat log batch write failed (attempt {attempt + 1}): status={response.status_code}")
+        return False
+
+    def _spill(self, batch: List[Dict[str, Any]]) -> None:
+        """Append chat logs to the local spill file."""
+        lines = "".join(json.dumps(payload, default=str) + "\n" for payload in batch)
+        try:
+            with self._spill_lock:
+                if _ends_mid_line(self.spill_path):
+                    lines = "\n" + lines  # Don't glue the first log onto a torn line
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    f.write(lines)
+            self.spilled += len(batch)
+        except OSError as e:
+            logger.error(f"Failed to spill {len(batch)} chat logs to {self.spill_path}: {e}")
+
+    def _take_spill(self) -> List[Dict[str, Any]]:
+        """
+        Read and remove the spill file (blocking; runs on a worker thread).
+
+        The spill file is first moved to ``<spill_path>.replay`` so new spills
+        can go on while it is read. A replay file left behind by an earlier
+        attempt that failed is merged with the new spills rather than replaced,
+        and lines that can't be parsed (e.g. one torn by a crash mid-write) are
+        logged and skipped.
+        """
+        replay_path = self.spill_path + ".replay"
+        with self._spill_lock:
+            if os.path.exists(self.spill_path):
+                if os.path.exists(replay_path):
+                    with open(self.spill_path, encoding="utf-8") as src, open(replay_path, "a", encoding="utf-8") as dst:
+                        if _ends_mid_line(replay_path):
+                            dst.write("\n")
+                        dst.write(src.read())
+                    os.remove(self.spill_path)
+                else:
+                    os.replace(self.spill_path, replay_path)
+            elif not os.path.exists(replay_path):
+                return []
+
+        spilled = []
+        with open(replay_path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    spilled.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    logger.error(f"Skipping unreadable chat log at {replay_path}:{line_no}: {e}")
+        os.remove(replay_path)
+        return spilled
+
+    async def _replay_spill(self) -> None:
+        """Write spilled chat logs back once the DB API is reachable again."""
+        spilled = await asyncio.to_thread(self._take_spill)
+        if not spilled:
+            return
+
+        logger.info(f"Replaying {len(spilled)} spilled chat logs")
+        for i in range(0, len(spilled), self.batch_size):
+            batch = spilled[i:i + self.batch_size]
+            if await self._write(batch):
+                self.replayed += len(batch)
+            else:
+                # Still failing: put the rest back for the next attempt
+                await asyncio.to_thread(self._spill, spilled[i:])
+                return
+
+
+# Global chat log writer (started by the app lifespan)
+chat_log_writer = ChatLogWriter(
+    batch_size=settings.CHAT_LOG_BATCH_SIZE,
+    flush_interval_ms=settings.CHAT_LOG_FLUSH_INTERVAL_MS,
+    max_queue=settings.CHAT_LOG_MAX_QUEUE,
+    max_retries=settings.CHAT_LOG_MAX_RETRIES,
+    retry_backoff_ms=settings.CHAT_LOG_RETRY_BACKOFF_MS,
+    spill_path=settings.CHAT_LOG_SPILL_PATH
+)
@@ -0,0 +1,270 @@
+"""Compact, token-budgeted rendering of a patient summary for LLM prompts.
+
+The raw summary from service_db_api is verbose JSON: Mongo ``_id`` values,
+internal identifiers, repeated ICD-10 codes and full document text. Dumping
+it with indentation wastes most of the context window and makes prompt
+evaluation the dominant cost of every request. This renderer emits terse
+line-oriented sections instead and fills a token budget in priority order:
+
+1. Allergies
+2. Active medications
+3. Conditions
+4. Recent labs (latest result per test)
+5. Recent encounters
+6. Recent claims
+7. Documents (titles first, then text excerpts, which are truncated last)
+
+Tokens are measured with the active model's tokenizer when one is supplied,
+otherwise with a characters-per-token estimate.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+TokenCounter = Callable[[str], int]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used when no tokenizer is available."""
+    return (len(text) + 3) // 4
+
+
+def _date(value: Any) -> str:
+    """ISO date part of a date or datetime value ("" if missing)."""
+    return str(value)[:10] if value else ""
+
+
+def _money(value: Any) -> str:
+    return f"${value:,.2f}" if isinstance(value, (int, float)) else ""
+
+
+class _CodeBook:
+    """Renders a code with its display name only the first time it appears."""
+
+    def __init__(self):
+        self._seen = set()
+
+    def render(self, code: Optional[str], display: Optional[str] = None) -> str:
+        if not code:
+            return display or ""
+        if code in self._seen or not display:
+            return code
+        self._seen.add(code)
+        return f"{code} {display}"
+
+
+def _allergy_lines(patient: Dict[str, Any]) -> List[str]:
+    lines = []
+    for allergy in patient.get("allergies") or []:
+        substance = allergy.get("substance")
+        if not substance:
+            continue
+        details = ", ".join(v for v in (allergy.get("reaction"), allergy.get("severity")) if v)
+        lines.append(f"- {substance}" + (f": {details}" if details else ""))
+    return lines
+
+
+def _medication_lines(patient: Dict[str, Any]) -> List[str]:
+    active, ended = [], []
+    seen = set()
+    for med in patient.get("medications") or []:
+        name = med.get("name")
+        if not name or name in seen:
+            continue
+        seen.add(name)
+        if med.get("end_date"):
+            ended.append(f"- {name} (stopped {_date(med['end_date'])})")
+        else:
+            line = f"- {name}"
+            if med.get("start_date"):
+                line += f" (since {_date(med['start_date'])})"
+            if med.get("sig"):
+                line += f": {med['sig']}"
+            active.append(line)
+    # Current medications outrank discontinued ones when the budget is tight
+    return active + ended
+
+
+def _condition_lines(patient: Dict[str, Any], codes: _CodeBook) -> List[str]:
+    lines = []
+    for condition in patient.get("conditions") or []:
+        rendered = codes.render(condition.get("code"), condition.get("display"))
+        if not rendered:
+            continue
+        if condition.get("onset_date"):
+            rendered += f" (onset {_date(condition['onset_date'])})"
+        lines.append(f"- {rendered}")
+    return lines
+
+
+def _lab_lines(encounters: List[Dict[str, Any]]) -> List[str]:
+    latest: Dict[str, Dict[str, Any]] = {}
+    for encounter in encounters:
+        for lab in encounter.get("labs") or []:
+            key = lab.get("loinc") or lab.get("name")
+            if not key:
+                continue
+            collected = str(lab.get("collected_at") or encounter.get("start") or "")
+            if key not in latest or collected > latest[key]["_collected"]:
+                latest[key] = {**lab, "_collected": collected}
+    lines = []
+    for lab in sorted(latest.values(), key=lambda l: l["_collected"], reverse=True):
+        unit = lab.get("unit") or ""
+        value = f"{lab.get('value', '')}{unit if unit == '%' else ' ' + unit}".strip()
+        lines.append(f"- {lab.get('name') or lab.get('loinc')}: {value} ({_date(lab['_collected'])})")
+    return lines
+
+
+def _encounter_lines(encounters: List[Dict[str, Any]], codes: _CodeBook) -> List[str]:
+    lines = []
+    for encounter in encounters:
+        parts = [" ".join(v for v in (_date(encounter.get("start")), encounter.get("type")) if v)]
+        if encounter.get("location"):
+            parts[0] += f" at {encounter['location']}"
+        diagnoses = [codes.render(d.get("code"), d.get("display")) for d in encounter.get("diagnoses") or []]
+        if any(diagnoses):
+            parts.append("dx " + ", ".join(d for d in diagnoses if d))
+        vitals = encounter.get("vitals") or {}
+        vital_parts = []
+        if vitals.get("bp_systolic") and vitals.get("bp_diastolic"):
+            vital_parts.append(f"BP {vitals['bp_systolic']}/{vitals['bp_diastolic']}")
+        if vitals.get("heart_rate"):
+            vital_parts.append(f"HR {vitals['heart_rate']}")
+        if vitals.get("weight_kg"):
+            vital_parts.append(f"wt {vitals['weight_kg']}kg")
+        if vital_parts:
+            parts.append(" ".join(vital_parts))
+        if encounter.get("notes"):
+            parts.append(encounter["notes"])
+        lines.append("- " + "; ".join(p for p in parts if p))
+    return lines
+
+
+def _claim_lines(claims: List[Dict[str, Any]], codes: _CodeBook) -> List[str]:
+    lines = []
+    for claim in claims:
+        parts = [" ".join(v for v in (_date(claim.get("service_date")), claim.get("payer"), claim.get("status")) if v)]
+        if claim.get("cpt_codes"):
+            parts.append("CPT " + ", ".join(dict.fromkeys(claim["cpt_codes"])))
+        if claim.get("icd10_codes"):
+            parts.append("ICD " + ", ".join(codes.render(c) for c in dict.fromkeys(claim["icd10_codes"])))
+        amounts = [
+            f"{label} {_money(claim.get(field))}"
+            for label, field in (("billed", "billed_amount"), ("allowed", "allowed_amount"),
+                                 ("patient owes", "patient_responsibility"))
+            if _money(claim.get(field))
+        ]
+        if amounts:
+            parts.append(", ".join(amounts))
+        lines.append("- " + "; ".join(p for p in parts if p))
+    return lines
+
+
+def _document_title(document: Dict[str, Any]) -> str:
+    meta = ", ".join(v for v in (document.get("source_type"), _date((document.get("metadata") or {}).get("created_at"))) if v)
+    return f"- {document.get('title') or 'Untitled'}" + (f" ({meta})" if meta else "")
+
+
+def _truncate_to_tokens(text: str, max_tokens: int, count_tokens: TokenCounter) -> str:
+    """Longest word-boundary prefix of text (plus an ellipsis) that fits in max_tokens."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(" ".join(words[:mid]) + "...") <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return " ".join(words[:low]) + "..." if low else ""
+
+
+class _Budget:
+    """Accumulates lines while the running token count stays within the budget."""
+
+    def __init__(self, max_tokens: int, count_tokens: TokenCounter):
+        self.remaining = max_tokens
+        self.count_tokens = count_tokens
+        self.lines: List[str] = []
+
+    def cost(self, line: str) -> int:
+        return self.count_tokens(line + "\n")
+
+    def add(self, line: str) -> bool:
+        cost = self.cost(line)
+        if cost > self.remaining:
+            return False
+        self.lines.append(line)
+        self.remaining -= cost
+        return True
+
+    def add_section(self, heading: str, items: Iterable[str]) -> None:
+        """Add a heading and as many items as fit, noting how many were omitted."""
+        items = list(items)
+        if not items or self.cost(heading) + self.cost(items[0]) > self.remaining:
+            return
+        self.add(heading)
+        for i, item in enumerate(items):
+            if not self.add(item):
+                self.add(f"- ({len(items) - i} more omitted)")
+                return
+
+
+def render_patient_context(
+    patient_summary: Dict[str, Any],
+    max_tokens: int,
+    count_tokens: Optional[TokenCounter] = None,
+) -> Tuple[str, int]:
+    """
+    Render a patient summary as compact text within a token budget.
+
+    Args:
+        patient_summary: Patient summary from service_db_api
+        max_tokens: Token budget for the rendered context
+        count_tokens: Tokenizer-backed counter for the active model (estimate if None)
+
+    Returns:
+        tuple: (rendered text, tokens used)
+    """
+    count_tokens = count_tokens or estimate_tokens
+    patient = patient_summary.get("patient") or {}
+    encounters = patient_summary.get("recent_encounters") or []
+    claims = patient_summary.get("recent_claims") or []
+    documents = patient_summary.get("documents") or []
+    codes = _CodeBook()
+
+    budget = _Budget(max_tokens, count_tokens)
+    budget.add_section("ALLERGIES:", _allergy_lines(patient))
+    budget.add_section("MEDICATIONS:", _medication_lines(patient))
+    budget.add_section("CONDITIONS:", _condition_lines(patient, codes))
+    budget.add_section("RECENT LABS:", _lab_lines(encounters))
+    budget.add_section("RECENT ENCOUNTERS:", _encounter_lines(encounters, codes))
+    budget.add_section("RECENT CLAIMS:", _claim_lines(claims, codes))
+
+    # Documents: all titles first, then text excerpts in the budget that is left
+    documents = [d for d in documents if d.get("title") or d.get("text")]
+    if documents and budget.cost("DOCUMENTS:") + budget.cost(_document_title(documents[0])) <= budget.remaining:
+        budget.add("DOCUMENTS:")
+        titled = []
+        for document in documents:
+            title = _document_title(document)
+            if not budget.add(title):
+                break
+            titled.append((len(budget.lines) - 1, document))
+        for n, (index, document) in enumerate(titled):
+            text = " ".join((document.get("text") or "").split())
+            if not text or budget.remaining <= 0:
+                continue
+            # Share what's left evenly across the remaining documents
+            share = budget.remaining // (len(titled) - n)
+            excerpt_prefix = budget.lines[index] + ": "
+            available = share - (budget.cost(excerpt_prefix) - budget.cost(budget.lines[index]))
+            excerpt = _truncate_to_tokens(text, available, count_tokens) if available > 0 else ""
+            if not excerpt:
+                continue
+            line = excerpt_prefix + excerpt
+            extra = budget.cost(line) - budget.cost(budget.lines[index])
+            if extra <= budget.remaining:
+                budget.lines[index] = line
+                budget.remaining -= extra
+
+    return "\n".join(budget.lines), max_tokens - budget.remaining
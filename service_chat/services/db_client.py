@@ -1,8 +1,13 @@
 """HTTP client for communicating with service_db_api."""
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, Awaitable, Callable, Optional
 
 from service_chat.config import settings
+from service_chat.services.http_clients import http_clients
 
 
 class PatientNotFoundError(Exception):
@@ -15,35 +20,200 @@ class DBAPIError(Exception):
     pass
 
 
+@dataclass
+class _SummaryEntry:
+    summary: Dict[str, Any]
+    etag: Optional[str]
+    size_bytes: int
+    validated_at: float
+
+
+class SummaryCache:
+    """
+    In-process LRU cache of patient summaries with conditional revalidation.
+
+    Entries younger than ttl_seconds are served without contacting
+    service_db_api. Older entries are revalidated with If-None-Match, so an
+    unchanged summary costs a bodyless 304 instead of a full transfer.
+    Cached summaries are shared between requests and must not be mutated.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, _SummaryEntry]" = OrderedDict()
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_fetched = 0
+        self.bytes_saved = 0
+
+    def get(self, mrn: str) -> Optional[_SummaryEntry]:
+        entry = self._entries.get(mrn)
+        if entry is not None:
+            self._entries.move_to_end(mrn)
+        return entry
+
+    def is_fresh(self, entry: _SummaryEntry) -> bool:
+        return time.monotonic() - entry.validated_at <= self.ttl_seconds
+
+    def record_fresh_hit(self, entry: _SummaryEntry) -> None:
+        self.fresh_hits += 1
+        self.bytes_saved += entry.size_bytes
+
+    def record_not_modified(self, entry: _SummaryEntry) -> None:
+        entry.validated_at = time.monotonic()
+        self.revalidated += 1
+        self.bytes_saved += entry.size_bytes
+
+    def put(self, mrn: str, summary: Dict[str, Any], etag: Optional[str], size_bytes: int) -> None:
+        self.misses += 1
+        self.bytes_fetched += size_bytes
+        self._entries[mrn] = _SummaryEntry(summary, etag, size_bytes, time.monotonic())
+        self._entries.move_to_end(mrn)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, mrn: str) -> None:
+        self._entries.pop(mrn, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit ratio (fresh hits + 304 revalidations) and transfer savings."""
+        lookups = self.fresh_hits + self.revalidated + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "fresh_hits": self.fresh_hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_ratio": round((self.fresh_hits + self.revalidated) / lookups, 3) if lookups else 0.0,
+            "bytes_fetched": self.bytes_fetched,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+# Global summary cache (None when disabled)
+summary_cache: Optional[SummaryCache] = (
+    SummaryCache(settings.SUMMARY_CACHE_MAX_ENTRIES, settings.SUMMARY_CACHE_TTL_SECONDS)
+    if settings.SUMMARY_CACHE_ENABLED else None
+)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight call.
+
+    The first caller starts the call as a task; callers arriving while it is
+    running await the same task and share its result or exception. The task
+    is shielded, so a caller that is cancelled (e.g. its client disconnected)
+    doesn't cancel the fetch for the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved even if every caller was cancelled
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
+
+
+# Concurrent summary fetches for the same MRN share one request
+summary_fetches = SingleFlight()
+
+
+def summary_view() -> str:
+    """
+    Summary view to request from service_db_api.
+
+    The compact view has only the fields the compact prompt renderer uses
+    (and document excerpts), so it is smaller to read, send and parse. The
+    JSON prompt format dumps the whole summary, so it needs the full view.
+    """
+    if settings.SUMMARY_VIEW != "auto":
+        return settings.SUMMARY_VIEW
+    return "full" if settings.PROMPT_CONTEXT_FORMAT == "json" else "compact"
+
+
 async def get_patient_summary(mrn: str) -> Dict[str, Any]:
     """
     Fetch patient summary from service_db_api.
 
+    With the summary cache enabled, a recently validated copy is returned
+    directly and an older one is revalidated with its ETag. Concurrent
+    fetches for the same MRN are coalesced into a single request, whose
+    result (or error) is shared by every caller.
+
     Args:
         mrn: Patient Medical Record Number
 
     Returns:
         dict: Patient summary including demographics, encounters, claims, and documents
+            (only the fields the prompt needs, see summary_view())
 
     Raises:
         PatientNotFoundError: If patient with given MRN is not found
         DBAPIError: If there's an error communicating with the DB API
     """
-    url = f"{settings.DB_API_BASE_URL}/patients/{mrn}/summary"
+    entry = summary_cache.get(mrn) if summary_cache is not None else None
+    if entry is not None and summary_cache.is_fresh(entry):
+        summary_cache.record_fresh_hit(entry)
+        return entry.summary
+
+    return await summary_fetches.do(mrn, lambda: _fetch_patient_summary(mrn, entry))
+
+
+async def _fetch_patient_summary(mrn: str, entry: Optional[_SummaryEntry]) -> Dict[str, Any]:
+    """Request the summary, revalidating the cached entry if there is one."""
+    headers = {"If-None-Match": entry.etag} if entry is not None and entry.etag else {}
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url)
+        response = await http_clients.get("db_api").get(
+            f"/patients/{mrn}/summary",
+            params={"view": summary_view()},
+            headers=headers
+        )
+
+        if response.status_code == 304 and entry is not None:
+            summary_cache.record_not_modified(entry)
+            return entry.summary
 
-            if response.status_code == 404:
-                raise PatientNotFoundError(f"Patient with MRN {mrn} not found")
+        if response.status_code == 404:
+            if summary_cache is not None:
+                summary_cache.invalidate(mrn)
+            raise PatientNotFoundError(f"Patient with MRN {mrn} not found")
 
-            if response.status_code != 200:
-                raise DBAPIError(
-                    f"DB API returned status {response.status_code}: {response.text}"
-                )
+        if response.status_code != 200:
+            raise DBAPIError(
+                f"DB API returned status {response.status_code}: {response.text}"
+            )
 
-            return response.json()
+        summary = response.json()
+        if summary_cache is not None:
+            summary_cache.put(mrn, summary, response.headers.get("ETag"), len(response.content))
+        return summary
 
     except httpx.RequestError as e:
         raise DBAPIError(f"Error communicating with DB API: {str(e)}")
@@ -0,0 +1,129 @@
+"""Pool of llama.cpp model replicas sized to the available CPU cores.
+
+A single llama.cpp context with a fixed thread count leaves most cores idle
+on large nodes. The pool runs N replicas, each a ``Llama`` instance over the
+same GGUF file (the weights are mmapped read-only, so the OS page cache
+shares one copy) with its own continuous-batching scheduler, thread budget
+and optional CPU affinity. Requests go to the least-loaded replica.
+"""
+import logging
+import os
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Union
+
+from .gguf_scheduler import GGUFBatchScheduler
+from .kv_cache import PrefixStateCache
+
+logger = logging.getLogger(__name__)
+
+
+def available_cores() -> List[int]:
+    """CPU cores this process may run on (respects cgroup/taskset restrictions)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+class GGUFReplicaPool:
+    """Dispatches generation requests to the least-loaded scheduler replica."""
+
+    def __init__(self, replicas: List[GGUFBatchScheduler], prefix_cache: Optional[PrefixStateCache] = None):
+        if not replicas:
+            raise ValueError("GGUFReplicaPool requires at least one replica")
+        self.replicas = replicas
+        self.prefix_cache = prefix_cache
+
+    def submit(self, prompt: Union[str, Sequence[str]], **kwargs: Any) -> Future:
+        """
+        Submit a prompt to the replica with the lowest load per slot.
+
+        Accepts the same keyword arguments as GGUFBatchScheduler.submit.
+
+        Returns:
+            Future: Resolves to a GenerationResult
+        """
+        replica = min(self.replicas, key=lambda r: r.load() / r.n_slots)
+        return replica.submit(prompt, **kwargs)
+
+    def load(self) -> int:
+        """Total requests decoding or waiting across all replicas."""
+        return sum(replica.load() for replica in self.replicas)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool utilization plus per-replica scheduler stats."""
+        per_replica = [replica.stats() for replica in self.replicas]
+        slots = sum(r["slots"] for r in per_replica)
+        active = sum(r["active"] for r in per_replica)
+        return {
+            "replicas": len(per_replica),
+            "slots": slots,
+            "active": active,
+            "queued": sum(r["queued"] for r in per_replica),
+            "utilization": round(active / slots, 3) if slots else 0.0,
+            "tokens_per_second": round(sum(r["tokens_per_second"] for r in per_replica), 2),
+            "prefix_cache": self.prefix_cache.stats() if self.prefix_cache is not None else None,
+            "per_replica": per_replica,
+        }
+
+    def shutdown(self) -> None:
+        """Shut down every replica's scheduler."""
+        for replica in self.replicas:
+            replica.shutdown()
+
+
+def create_replica_pool(
+    load_llm: Callable[[int], Any],
+    replicas: int,
+    n_threads: int,
+    n_slots: int,
+    n_ctx: int,
+    n_batch: int,
+    pin_cpus: bool = False,
+    prefix_cache_bytes: int = 0,
+) -> GGUFReplicaPool:
+    """
+    Build a replica pool.
+
+    Args:
+        load_llm: Callable returning the ``Llama`` instance for replica index i
+        replicas: Number of replicas (0 = one per ``n_threads`` available cores)
+        n_threads: llama.cpp threads per replica
+        n_slots: Sequence slots per replica scheduler
+        n_ctx: Context window per sequence
+        n_batch: Max tokens per decode step
+        pin_cpus: Pin each replica to its own disjoint range of ``n_threads`` cores
+        prefix_cache_bytes: Memory bound of the shared prefix KV-state cache (0 = disabled)
+
+    Returns:
+        GGUFReplicaPool: Pool with one running scheduler per replica
+    """
+    cores = available_cores()
+    if replicas <= 0:
+        replicas = max(1, len(cores) // n_threads)
+    logger.info(
+        f"Creating GGUF replica pool: replicas={replicas}, threads/replica={n_threads}, "
+        f"available_cores={len(cores)}, pin_cpus={pin_cpus}"
+    )
+
+    prefix_cache = PrefixStateCache(prefix_cache_bytes) if prefix_cache_bytes > 0 else None
+
+    schedulers = []
+    for i in range(replicas):
+        affinity: Optional[Set[int]] = None
+        if pin_cpus:
+            assigned = cores[i * n_threads:(i + 1) * n_threads]
+            if len(assigned) == n_threads:
+                affinity = set(assigned)
+            else:
+                logger.warning(f"Not enough cores to pin gguf-replica-{i}; leaving it unpinned")
+        schedulers.append(GGUFBatchScheduler(
+            load_llm(i),
+            n_slots=n_slots,
+            n_ctx=n_ctx,
+            n_batch=n_batch,
+            n_threads=n_threads,
+            name=f"gguf-replica-{i}",
+            cpu_affinity=affinity,
+            prefix_cache=prefix_cache,
+        ))
+    return GGUFReplicaPool(schedulers, prefix_cache=prefix_cache)
@@ -0,0 +1,556 @@
+"""Continuous-batching inference scheduler for llama.cpp (GGUF) models.
+
+Instead of running one generation at a time on a single-worker thread pool,
+the scheduler keeps a queue of pending prompts and decodes several sequences
+together in one llama.cpp context:
+
+- Each active request owns a sequence slot (``seq_id``) in the shared KV cache
+- Every step builds ONE batch holding the next sampled token of every
+  generating sequence plus prompt chunks of newly admitted sequences
+- A single ``llama_decode`` call evaluates the whole batch
+- Requests join (prefill) and leave (KV cache cleared) between decode steps
+
+Aggregate tokens/sec therefore grows with concurrency instead of being capped
+at one stream.
+"""
+import ctypes
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from .kv_cache import PrefixState, PrefixStateCache, prefix_key
+
+logger = logging.getLogger(__name__)
+
+# Number of highest-probability candidates considered before top-p filtering
+_TOP_K = 40
+
+
+@dataclass
+class GenerationResult:
+    """Result of a single generation request."""
+    text: str
+    finish_reason: str  # "stop" or "length"
+    prompt_tokens: int
+    completion_tokens: int
+    queue_wait_ms: float
+    ttft_ms: Optional[float]
+    elapsed_ms: float
+
+
+@dataclass
+class _Sequence:
+    """State of one request while it is queued or decoding."""
+    segments: List[str]
+    max_tokens: int
+    temperature: float
+    top_p: float
+    presence_penalty: float
+    stop: List[str]
+    future: Future
+    on_token: Optional[Callable[[str], None]] = None
+    on_start: Optional[Callable[[float], None]] = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    first_token_at: Optional[float] = None
+    seq_id: int = -1
+    prompt_tokens: List[int] = field(default_factory=list)
+    # Prefix boundaries (token count, cache key) whose KV state should be snapshotted
+    pending_snapshots: List[Tuple[int, str]] = field(default_factory=list)
+    n_past: int = 0
+    last_token: Optional[int] = None
+    generated: List[int] = field(default_factory=list)
+    text_bytes: bytes = b""
+    emitted_chars: int = 0
+
+    @property
+    def generating(self) -> bool:
+        """True once the whole prompt has been evaluated."""
+        return self.last_token is not None
+
+
+# --- llama.cpp binding compatibility helpers ---
+# The low-level API was renamed across llama-cpp-python releases; resolve the
+# available symbol at call time instead of pinning a specific version.
+
+def _new_context(llama_cpp: Any, model: Any, params: Any) -> Any:
+    if hasattr(llama_cpp, "llama_init_from_model"):
+        return llama_cpp.llama_init_from_model(model, params)
+    return llama_cpp.llama_new_context_with_model(model, params)
+
+
+def _seq_rm(llama_cpp: Any, ctx: Any, seq_id: int) -> None:
+    if hasattr(llama_cpp, "llama_memory_seq_rm"):
+        llama_cpp.llama_memory_seq_rm(llama_cpp.llama_get_memory(ctx), seq_id, -1, -1)
+    elif hasattr(llama_cpp, "llama_kv_self_seq_rm"):
+        llama_cpp.llama_kv_self_seq_rm(ctx, seq_id, -1, -1)
+    else:
+        llama_cpp.llama_kv_cache_seq_rm(ctx, seq_id, -1, -1)
+
+
+def _resolve(future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+    """Resolve a future, tolerating callers that cancelled it concurrently."""
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class GGUFBatchScheduler:
+    """
+    Continuous-batching scheduler over a loaded ``llama_cpp.Llama`` model.
+
+    The scheduler creates its own llama.cpp context (sharing the model
+    weights) sized for ``n_slots`` concurrent sequences of ``n_ctx`` tokens
+    each, and runs the decode loop on a dedicated background thread.
+    """
+
+    def __init__(
+        self,
+        llm: Any,
+        n_slots: int,
+        n_ctx: int,
+        n_batch: int,
+        n_threads: int,
+        name: str = "gguf-scheduler",
+        cpu_affinity: Optional[Set[int]] = None,
+        prefix_cache: Optional[PrefixStateCache] = None,
+    ):
+        try:
+            import llama_cpp
+        except ImportError:
+            raise ImportError(
+                "llama-cpp-python is required for GGUF inference. "
+                "Install with: pip install llama-cpp-python"
+            )
+
+        self._llama_cpp = llama_cpp
+        self._llm = llm
+        self.name = name
+        self.n_slots = n_slots
+        self.n_ctx = n_ctx
+        self.n_batch = n_batch
+        self.cpu_affinity = cpu_affinity
+        self.prefix_cache = prefix_cache
+        self._n_vocab = llm.n_vocab()
+
+        params = llama_cpp.llama_context_default_params()
+        params.n_ctx = n_ctx * n_slots
+        params.n_batch = n_batch
+        params.n_seq_max = n_slots
+        params.n_threads = n_threads
+        params.n_threads_batch = n_threads
+        self._ctx = _new_context(llama_cpp, llm.model, params)
+        if self._ctx is None:
+            raise RuntimeError("Failed to create llama.cpp context for batch scheduler")
+        self._batch = llama_cpp.llama_batch_init(n_batch, 0, n_slots)
+
+        self._eog_ids = self._resolve_eog_ids()
+        self._rng = np.random.default_rng()
+
+        self._pending: "queue.Queue[_Sequence]" = queue.Queue()
+        self._active: List[_Sequence] = []
+        self._free_slots: List[int] = list(range(n_slots))
+        self._stopping = False
+
+        # Aggregate counters (read by stats())
+        self._completed = 0
+        self._failed = 0
+        self._tokens_generated = 0
+        self._decode_steps = 0
+        self._started_at = time.time()
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        logger.info(
+            f"[{name}] Started continuous-batching scheduler "
+            f"(slots={n_slots}, n_ctx/slot={n_ctx}, n_batch={n_batch}, threads={n_threads}, "
+            f"cpus={sorted(cpu_affinity) if cpu_affinity else 'any'})"
+        )
+
+    def _resolve_eog_ids(self) -> Set[int]:
+        """Collect end-of-generation token ids (EOS plus chat-template terminators)."""
+        eog = {self._llm.token_eos()}
+        for marker in ("<|im_end|>", "<|endoftext|>", "</s>"):
+            try:
+                tokens = self._llm.tokenize(marker.encode("utf-8"), add_bos=False, special=True)
+            except Exception:
+                continue
+            if len(tokens) == 1:
+                eog.add(tokens[0])
+        return eog
+
+    # --- Public API ---
+
+    def submit(
+        self,
+        prompt: Union[str, Sequence[str]],
+        max_tokens: int,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        presence_penalty: float = 0.0,
+        stop: Optional[List[str]] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        on_start: Optional[Callable[[float], None]] = None,
+    ) -> Future:
+        """
+        Queue a prompt for generation.
+
+        Args:
+            prompt: Full prompt text, or ordered prompt segments whose
+                concatenation is the prompt. Every segment except the last is
+                treated as a reusable prefix for the KV prefix cache.
+            max_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature (0 = greedy)
+            top_p: Nucleus sampling threshold
+            presence_penalty: Penalty subtracted from logits of already generated tokens
+            stop: Stop strings that end generation
+            on_token: Optional callback invoked (on the scheduler thread) with
+                each newly decoded text fragment
+            on_start: Optional callback invoked (on the scheduler thread) with the
+                queue wait in milliseconds when the request is admitted to a slot
+
+        Returns:
+            Future: Resolves to a GenerationResult
+        """
+        if self._stopping:
+            raise RuntimeError("GGUF batch scheduler is shut down")
+        future: Future = Future()
+        self._pending.put(_Sequence(
+            segments=[prompt] if isinstance(prompt, str) else list(prompt),
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            presence_penalty=presence_penalty,
+            stop=list(stop or []),
+            future=future,
+            on_token=on_token,
+            on_start=on_start,
+        ))
+        return future
+
+    def load(self) -> int:
+        """Number of requests currently decoding or waiting."""
+        return len(self._active) + self._pending.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of scheduler utilization and throughput."""
+        uptime = max(time.time() - self._started_at, 1e-6)
+        return {
+            "name": self.name,
+            "cpus": sorted(self.cpu_affinity) if self.cpu_affinity else None,
+            "slots": self.n_slots,
+            "active": len(self._active),
+            "queued": self._pending.qsize(),
+            "completed": self._completed,
+            "failed": self._failed,
+            "tokens_generated": self._tokens_generated,
+            "decode_steps": self._decode_steps,
+            "tokens_per_second": round(self._tokens_generated / uptime, 2),
+        }
+
+    def shutdown(self) -> None:
+        """Stop the decode loop, fail outstanding requests and free llama.cpp resources."""
+        self._stopping = True
+        self._thread.join(timeout=30)
+        error = RuntimeError("GGUF batch scheduler shut down")
+        for seq in self._active:
+            _resolve(seq.future, error=error)
+        while True:
+            try:
+                seq = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            _resolve(seq.future, error=error)
+        if self._thread.is_alive():
+            # Still inside llama_decode (e.g. a long CPU prefill); freeing now would pull the
+            # context out from under it. Leave the memory to process exit.
+            logger.warning(f"[{self.name}] Decode step still running at shutdown; not freeing the llama.cpp context")
+        else:
+            self._llama_cpp.llama_batch_free(self._batch)
+            self._llama_cpp.llama_free(self._ctx)
+        logger.info(f"[{self.name}] Scheduler shut down")
+
+    # --- Decode loop ---
+
+    def _run(self) -> None:
+        if self.cpu_affinity and hasattr(os, "sched_setaffinity"):
+            # Applies to this thread; llama.cpp compute threads spawned from it inherit the mask
+            os.sched_setaffinity(0, self.cpu_affinity)
+        while not self._stopping:
+            if not self._active:
+                # Idle: block until work arrives
+                try:
+                    seq = self._pending.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                self._admit(seq)
+            self._admit_pending()
+            if not self._active:
+                continue
+            try:
+                self._step()
+            except Exception as e:
+                logger.exception(f"[{self.name}] Decode step failed: {e}")
+                for seq in list(self._active):
+                    self._finish(seq, error=e)
+
+    def _admit_pending(self) -> None:
+        while self._free_slots:
+            try:
+                seq = self._pending.get_nowait()
+            except queue.Empty:
+                return
+            self._admit(seq)
+
+    def _admit(self, seq: _Sequence) -> None:
+        """Assign a sequence slot, tokenize the prompt and restore any cached prefix (join between steps)."""
+        if seq.future.cancelled():
+            return
+        try:
+            boundaries = self._tokenize_segments(seq)
+        except Exception as e:
+            _resolve(seq.future, error=e)
+            return
+        if len(seq.prompt_tokens) >= self.n_ctx:
+            _resolve(seq.future, error=ValueError(
+                f"Prompt is {len(seq.prompt_tokens)} tokens, exceeding the context window of {self.n_ctx}"
+            ))
+            return
+        seq.seq_id = self._free_slots.pop()
+        seq.started_at = time.time()
+        self._active.append(seq)
+
+        if self.prefix_cache is not None and boundaries:
+            self._restore_prefix(seq, boundaries)
+            seq.pending_snapshots = [
+                (n_tokens, key) for n_tokens, key in boundaries
+                if n_tokens > seq.n_past and not self.prefix_cache.contains(key)
+            ]
+
+        if seq.on_start is not None:
+            try:
+                seq.on_start(round((seq.started_at - seq.submitted_at) * 1000, 2))
+            except Exception as e:
+                logger.warning(f"[{self.name}] on_start callback failed: {e}")
+
+    def _tokenize_segments(self, seq: _Sequence) -> List[Tuple[int, str]]:
+        """
+        Tokenize each prompt segment separately and concatenate the tokens.
+
+        Tokenizing per segment keeps prefix token boundaries identical across
+        prompts that share a prefix.
+
+        Returns:
+            list: (token count, cache key) for each prefix boundary
+        """
+        tokens: List[int] = []
+        boundaries: List[Tuple[int, str]] = []
+        prefix_text = ""
+        for i, segment in enumerate(seq.segments):
+            tokens += self._llm.tokenize(segment.encode("utf-8"), add_bos=(i == 0), special=True)
+            prefix_text += segment
+            if i < len(seq.segments) - 1 and tokens:
+                boundaries.append((len(tokens), prefix_key(prefix_text)))
+        seq.prompt_tokens = tokens
+        return boundaries
+
+    def _restore_prefix(self, seq: _Sequence, boundaries: List[Tuple[int, str]]) -> None:
+        """Load the longest cached prefix KV state into the sequence slot."""
+        found = self.prefix_cache.get_longest([key for _, key in boundaries])
+        if found is None:
+            self.prefix_cache.record(0)
+            return
+        index, state = found
+        # Keep at least one prompt token to evaluate so the first sample has logits
+        if state.n_tokens != boundaries[index][0] or state.n_tokens >= len(seq.prompt_tokens):
+            self.prefix_cache.record(0, skipped=True)
+            return
+        buffer = (ctypes.c_uint8 * len(state.data)).from_buffer_copy(state.data)
+        loaded = self._llama_cpp.llama_state_seq_set_data(self._ctx, buffer, len(state.data), seq.seq_id)
+        if loaded == 0:
+            # No room in the KV cache for the restored cells; fall back to full prefill
+            logger.warning(f"[{self.name}] Failed to restore prefix state; evaluating full prompt")
+            _seq_rm(self._llama_cpp, self._ctx, seq.seq_id)
+            self.prefix_cache.record(0, skipped=True)
+            return
+        seq.n_past = state.n_tokens
+        self.prefix_cache.record(state.n_tokens)
+        logger.info(
+            f"[{self.name}] Restored cached prefix: skipped {state.n_tokens}/{len(seq.prompt_tokens)} prompt tokens"
+        )
+
+    def _snapshot_prefix(self, seq: _Sequence, key: str) -> None:
+        """Save the sequence's KV state right after it evaluated a prefix boundary."""
+        size = self._llama_cpp.llama_state_seq_get_size(self._ctx, seq.seq_id)
+        buffer = (ctypes.c_uint8 * size)()
+        written = self._llama_cpp.llama_state_seq_get_data(self._ctx, buffer, size, seq.seq_id)
+        if written:
+            self.prefix_cache.put(key, PrefixState(n_tokens=seq.n_past, data=bytes(buffer[:written])))
+
+    def _add_token(self, n: int, token: int, pos: int, seq_id: int, logits: bool) -> None:
+        batch = self._batch
+        batch.token[n] = token
+        batch.pos[n] = pos
+        batch.n_seq_id[n] = 1
+        batch.seq_id[n][0] = seq_id
+        batch.logits[n] = logits
+
+    def _step(self) -> None:
+        """Build one shared batch, decode it and sample for every sequence that produced logits."""
+        # Callers that gave up (e.g. client disconnected) leave before the step
+        for seq in [s for s in self._active if s.future.cancelled()]:
+            self._finish(seq)
+
+        n = 0
+        to_sample = []  # (sequence, batch index of its logits)
+
+        # One token for every generating sequence
+        for seq in self._active:
+            if seq.generating and n < self.n_batch:
+                self._add_token(n, seq.last_token, seq.n_past, seq.seq_id, True)
+                seq.n_past += 1
+                to_sample.append((seq, n))
+                n += 1
+
+        # Remaining batch budget goes to prompt chunks of newly admitted sequences
+        for seq in self._active:
+            if seq.generating or n >= self.n_batch:
+                continue
+            # Stop chunks at the next prefix boundary so its KV state can be snapshotted
+            end = seq.pending_snapshots[0][0] if seq.pending_snapshots else len(seq.prompt_tokens)
+            chunk = seq.prompt_tokens[seq.n_past:min(end, seq.n_past + (self.n_batch - n))]
+            completes_prompt = seq.n_past + len(chunk) == len(seq.prompt_tokens)
+            for i, token in enumerate(chunk):
+                is_last = completes_prompt and i == len(chunk) - 1
+                self._add_token(n, token, seq.n_past, seq.seq_id, is_last)
+                seq.n_past += 1
+                if is_last:
+                    to_sample.append((seq, n))
+                n += 1
+
+        if n == 0:
+            return
+        self._batch.n_tokens = n
+        rc = self._llama_cpp.llama_decode(self._ctx, self._batch)
+        if rc != 0:
+            raise RuntimeError(f"llama_decode returned {rc} (batch of {n} tokens)")
+        self._decode_steps += 1
+
+        for seq in self._active:
+            if seq.pending_snapshots and seq.n_past == seq.pending_snapshots[0][0]:
+                _, key = seq.pending_snapshots.pop(0)
+                self._snapshot_prefix(seq, key)
+
+        for seq, index in to_sample:
+            logits_ptr = self._llama_cpp.llama_get_logits_ith(self._ctx, index)
+            logits = np.ctypeslib.as_array(logits_ptr, shape=(self._n_vocab,))
+            self._accept(seq, self._sample(logits, seq))
+
+    def _sample(self, logits: np.ndarray, seq: _Sequence) -> int:
+        """Presence penalty, then temperature + top-k + top-p sampling."""
+        logits = np.array(logits, dtype=np.float32)
+        if seq.presence_penalty and seq.generated:
+            logits[np.unique(seq.generated)] -= seq.presence_penalty
+        if seq.temperature <= 0:
+            return int(np.argmax(logits))
+
+        top = np.argpartition(logits, -_TOP_K)[-_TOP_K:]
+        top = top[np.argsort(-logits[top])]
+        scaled = logits[top] / seq.temperature
+        probs = np.exp(scaled - scaled.max())
+        probs /= probs.sum()
+        keep = int(np.searchsorted(np.cumsum(probs), seq.top_p)) + 1
+        probs = probs[:keep] / probs[:keep].sum()
+        return int(top[self._rng.choice(keep, p=probs)])
+
+    def _accept(self, seq: _Sequence, token: int) -> None:
+        """Record a sampled token, stream it, and retire the sequence if it is done."""
+        now = time.time()
+        if seq.first_token_at is None:
+            seq.first_token_at = now
+        if token in self._eog_ids:
+            self._finish(seq, finish_reason="stop")
+            return
+
+        seq.last_token = token
+        seq.generated.append(token)
+        self._tokens_generated += 1
+        seq.text_bytes += self._llm.detokenize([token])
+        text = seq.text_bytes.decode("utf-8", errors="ignore")
+
+        for stop in seq.stop:
+            index = text.find(stop)
+            if index != -1:
+                self._emit(seq, text[:index])
+                self._finish(seq, finish_reason="stop", text=text[:index])
+                return
+
+        self._emit(seq, text)
+        if len(seq.generated) >= seq.max_tokens or seq.n_past + 1 >= self.n_ctx:
+            self._finish(seq, finish_reason="length", text=text)
+
+    def _emit(self, seq: _Sequence, text: str) -> None:
+        if seq.on_token is None or len(text) <= seq.emitted_chars:
+            return
+        delta = text[seq.emitted_chars:]
+        seq.emitted_chars = len(text)
+        try:
+            seq.on_token(delta)
+        except Exception as e:
+            logger.warning(f"[{self.name}] on_token callback failed: {e}")
+
+    def _finish(
+        self,
+        seq: _Sequence,
+        finish_reason: str = "stop",
+        text: Optional[str] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """Release the sequence slot (KV cache cells) and resolve the caller's future."""
+        if seq in self._active:
+            self._active.remove(seq)
+        if seq.seq_id >= 0:
+            _seq_rm(self._llama_cpp, self._ctx, seq.seq_id)
+            self._free_slots.append(seq.seq_id)
+            seq.seq_id = -1
+
+        if seq.future.done():
+            return
+        if error is not None:
+            self._failed += 1
+            _resolve(seq.future, error=error)
+            return
+
+        if text is None:
+            text = seq.text_bytes.decode("utf-8", errors="ignore")
+        now = time.time()
+        started_at = seq.started_at or now
+        result = GenerationResult(
+            text=text.strip(),
+            finish_reason=finish_reason,
+            prompt_tokens=len(seq.prompt_tokens),
+            completion_tokens=len(seq.generated),
+            queue_wait_ms=round((started_at - seq.submitted_at) * 1000, 2),
+            ttft_ms=round((seq.first_token_at - seq.submitted_at) * 1000, 2) if seq.first_token_at else None,
+            elapsed_ms=round((now - seq.submitted_at) * 1000, 2),
+        )
+        self._completed += 1
+        decode_s = max(now - started_at, 1e-6)
+        logger.info(
+            f"[{self.name}] Sequence done: prompt_tokens={result.prompt_tokens}, "
+            f"completion_tokens={result.completion_tokens}, queue_wait={result.queue_wait_ms:.0f}ms, "
+            f"ttft={result.ttft_ms}ms, tokens/s={result.completion_tokens / decode_s:.1f}, "
+            f"active={len(self._active)}"
+        )
+        _resolve(seq.future, result=result)
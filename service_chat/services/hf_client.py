@@ -1,15 +1,122 @@
-"""Hugging Face Inference API clients for LLM generation."""
+"""Hugging Face Inference API clients for LLM generation.
+
+Calls go through a circuit breaker per endpoint, so a provider incident
+fails fast instead of holding a pooled connection for the full timeout, and
+429/503 responses are retried with jittered backoff (or the provider's
+Retry-After) within a shared retry budget. See ``resilience.py``.
+"""
+import asyncio
+import json
 import logging
 import time
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Optional
 
 import httpx
 
 from service_chat.config import settings
+from service_chat.services.http_clients import http_clients
 from service_chat.services.rag_service import build_prompt
+from service_chat.services.resilience import (
+    CircuitBreaker,
+    RetryBudget,
+    backoff_seconds,
+    parse_retry_after,
+)
 
 logger = logging.getLogger(__name__)
 
+# Rate limiting and transient unavailability are worth retrying
+RETRYABLE_STATUS_CODES = (429, 503)
+
+
+def _breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        failure_threshold=settings.HF_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout_s=settings.HF_BREAKER_RESET_SECONDS,
+        half_open_max_calls=settings.HF_BREAKER_HALF_OPEN_MAX_CALLS
+    )
+
+
+# One breaker per HF endpoint; retries share one budget for the upstream
+hf_breakers: Dict[str, CircuitBreaker] = {
+    "inference": _breaker("hf-inference"),
+    "chat_completions": _breaker("hf-chat-completions"),
+}
+hf_retry_budget = RetryBudget(
+    ratio=settings.HF_RETRY_BUDGET_RATIO,
+    min_per_second=settings.HF_RETRY_BUDGET_MIN_PER_SECOND,
+    max_tokens=settings.HF_RETRY_BUDGET_MAX_TOKENS
+)
+
+
+def get_resilience_stats() -> Dict[str, Any]:
+    """Circuit breaker state per HF endpoint and retry budget usage."""
+    return {
+        "breakers": {name: breaker.stats() for name, breaker in hf_breakers.items()},
+        "retry_budget": hf_retry_budget.stats(),
+    }
+
+
+def _record_response(breaker: CircuitBreaker, response: httpx.Response) -> None:
+    """Count 429 and 5xx as breaker failures, honoring Retry-After on 429/503."""
+    if response.status_code == 429 or response.status_code >= 500:
+        retry_after = None
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        breaker.record_failure(retry_after)
+    else:
+        breaker.record_success()
+
+
+def _retry_delay(attempt: int, response: httpx.Response) -> Optional[float]:
+    """Seconds to wait before retrying a response, or None if it shouldn't be retried."""
+    if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= settings.HF_RETRY_MAX_ATTEMPTS:
+        return None
+    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+    if retry_after is None:
+        delay = backoff_seconds(attempt, settings.HF_RETRY_BASE_DELAY_MS / 1000, settings.HF_RETRY_MAX_DELAY_SECONDS)
+    else:
+        delay = retry_after
+    if delay > settings.HF_RETRY_MAX_DELAY_SECONDS or not hf_retry_budget.try_spend():
+        return None
+    return delay
+
+
+async def _post(endpoint: str, url: str, headers: Dict[str, str], payload: Dict[str, Any]) -> httpx.Response:
+    """
+    POST to an HF endpoint through its circuit breaker, retrying 429/503.
+
+    Returns:
+        httpx.Response: The final response (possibly a non-2xx status)
+
+    Raises:
+        CircuitOpenError: If the endpoint's breaker is open
+        httpx.TransportError: On timeouts and connection errors
+    """
+    breaker = hf_breakers[endpoint]
+    client = http_clients.get("hf")
+    hf_retry_budget.deposit()
+    attempt = 0
+    while True:
+        breaker.before_call()
+        try:
+            response = await client.post(url, headers=headers, json=payload)
+        except httpx.TransportError:
+            breaker.record_failure()
+            raise
+        except asyncio.CancelledError:
+            breaker.record_abandoned()
+            raise
+        _record_response(breaker, response)
+
+        delay = _retry_delay(attempt, response)
+        if delay is None:
+            return response
+        attempt += 1
+        logger.warning(f"HF {endpoint} returned {response.status_code}; retry {attempt} in {delay:.2f}s")
+        await asyncio.sleep(delay)
+
 
 async def generate_response_hf_smollm2(
     query: str,
@@ -31,6 +138,7 @@ async def generate_response_hf_smollm2(
         str: LLM-generated response
 
     Raises:
+        CircuitOpenError: If the endpoint's circuit breaker is open (fails fast)
         httpx.TimeoutException: If request times out
         httpx.HTTPStatusError: If API returns non-2xx status
         Exception: For other errors
@@ -42,7 +150,7 @@ async def generate_response_hf_smollm2(
     logger.info(f"Built prompt for HF SmolLM2 API (length={len(prompt)} chars)")
 
     # Prepare request
-    url = f"https://router.huggingface.co/hf-inference/models/{settings.HF_SMOLLM2_MODEL_ID}"
+    url = f"/hf-inference/models/{settings.HF_SMOLLM2_MODEL_ID}"
     headers = {
         "Authorization": f"Bearer {settings.HF_API_TOKEN}",
         "Content-Type": "application/json"
@@ -56,32 +164,31 @@ async def generate_response_hf_smollm2(
         }
     }
 
-    # Make request with timeout
-    async with httpx.AsyncClient(timeout=settings.HF_TIMEOUT_SECONDS) as client:
-        logger.info(f"Calling HF SmolLM2 API (model={settings.HF_SMOLLM2_MODEL_ID}, timeout={settings.HF_TIMEOUT_SECONDS}s)")
+    # Make request on the shared pooled client
+    logger.info(f"Calling HF SmolLM2 API (model={settings.HF_SMOLLM2_MODEL_ID}, timeout={settings.HF_TIMEOUT_SECONDS}s)")
 
-        try:
-            response = await client.post(url, headers=headers, json=payload)
-            response.raise_for_status()
-        except httpx.TimeoutException as e:
-            elapsed = time.time() - start_time
-            logger.error(f"HF API timeout after {elapsed:.1f}s")
-            raise Exception(f"Hugging Face API timed out after {elapsed:.1f}s. Try again or select a different model.")
-        except httpx.HTTPStatusError as e:
-            elapsed = time.time() - start_time
-            logger.error(f"HF API returned {e.response.status_code}: {e.response.text}")
-
-            # Provide helpful error messages
-            if e.response.status_code == 401:
-                raise Exception("Invalid Hugging Face API token. Please check your HF_API_TOKEN.")
-            elif e.response.status_code == 404:
-                raise Exception(f"Model '{settings.HF_SMOLLM2_MODEL_ID}' not found or not available on free tier.")
-            elif e.response.status_code == 503:
-                raise Exception(f"Model '{settings.HF_SMOLLM2_MODEL_ID}' is loading. Please wait a moment and try again.")
-            elif e.response.status_code == 429:
-                raise Exception("Hugging Face API rate limit exceeded. Please wait and try again.")
-            else:
-                raise Exception(f"Hugging Face API error ({e.response.status_code}): {e.response.text}")
+    try:
+        response = await _post("inference", url, headers, payload)
+        response.raise_for_status()
+    except httpx.TimeoutException as e:
+        elapsed = time.time() - start_time
+        logger.error(f"HF API timeout after {elapsed:.1f}s")
+        raise Exception(f"Hugging Face API timed out after {elapsed:.1f}s. Try again or select a different model.")
+    except httpx.HTTPStatusError as e:
+        elapsed = time.time() - start_time
+        logger.error(f"HF API returned {e.response.status_code}: {e.response.text}")
+
+        # Provide helpful error messages
+        if e.response.status_code == 401:
+            raise Exception("Invalid Hugging Face API token. Please check your HF_API_TOKEN.")
+        elif e.response.status_code == 404:
+            raise Exception(f"Model '{settings.HF_SMOLLM2_MODEL_ID}' not found or not available on free tier.")
+        elif e.response.status_code == 503:
+            raise Exception(f"Model '{settings.HF_SMOLLM2_MODEL_ID}' is loading. Please wait a moment and try again.")
+        elif e.response.status_code == 429:
+            raise Exception("Hugging Face API rate limit exceeded. Please wait and try again.")
+        else:
+            raise Exception(f"Hugging Face API error ({e.response.status_code}): {e.response.text}")
 
     # Parse response
     try:
@@ -112,6 +219,20 @@ async def generate_response_hf_smollm2(
         raise Exception(f"Failed to parse Hugging Face API response: {e}")
 
 
+def _router_error_message(status_code: int, text: str) -> str:
+    """Map an HF Router API error status to a helpful error message."""
+    if status_code == 401:
+        return "Invalid Hugging Face API token. Please check your HF_API_TOKEN."
+    elif status_code == 404:
+        return f"Model '{settings.HF_QWEN_MODEL_ID}' not found or provider not available."
+    elif status_code == 503:
+        return f"Model '{settings.HF_QWEN_MODEL_ID}' is loading. Please wait a moment and try again."
+    elif status_code == 429:
+        return "Hugging Face API rate limit exceeded. Please wait and try again."
+    else:
+        return f"Hugging Face Router API error ({status_code}): {text}"
+
+
 async def generate_response_hf_qwen(
     query: str,
     patient_summary: Dict[str, Any]
@@ -133,6 +254,7 @@ async def generate_response_hf_qwen(
         str: LLM-generated response
 
     Raises:
+        CircuitOpenError: If the endpoint's circuit breaker is open (fails fast)
         httpx.TimeoutException: If request times out
         httpx.HTTPStatusError: If API returns non-2xx status
         Exception: For other errors
@@ -144,7 +266,7 @@ async def generate_response_hf_qwen(
     logger.info(f"Built prompt for HF Qwen2.5 API (length={len(prompt)} chars)")
 
     # Prepare request (OpenAI-compatible format)
-    url = "https://router.huggingface.co/v1/chat/completions"
+    url = "/v1/chat/completions"
     headers = {
         "Authorization": f"Bearer {settings.HF_API_TOKEN}",
         "Content-Type": "application/json"
@@ -158,32 +280,21 @@ async def generate_response_hf_qwen(
         "temperature": settings.HF_TEMPERATURE
     }
 
-    # Make request with timeout
-    async with httpx.AsyncClient(timeout=settings.HF_TIMEOUT_SECONDS) as client:
-        logger.info(f"Calling HF Router API (model={settings.HF_QWEN_MODEL_ID}, timeout={settings.HF_TIMEOUT_SECONDS}s)")
+    # Make request on the shared pooled client
+    logger.info(f"Calling HF Router API (model={settings.HF_QWEN_MODEL_ID}, timeout={settings.HF_TIMEOUT_SECONDS}s)")
 
-        try:
-            response = await client.post(url, headers=headers, json=payload)
-            response.raise_for_status()
-        except httpx.TimeoutException as e:
-            elapsed = time.time() - start_time
-            logger.error(f"HF Router API timeout after {elapsed:.1f}s")
-            raise Exception(f"Hugging Face Router API timed out after {elapsed:.1f}s. Try again or select a different model.")
-        except httpx.HTTPStatusError as e:
-            elapsed = time.time() - start_time
-            logger.error(f"HF Router API returned {e.response.status_code}: {e.response.text}")
-
-            # Provide helpful error messages
-            if e.response.status_code == 401:
-                raise Exception("Invalid Hugging Face API token. Please check your HF_API_TOKEN.")
-            elif e.response.status_code == 404:
-                raise Exception(f"Model '{settings.HF_QWEN_MODEL_ID}' not found or provider not available.")
-            elif e.response.status_code == 503:
-                raise Exception(f"Model '{settings.HF_QWEN_MODEL_ID}' is loading. Please wait a moment and try again.")
-            elif e.response.status_code == 429:
-                raise Exception("Hugging Face API rate limit exceeded. Please wait and try again.")
-            else:
-                raise Exception(f"Hugging Face Router API error ({e.response.status_code}): {e.response.text}")
+    try:
+        response = await _post("chat_completions", url, headers, payload)
+        response.raise_for_status()
+    except httpx.TimeoutException as e:
+        elapsed = time.time() - start_time
+        logger.error(f"HF Router API timeout after {elapsed:.1f}s")
+        raise Exception(f"Hugging Face Router API timed out after {elapsed:.1f}s. Try again or select a different model.")
+    except httpx.HTTPStatusError as e:
+        elapsed = time.time() - start_time
+        logger.error(f"HF Router API returned {e.response.status_code}: {e.response.text}")
+
+        raise Exception(_router_error_message(e.response.status_code, e.response.text))
 
     # Parse OpenAI-compatible response
     try:
@@ -210,6 +321,105 @@ async def generate_response_hf_qwen(
         raise Exception(f"Failed to parse Hugging Face Router API response: {e}")
 
 
+async def stream_response_hf_qwen(
+    query: str,
+    patient_summary: Dict[str, Any]
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream a response from HF Qwen2.5 via the Router API (``stream: true``).
+
+    The Router API returns OpenAI-compatible Server-Sent Events; each
+    ``data:`` line carries a chunk whose ``choices[0].delta.content`` holds
+    the next text fragment.
+
+    Args:
+        query: User's question
+        patient_summary: Patient data from service_db_api
+
+    Yields:
+        dict: Stream events - a "queue_wait" timing event once response headers
+            arrive, then {"event": "token", "text": ...} per fragment
+
+    Raises:
+        CircuitOpenError: If the endpoint's circuit breaker is open (fails fast)
+        Exception: On timeout or non-2xx status (with a helpful message)
+    """
+    start_time = time.time()
+
+    prompt = build_prompt(query, patient_summary)
+    logger.info(f"Built prompt for HF Qwen2.5 streaming API (length={len(prompt)} chars)")
+
+    url = "/v1/chat/completions"
+    headers = {
+        "Authorization": f"Bearer {settings.HF_API_TOKEN}",
+        "Content-Type": "application/json"
+    }
+    payload = {
+        "model": settings.HF_QWEN_MODEL_ID,
+        "messages": [
+            {"role": "user", "content": prompt}
+        ],
+        "max_tokens": settings.HF_MAX_NEW_TOKENS,
+        "temperature": settings.HF_TEMPERATURE,
+        "stream": True
+    }
+
+    breaker = hf_breakers["chat_completions"]
+    hf_retry_budget.deposit()
+    attempt = 0
+    try:
+        # 429/503 can be retried until the first byte of the stream has been sent
+        while True:
+            breaker.before_call()
+            try:
+                async with http_clients.get("hf").stream("POST", url, headers=headers, json=payload) as response:
+                    _record_response(breaker, response)
+                    if response.status_code != 200:
+                        body = (await response.aread()).decode("utf-8", errors="replace")
+                        delay = _retry_delay(attempt, response)
+                        if delay is not None:
+                            attempt += 1
+                            logger.warning(f"HF Router API returned {response.status_code}; retry {attempt} in {delay:.2f}s")
+                            await asyncio.sleep(delay)
+                            continue
+                        logger.error(f"HF Router API returned {response.status_code}: {body}")
+                        raise Exception(_router_error_message(response.status_code, body))
+
+                    # Time until the provider starts responding (queueing + prompt processing)
+                    yield {
+                        "event": "timing",
+                        "stage": "queue_wait",
+                        "elapsed_ms": round((time.time() - start_time) * 1000, 2)
+                    }
+
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        chunk = json.loads(data)
+                        choices = chunk.get("choices") or []
+                        if not choices:
+                            continue
+                        text = (choices[0].get("delta") or {}).get("content")
+                        if text:
+                            yield {"event": "token", "text": text}
+                    break
+            except httpx.TransportError:
+                breaker.record_failure()
+                raise
+            except (asyncio.CancelledError, GeneratorExit):
+                breaker.record_abandoned()
+                raise
+    except httpx.TimeoutException:
+        elapsed = time.time() - start_time
+        logger.error(f"HF Router API stream timeout after {elapsed:.1f}s")
+        raise Exception(f"Hugging Face Router API timed out after {elapsed:.1f}s. Try again or select a different model.")
+
+    logger.info(f"HF Router API stream completed in {time.time() - start_time:.1f}s")
+
+
 def warmup_hf_model():
     """
     Warmup call for HuggingFace Router API.
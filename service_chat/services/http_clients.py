@@ -0,0 +1,186 @@
+"""Long-lived, pooled HTTP clients for service_chat's upstreams.
+
+Creating an ``httpx.AsyncClient`` per call pays TCP (and for the HF router,
+TLS) setup on every triage request and defeats keep-alive. The registry
+owns one client per upstream for the life of the app. It is started and
+closed by the FastAPI lifespan in ``main.py``. Each upstream has its own base
+URL, timeout, connection limits and (for HF) optional HTTP/2.
+
+Each client's transport is instrumented to report connections in use, how
+often a request found every connection busy, and how long requests took to
+get their headers onto a connection (pool wait plus connect/TLS).
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+
+from service_chat.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UpstreamConfig:
+    """Connection settings for one upstream service."""
+    base_url: str
+    timeout_seconds: float
+    max_connections: int
+    max_keepalive_connections: int
+    http2: bool = False
+
+
+class _InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Wraps an ``AsyncHTTPTransport`` to collect connection pool statistics."""
+
+    def __init__(self, transport: httpx.AsyncHTTPTransport, max_connections: int):
+        self._transport = transport
+        self.max_connections = max_connections
+        self.requests = 0
+        self.pool_waits = 0
+        self.connections_opened = 0
+        self.acquire_ms_total = 0.0
+
+    def _connections(self) -> list:
+        # httpcore's connection pool behind the httpx transport
+        pool = getattr(self._transport, "_pool", None)
+        return list(getattr(pool, "connections", []))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        connections = self._connections()
+        if len(connections) >= self.max_connections and not any(c.is_available() for c in connections):
+            self.pool_waits += 1
+
+        start = time.monotonic()
+        marks: Dict[str, float] = {}
+        inner_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.started":
+                self.connections_opened += 1
+            elif event_name.endswith("send_request_headers.started") and "sent" not in marks:
+                marks["sent"] = time.monotonic()
+                self.acquire_ms_total += (marks["sent"] - start) * 1000
+            if inner_trace is not None:
+                await inner_trace(event_name, info)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        connections = self._connections()
+        idle = sum(1 for c in connections if c.is_idle())
+        return {
+            "connections": len(connections),
+            "in_use": len(connections) - idle,
+            "idle": idle,
+            "max_connections": self.max_connections,
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "pool_waits": self.pool_waits,
+            "avg_acquire_ms": round(self.acquire_ms_total / self.requests, 2) if self.requests else 0.0,
+        }
+
+
+class HTTPClientRegistry:
+    """Per-upstream ``httpx.AsyncClient`` instances with keep-alive pooling."""
+
+    def __init__(self, upstreams: Dict[str, UpstreamConfig]):
+        self.upstreams = upstreams
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, _InstrumentedTransport] = {}
+
+    def _create(self, name: str) -> httpx.AsyncClient:
+        config = self.upstreams[name]
+        limits = httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+        )
+        http2 = config.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning(
+                    f"HTTP/2 requested for upstream '{name}' but the h2 package is not installed "
+                    "(pip install 'httpx[http2]'); falling back to HTTP/1.1"
+                )
+                http2 = False
+
+        transport = _InstrumentedTransport(
+            httpx.AsyncHTTPTransport(limits=limits, http2=http2),
+            max_connections=config.max_connections
+        )
+        client = httpx.AsyncClient(
+            base_url=config.base_url,
+            transport=transport,
+            timeout=httpx.Timeout(config.timeout_seconds, pool=settings.HTTP_POOL_TIMEOUT_SECONDS)
+        )
+        self._clients[name] = client
+        self._transports[name] = transport
+        logger.info(
+            f"Created HTTP client for '{name}' ({config.base_url}, max_connections={config.max_connections}, "
+            f"http2={http2}, timeout={config.timeout_seconds}s)"
+        )
+        return client
+
+    def start(self) -> None:
+        """Create a client for every upstream (called from the app lifespan)."""
+        for name in self.upstreams:
+            if name not in self._clients:
+                self._create(name)
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """
+        Return the shared client for an upstream, creating it on first use.
+
+        Args:
+            name: Upstream name ("db_api" or "hf")
+
+        Returns:
+            httpx.AsyncClient: Long-lived client with the upstream's base URL
+        """
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._create(name)
+        return client
+
+    async def aclose(self) -> None:
+        """Close every client and its pooled connections."""
+        for name, client in list(self._clients.items()):
+            await client.aclose()
+            logger.info(f"Closed HTTP client for '{name}'")
+        self._clients.clear()
+        self._transports.clear()
+
+    def stats(self) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Connection pool statistics per upstream (None if not created yet)."""
+        return {
+            name: self._transports[name].stats() if name in self._transports else None
+            for name in self.upstreams
+        }
+
+
+# Global registry (clients are created by the app lifespan or on first use)
+http_clients = HTTPClientRegistry({
+    "db_api": UpstreamConfig(
+        base_url=settings.DB_API_BASE_URL,
+        timeout_seconds=settings.DB_API_TIMEOUT_SECONDS,
+        max_connections=settings.DB_API_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.DB_API_MAX_KEEPALIVE_CONNECTIONS
+    ),
+    "hf": UpstreamConfig(
+        base_url=settings.HF_BASE_URL,
+        timeout_seconds=settings.HF_TIMEOUT_SECONDS,
+        max_connections=settings.HF_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HF_MAX_KEEPALIVE_CONNECTIONS,
+        http2=settings.HF_HTTP2
+    ),
+})
@@ -0,0 +1,121 @@
+"""Memory-bounded LRU cache of llama.cpp KV states for shared prompt prefixes.
+
+Prompts are assembled from stable prefix segments (system preamble, patient
+context) followed by a variable suffix (the question). After a sequence has
+evaluated a prefix, the scheduler snapshots that sequence's KV state and
+stores it here, keyed by a hash of the prefix text. A later prompt with the
+same prefix (e.g. a follow-up question from the same patient) restores the
+snapshot into its sequence slot and only evaluates the remaining tokens.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def prefix_key(prefix_text: str) -> str:
+    """Cache key for a prompt prefix."""
+    return hashlib.sha256(prefix_text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class PrefixState:
+    """Serialized KV state of a sequence that has evaluated exactly ``n_tokens`` prefix tokens."""
+    n_tokens: int
+    data: bytes
+
+
+class PrefixStateCache:
+    """
+    Thread-safe LRU cache of prefix KV states, bounded by total bytes.
+
+    One instance is shared by all replicas of the GGUF pool, since a sequence
+    state saved from one context can be restored into any context of the
+    same model.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, PrefixState]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.skipped_restores = 0
+        self.evictions = 0
+        self.tokens_reused = 0
+
+    def get_longest(self, keys: List[str]) -> Optional[Tuple[int, PrefixState]]:
+        """
+        Find the longest cached prefix and mark it most recently used.
+
+        Counters are left to the caller (``record``), since a found state can
+        still fail to load.
+
+        Args:
+            keys: Prefix keys ordered from shortest to longest prefix
+
+        Returns:
+            (index into keys, state) for the longest cached prefix, or None
+        """
+        with self._lock:
+            for index in range(len(keys) - 1, -1, -1):
+                state = self._entries.get(keys[index])
+                if state is not None:
+                    self._entries.move_to_end(keys[index])
+                    return index, state
+            return None
+
+    def record(self, restored_tokens: int, skipped: bool = False) -> None:
+        """
+        Count a lookup once its outcome is known.
+
+        Args:
+            restored_tokens: Prompt tokens loaded from a cached state (0 for a miss)
+            skipped: A state was found but couldn't be restored (counted as a miss)
+        """
+        with self._lock:
+            if restored_tokens:
+                self.hits += 1
+                self.tokens_reused += restored_tokens
+            else:
+                self.misses += 1
+                self.skipped_restores += int(skipped)
+
+    def contains(self, key: str) -> bool:
+        """Check for a prefix state without touching LRU order or counters."""
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key: str, state: PrefixState) -> None:
+        """Store a prefix state, evicting least recently used entries to stay within max_bytes."""
+        size = len(state.data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.data)
+            self._entries[key] = state
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.data)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and memory usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "skipped_restores": self.skipped_restores,
+                "evictions": self.evictions,
+                "tokens_reused": self.tokens_reused,
+            }
@@ -1,20 +1,42 @@
 """LLM client with mock and real model support."""
 import logging
 import asyncio
+import queue
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Any, Optional, Tuple, Union
+from typing import Dict, Any, AsyncIterator, Optional, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
 # Global cache for model and tokenizer to avoid reloading on every request
 _model_cache: Optional[Tuple] = None
+_model_cache_lock = threading.Lock()
 
 # Global cache for llama.cpp model
 _llama_model_cache: Optional[Any] = None
 
-# Thread pool executor for running blocking inference in background
-# Using max_workers=1 to serialize inference requests (model isn't thread-safe for concurrent calls)
-_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-inference")
+# Context size of the Llama handles behind the GGUF pool. Each replica's scheduler
+# creates its own context for generation, so these only hold weights and the tokenizer.
+GGUF_HANDLE_N_CTX = 512
+
+# Pool of continuous-batching llama.cpp schedulers (one per model replica)
+_gguf_pool: Optional[Any] = None
+_gguf_pool_lock = threading.Lock()
+
+# Micro-batching worker that owns the transformers model (keeps generate() off the event loop)
+_qwen_batcher: Optional[Any] = None
+_qwen_batcher_lock = threading.Lock()
+
+# Speculative-decoding GGUF model (target + draft) and its single inference thread
+_speculative_cache: Optional[Tuple] = None
+_speculative_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-speculative")
+
+# Stop sequences for Qwen chat-formatted GGUF generation
+GGUF_STOP_SEQUENCES = ["</s>", "<|endoftext|>", "<|im_end|>"]
+
+# Longest a default-executor thread blocks waiting for the next streamed Qwen token
+QWEN_STREAM_POLL_SECONDS = 1.0
 
 
 def generate_response_mock(query: str, patient_summary: Dict[str, Any]) -> str:
@@ -31,6 +53,19 @@ def generate_response_mock(query: str, patient_summary: Dict[str, Any]) -> str:
     return "This is a mock response from the AI assistant. In production, this would be replaced with a real LLM response."
 
 
+def _llama_token_counter(llm: Any):
+    """Prompt token counter backed by a llama.cpp model's tokenizer."""
+    return lambda text: len(llm.tokenize(text.encode("utf-8"), add_bos=False, special=True))
+
+
+def _qwen_token_counter():
+    """Prompt token counter backed by the transformers tokenizer (None until the model is loaded)."""
+    if _model_cache is None:
+        return None
+    tokenizer = _model_cache[1]
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+
+
 def _load_model_cached():
     """
     Load the Qwen model with caching to avoid reloading on every request.
@@ -41,26 +76,75 @@ def _load_model_cached():
     global _model_cache
 
     if _model_cache is not None:
-        logger.info("Using cached model and tokenizer")
         return _model_cache
 
-    logger.info("Loading Qwen model for the first time...")
-    from .model_manager import load_qwen_model
+    # The batcher thread and request threads can ask at once; load only one copy
+    with _model_cache_lock:
+        if _model_cache is None:
+            logger.info("Loading Qwen model for the first time...")
+            from .model_manager import load_qwen_model
 
-    _model_cache = load_qwen_model()
+            _model_cache = load_qwen_model()
     return _model_cache
 
 
-def generate_response_qwen(query: str, patient_summary: Dict[str, Any]) -> str:
+def _get_qwen_batcher():
+    """
+    Get the micro-batching worker for the transformers backend (created on first use).
+
+    Returns:
+        QwenBatcher: Worker thread that owns the Qwen model
+    """
+    global _qwen_batcher
+
+    if _qwen_batcher is not None:
+        return _qwen_batcher
+
+    with _qwen_batcher_lock:
+        if _qwen_batcher is None:
+            from .qwen_batcher import QwenBatcher
+            from ..config import settings
+
+            # Note: CPU inference is slow (~3 sec/token). 128 tokens = ~6-7 min inference.
+            # AWS ELB timeout increased to 600s to accommodate this.
+            _qwen_batcher = QwenBatcher(
+                _load_model_cached,
+                max_batch_size=settings.QWEN_MAX_BATCH_SIZE,
+                window_ms=settings.QWEN_BATCH_WINDOW_MS,
+                max_new_tokens=128,  # Reduced from 512 to keep inference under 10 min on CPU
+                temperature=0.7,
+                top_p=0.9
+            )
+    return _qwen_batcher
+
+
+def get_qwen_stats() -> Optional[Dict[str, Any]]:
+    """Batching stats of the Qwen worker, or None if it isn't running."""
+    return _qwen_batcher.stats() if _qwen_batcher is not None else None
+
+
+def shutdown_qwen_batcher() -> None:
+    """Stop the Qwen worker if it was started."""
+    global _qwen_batcher
+
+    if _qwen_batcher is not None:
+        _qwen_batcher.shutdown()
+        _qwen_batcher = None
+
+
+async def generate_response_qwen(query: str, patient_summary: Dict[str, Any]) -> str:
     """
     Generate a response using Qwen3-4B-Thinking-2507 model.
 
     This function:
-    - Loads Qwen3-4B-Thinking-2507 from Hugging Face (cached after first load)
-    - Uses CPU-based inference
     - Formats the patient summary into a structured prompt
+    - Submits it to the Qwen batcher, which loads Qwen3-4B-Thinking-2507
+      (cached after first load) and runs CPU inference on its own thread,
+      batching requests that arrive within QWEN_BATCH_WINDOW_MS
     - Returns the model's generated response
 
+    The event loop is never blocked, so /health and /ready keep responding.
+
     Args:
         query: User's question
         patient_summary: Patient data from service_db_api
@@ -71,46 +155,10 @@ def generate_response_qwen(query: str, patient_summary: Dict[str, Any]) -> str:
     Raises:
         ImportError: If required dependencies are not installed
     """
-    try:
-        import torch
-    except ImportError:
-        raise ImportError(
-            "torch is required for LLM inference. "
-            "Install with: pip install torch transformers"
-        )
-
-    # Load model and tokenizer (cached after first call)
-    model, tokenizer = _load_model_cached()
-
-    # Build the prompt from RAG service
     from .rag_service import build_prompt
-    prompt = build_prompt(query, patient_summary)
-
-    # Tokenize input with attention mask
-    inputs = tokenizer(prompt, return_tensors="pt", padding=True)
-
-    # Generate response
-    # Note: CPU inference is slow (~3 sec/token). 128 tokens = ~6-7 min inference.
-    # AWS ELB timeout increased to 600s to accommodate this.
-    logger.info("Generating response with Qwen model (max_new_tokens=128)...")
-    with torch.no_grad():
-        outputs = model.generate(
-            inputs.input_ids,
-            attention_mask=inputs.attention_mask,
-            max_new_tokens=128,  # Reduced from 512 to keep inference under 10 min on CPU
-            temperature=0.7,
-            top_p=0.9,
-            do_sample=True,
-            pad_token_id=tokenizer.eos_token_id
-        )
-
-    # Decode and return response
-    response = tokenizer.decode(outputs[0], skip_special_tokens=True)
-
-    # Extract only the generated part (after the prompt)
-    if prompt in response:
-        response = response[len(prompt):].strip()
+    prompt = build_prompt(query, patient_summary, _qwen_token_counter())
 
+    response = await asyncio.wrap_future(_get_qwen_batcher().submit(prompt))
     logger.info("Response generated successfully")
     return response
 
@@ -119,6 +167,9 @@ def _load_gguf_model_cached():
     """
     Load the GGUF model with llama.cpp caching.
 
+    This is replica 0 of the pool and the prompt token counter; the
+    schedulers generate in contexts of their own, so its context is minimal.
+
     Returns:
         Llama: llama-cpp-python model instance
     """
@@ -145,7 +196,8 @@ def _load_gguf_model_cached():
 
     _llama_model_cache = Llama(
         model_path=str(model_path),
-        n_ctx=settings.GGUF_N_CTX,
+        n_ctx=GGUF_HANDLE_N_CTX,
+        use_mmap=True,
         n_threads=settings.GGUF_N_THREADS,
         verbose=False
     )
@@ -153,9 +205,92 @@ def _load_gguf_model_cached():
     return _llama_model_cache
 
 
-def _generate_response_gguf_sync(query: str, patient_summary: Dict[str, Any]) -> str:
+def _load_gguf_replica(index: int):
+    """
+    Load the llama.cpp model instance for replica ``index`` of the pool.
+
+    Replica 0 is the cached primary model. Additional replicas open the same
+    GGUF file with mmap, so the weights are shared through the OS page cache.
+    Every replica's Llama context is kept minimal because its scheduler owns
+    the KV cache used for generation.
+
+    Returns:
+        Llama: llama-cpp-python model instance
     """
-    Synchronous GGUF inference (runs in background thread).
+    if index == 0:
+        return _load_gguf_model_cached()
+
+    from llama_cpp import Llama
+    from .model_manager import download_gguf_model_if_needed
+    from ..config import settings
+
+    logger.info(f"Loading GGUF replica {index} (mmap shared weights)...")
+    return Llama(
+        model_path=str(download_gguf_model_if_needed()),
+        n_ctx=GGUF_HANDLE_N_CTX,
+        n_threads=settings.GGUF_N_THREADS,
+        use_mmap=True,
+        verbose=False
+    )
+
+
+def _get_gguf_pool():
+    """
+    Get the GGUF replica pool (created on first use).
+
+    Returns:
+        GGUFReplicaPool: GGUF_REPLICAS continuous-batching schedulers,
+            each decoding up to GGUF_BATCH_SLOTS sequences together
+    """
+    global _gguf_pool
+
+    if _gguf_pool is not None:
+        return _gguf_pool
+
+    with _gguf_pool_lock:
+        if _gguf_pool is None:
+            from .gguf_pool import create_replica_pool
+            from ..config import settings
+
+            _gguf_pool = create_replica_pool(
+                _load_gguf_replica,
+                replicas=settings.GGUF_REPLICAS,
+                n_threads=settings.GGUF_N_THREADS,
+                n_slots=settings.GGUF_BATCH_SLOTS,
+                n_ctx=settings.GGUF_N_CTX,
+                n_batch=settings.GGUF_BATCH_SIZE,
+                pin_cpus=settings.GGUF_CPU_AFFINITY,
+                prefix_cache_bytes=settings.GGUF_PREFIX_CACHE_MB * 1024 * 1024
+            )
+    return _gguf_pool
+
+
+def get_gguf_stats() -> Optional[Dict[str, Any]]:
+    """Utilization stats of the GGUF replica pool, or None if it isn't running."""
+    return _gguf_pool.stats() if _gguf_pool is not None else None
+
+
+def shutdown_gguf_pool() -> None:
+    """Stop the GGUF replica pool if it was started."""
+    global _gguf_pool
+
+    if _gguf_pool is not None:
+        _gguf_pool.shutdown()
+        _gguf_pool = None
+
+
+async def generate_response_gguf(query: str, patient_summary: Dict[str, Any]) -> str:
+    """
+    Generate a response using GGUF quantized model with llama.cpp.
+
+    This is MUCH faster than transformers on CPU due to:
+    - INT4 quantization (smaller model, faster math)
+    - llama.cpp optimized CPU kernels
+
+    Requests are submitted to the least-loaded replica of the GGUF pool, whose
+    continuous-batching scheduler decodes concurrent requests together on a
+    background thread. This keeps the event loop responsive for health checks
+    and lets throughput grow with concurrency and core count.
 
     Args:
         query: User's question
@@ -164,56 +299,123 @@ def _generate_response_gguf_sync(query: str, patient_summary: Dict[str, Any]) ->
     Returns:
         str: LLM-generated response
     """
-    import time
-    import threading
-    start_time = time.time()
-    thread_name = threading.current_thread().name
-
-    # Load model (cached after first call)
-    logger.info(f"[{thread_name}] Loading model (cached)...")
-    model = _load_gguf_model_cached()
-    logger.info(f"[{thread_name}] Model loaded in {time.time() - start_time:.1f}s")
-
-    # Build the prompt from RAG service
-    prompt_start = time.time()
-    from .rag_service import build_prompt
-    prompt = build_prompt(query, patient_summary)
-    logger.info(f"[{thread_name}] Prompt built in {time.time() - prompt_start:.1f}s (length={len(prompt)} chars)")
-
+    from .rag_service import build_prompt_segments
     from ..config import settings
 
-    # Generate response
-    inference_start = time.time()
-    logger.info(f"[{thread_name}] Starting llama.cpp inference (max_tokens={settings.GGUF_MAX_TOKENS})...")
-    logger.info(f"[{thread_name}] Calling model() - this may take several minutes on CPU...")
-
-    output = model(
-        prompt,
+    # Loading the replicas can take minutes; keep it off the event loop
+    pool = await asyncio.get_running_loop().run_in_executor(None, _get_gguf_pool)
+    # Segments let the scheduler reuse cached KV state for the system + patient prefix
+    segments = build_prompt_segments(query, patient_summary, _llama_token_counter(_llama_model_cache))
+    logger.info(
+        f"Submitting prompt to GGUF pool (length={sum(len(s) for s in segments)} chars, "
+        f"max_tokens={settings.GGUF_MAX_TOKENS}, load={pool.load()})"
+    )
+    future = pool.submit(
+        segments,
         max_tokens=settings.GGUF_MAX_TOKENS,
         temperature=0.7,
         top_p=0.9,
         presence_penalty=1.5,  # Recommended for Qwen GGUF to prevent repetition
-        stop=["</s>", "<|endoftext|>", "<|im_end|>"]
+        stop=GGUF_STOP_SEQUENCES
     )
+    result = await asyncio.wrap_future(future)
+    return result.text
 
-    inference_elapsed = time.time() - inference_start
-    logger.info(f"[{thread_name}] model() call completed in {inference_elapsed:.1f}s")
 
-    response = output["choices"][0]["text"].strip()
-    total_elapsed = time.time() - start_time
-    logger.info(f"[{thread_name}] Response generated in {total_elapsed:.1f}s total (inference={inference_elapsed:.1f}s)")
-    return response
+def _load_speculative_cached():
+    """
+    Load the GGUF target model paired with its draft for speculative decoding.
 
+    GGUF_DRAFT_MODE selects the draft:
+    - "prompt-lookup": n-gram lookup against the prompt (which contains the
+      patient summary that answers often quote)
+    - "model": a small GGUF model (GGUF_DRAFT_MODEL_REPO/FILE) proposing tokens greedily
 
-async def generate_response_gguf(query: str, patient_summary: Dict[str, Any]) -> str:
+    Returns:
+        tuple: (target Llama, CountingDraft, SpeculativeStats)
     """
-    Generate a response using GGUF quantized model with llama.cpp.
+    global _speculative_cache
 
-    This is MUCH faster than transformers on CPU due to:
-    - INT4 quantization (smaller model, faster math)
-    - llama.cpp optimized CPU kernels
+    if _speculative_cache is not None:
+        return _speculative_cache
+
+    try:
+        from llama_cpp import Llama
+        from llama_cpp.llama_speculative import LlamaPromptLookupDecoding
+    except ImportError:
+        raise ImportError(
+            "llama-cpp-python is required for GGUF inference. "
+            "Install with: pip install llama-cpp-python"
+        )
 
-    Runs in background thread to keep event loop responsive for health checks.
+    from .model_manager import download_gguf_model_if_needed
+    from .speculative import CountingDraft, LlamaSmallModelDraft, SpeculativeStats
+    from ..config import settings
+
+    if settings.GGUF_DRAFT_MODE == "prompt-lookup":
+        inner = LlamaPromptLookupDecoding(num_pred_tokens=settings.GGUF_DRAFT_TOKENS)
+    elif settings.GGUF_DRAFT_MODE == "model":
+        logger.info(f"Loading GGUF draft model {settings.GGUF_DRAFT_MODEL_REPO}/{settings.GGUF_DRAFT_MODEL_FILE}...")
+        draft_llm = Llama(
+            model_path=str(download_gguf_model_if_needed(
+                settings.GGUF_DRAFT_MODEL_REPO,
+                settings.GGUF_DRAFT_MODEL_FILE
+            )),
+            n_ctx=settings.GGUF_N_CTX,
+            n_threads=settings.GGUF_N_THREADS,
+            verbose=False
+        )
+        inner = LlamaSmallModelDraft(draft_llm, num_pred_tokens=settings.GGUF_DRAFT_TOKENS)
+    else:
+        raise ValueError(
+            f"Unknown GGUF_DRAFT_MODE: {settings.GGUF_DRAFT_MODE}. Expected 'prompt-lookup' or 'model'."
+        )
+
+    draft = CountingDraft(inner)
+    logger.info(f"Loading GGUF target model for speculative decoding (draft={settings.GGUF_DRAFT_MODE})...")
+    target = Llama(
+        model_path=str(download_gguf_model_if_needed()),
+        n_ctx=settings.GGUF_N_CTX,
+        n_threads=settings.GGUF_N_THREADS,
+        draft_model=draft,
+        verbose=False
+    )
+    _speculative_cache = (target, draft, SpeculativeStats(settings.GGUF_DRAFT_MODE))
+    logger.info("Speculative decoding model loaded successfully")
+    return _speculative_cache
+
+
+def _generate_response_speculative_sync(query: str, patient_summary: Dict[str, Any], stop: threading.Event) -> str:
+    """Synchronous speculative GGUF inference (runs on the speculative executor thread)."""
+    from llama_cpp import StoppingCriteriaList
+    from .rag_service import build_prompt
+    from .speculative import generate_speculative
+    from ..config import settings
+
+    target, draft, stats = _load_speculative_cached()
+    return generate_speculative(
+        target,
+        draft,
+        stats,
+        build_prompt(query, patient_summary, _llama_token_counter(target)),
+        max_tokens=settings.GGUF_MAX_TOKENS,
+        temperature=0.7,
+        top_p=0.9,
+        presence_penalty=1.5,
+        stop=GGUF_STOP_SEQUENCES,
+        stopping_criteria=StoppingCriteriaList([lambda input_ids, logits: stop.is_set()])
+    )
+
+
+async def generate_response_gguf_speculative(query: str, patient_summary: Dict[str, Any]) -> str:
+    """
+    Generate a response with speculative decoding on the GGUF target model.
+
+    Draft tokens are verified in batches by the target; acceptance rate and
+    tokens/sec are logged per request and aggregated in get_speculative_stats().
+
+    If the caller is cancelled, generation is stopped at the next token and
+    the cancellation only propagates once the executor thread is free again.
 
     Args:
         query: User's question
@@ -222,15 +424,183 @@ async def generate_response_gguf(query: str, patient_summary: Dict[str, Any]) ->
     Returns:
         str: LLM-generated response
     """
-    loop = asyncio.get_event_loop()
-    # Run blocking inference in thread pool to keep event loop responsive
-    response = await loop.run_in_executor(
-        _executor,
-        _generate_response_gguf_sync,
-        query,
-        patient_summary
+    stop = threading.Event()
+    future = _speculative_executor.submit(_generate_response_speculative_sync, query, patient_summary, stop)
+    try:
+        return await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        stop.set()
+        if not future.done():
+            await asyncio.wait([asyncio.wrap_future(future)])
+        raise
+
+
+def get_speculative_stats() -> Optional[Dict[str, Any]]:
+    """Aggregate speculative decoding metrics, or None if the mode hasn't been used."""
+    return _speculative_cache[2].stats() if _speculative_cache is not None else None
+
+
+async def stream_response_gguf(query: str, patient_summary: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream a GGUF response token by token from the replica pool.
+
+    The scheduler thread pushes events onto an asyncio queue via
+    ``call_soon_threadsafe``. If the consumer stops iterating (e.g. the client
+    disconnected), the request is cancelled and leaves the batch.
+
+    Args:
+        query: User's question
+        patient_summary: Patient data from service_db_api
+
+    Yields:
+        dict: Stream events ({"event": "timing", ...} or {"event": "token", "text": ...})
+    """
+    from .rag_service import build_prompt_segments
+    from ..config import settings
+
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def on_start(queue_wait_ms: float) -> None:
+        loop.call_soon_threadsafe(
+            events.put_nowait,
+            {"event": "timing", "stage": "queue_wait", "elapsed_ms": queue_wait_ms}
+        )
+
+    def on_token(text: str) -> None:
+        loop.call_soon_threadsafe(events.put_nowait, {"event": "token", "text": text})
+
+    pool = await loop.run_in_executor(None, _get_gguf_pool)
+    segments = build_prompt_segments(query, patient_summary, _llama_token_counter(_llama_model_cache))
+    future = pool.submit(
+        segments,
+        max_tokens=settings.GGUF_MAX_TOKENS,
+        temperature=0.7,
+        top_p=0.9,
+        presence_penalty=1.5,
+        stop=GGUF_STOP_SEQUENCES,
+        on_token=on_token,
+        on_start=on_start
     )
-    return response
+    # Done callback runs on the scheduler thread after the last on_token, so the sentinel arrives last
+    future.add_done_callback(lambda _: loop.call_soon_threadsafe(events.put_nowait, None))
+
+    try:
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            yield event
+        future.result()  # Re-raise generation errors
+    finally:
+        future.cancel()
+
+
+async def stream_response_qwen(query: str, patient_summary: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream a transformers (Qwen) response using ``TextIteratorStreamer``.
+
+    Generation runs on the Qwen batcher's worker thread (as a batch of one)
+    while the streamer is drained from the default executor, so the event
+    loop is never blocked. Each read waits at most QWEN_STREAM_POLL_SECONDS,
+    so a disconnected client frees its executor thread promptly; cancelling
+    the future then stops the generation itself.
+
+    Args:
+        query: User's question
+        patient_summary: Patient data from service_db_api
+
+    Yields:
+        dict: Stream events ({"event": "timing", ...} or {"event": "token", "text": ...})
+    """
+    try:
+        from transformers import TextIteratorStreamer
+    except ImportError:
+        raise ImportError(
+            "torch is required for LLM inference. "
+            "Install with: pip install torch transformers"
+        )
+
+    from .rag_service import build_prompt
+
+    loop = asyncio.get_running_loop()
+    batcher = _get_qwen_batcher()
+    _, tokenizer = await loop.run_in_executor(None, _load_model_cached)
+    prompt = build_prompt(query, patient_summary, _qwen_token_counter())
+    streamer = TextIteratorStreamer(
+        tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=QWEN_STREAM_POLL_SECONDS
+    )
+
+    queue_wait: Dict[str, float] = {}
+    future = batcher.submit(prompt, streamer=streamer, on_start=lambda ms: queue_wait.setdefault("ms", ms))
+    iterator = iter(streamer)
+    sentinel = object()
+    pending = object()
+    queue_wait_sent = False
+
+    def next_text():
+        try:
+            return next(iterator, sentinel)
+        except queue.Empty:
+            return pending
+
+    try:
+        while True:
+            text = await loop.run_in_executor(None, next_text)
+            if not queue_wait_sent and "ms" in queue_wait:
+                queue_wait_sent = True
+                yield {"event": "timing", "stage": "queue_wait", "elapsed_ms": queue_wait["ms"]}
+            if text is pending:
+                if future.done() and not streamer.text_queue.qsize():
+                    break  # Failed or cancelled without ending the stream
+                continue
+            if text is sentinel:
+                break
+            if text:
+                yield {"event": "token", "text": text}
+        await asyncio.wrap_future(future)  # Re-raise generation errors
+    finally:
+        future.cancel()
+
+
+async def stream_response(mode: str, query: str, patient_summary: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream a response using the specified LLM mode.
+
+    Args:
+        mode: LLM mode (same values as generate_response)
+        query: User's question
+        patient_summary: Patient data from service_db_api
+
+    Yields:
+        dict: Stream events - {"event": "timing", "stage": "queue_wait", "elapsed_ms": float}
+            and {"event": "token", "text": str}
+
+    Raises:
+        ValueError: If mode is not recognized
+    """
+    if mode == "mock":
+        yield {"event": "timing", "stage": "queue_wait", "elapsed_ms": 0.0}
+        yield {"event": "token", "text": generate_response_mock(query, patient_summary)}
+    elif mode == "gguf":
+        async for event in stream_response_gguf(query, patient_summary):
+            yield event
+    elif mode in ("qwen", "Qwen3-4B-Thinking-2507"):
+        async for event in stream_response_qwen(query, patient_summary):
+            yield event
+    elif mode == "gguf-speculative":
+        # Speculative verification happens inside llama.cpp's generate loop; emit the answer as one fragment
+        yield {"event": "timing", "stage": "queue_wait", "elapsed_ms": 0.0}
+        yield {"event": "token", "text": await generate_response_gguf_speculative(query, patient_summary)}
+    elif mode == "hf-qwen2.5":
+        from service_chat.services.hf_client import stream_response_hf_qwen
+        async for event in stream_response_hf_qwen(query, patient_summary):
+            yield event
+    else:
+        raise ValueError(
+            f"Unknown LLM mode: {mode}. "
+            f"Expected 'mock', 'gguf', 'gguf-speculative', 'qwen', 'Qwen3-4B-Thinking-2507', or 'hf-qwen2.5'."
+        )
 
 
 async def generate_response(mode: str, query: str, patient_summary: Dict[str, Any]) -> str:
@@ -241,6 +611,7 @@ async def generate_response(mode: str, query: str, patient_summary: Dict[str, An
         mode: LLM mode - one of:
             - "mock": Returns a static test response
             - "gguf": Uses llama.cpp with GGUF quantized model (FAST on CPU)
+            - "gguf-speculative": GGUF model with speculative decoding (prompt-lookup or small draft model)
             - "qwen" or "Qwen3-4B-Thinking-2507": Uses transformers (SLOW on CPU)
             - "hf-qwen2.5": Uses HF Qwen2.5 via Router API with provider (RECOMMENDED)
         query: User's question
@@ -256,13 +627,15 @@ async def generate_response(mode: str, query: str, patient_summary: Dict[str, An
         return generate_response_mock(query, patient_summary)
     elif mode == "gguf":
         return await generate_response_gguf(query, patient_summary)
+    elif mode == "gguf-speculative":
+        return await generate_response_gguf_speculative(query, patient_summary)
     elif mode in ("qwen", "Qwen3-4B-Thinking-2507"):
-        return generate_response_qwen(query, patient_summary)
+        return await generate_response_qwen(query, patient_summary)
     elif mode == "hf-qwen2.5":
         from service_chat.services.hf_client import generate_response_hf_qwen
         return await generate_response_hf_qwen(query, patient_summary)
     else:
         raise ValueError(
             f"Unknown LLM mode: {mode}. "
-            f"Expected 'mock', 'gguf', 'qwen', 'Qwen3-4B-Thinking-2507', or 'hf-qwen2.5'."
+            f"Expected 'mock', 'gguf', 'gguf-speculative', 'qwen', 'Qwen3-4B-Thinking-2507', or 'hf-qwen2.5'."
         )
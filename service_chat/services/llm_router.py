@@ -0,0 +1,321 @@
+"""Latency-aware routing across LLM backends (``llm_mode="auto"``).
+
+For each configured backend the router tracks an EWMA of latency and of the
+error rate, the number of requests it currently has in flight, and a window
+of recent latencies. Each request goes to the backend expected to finish
+first:
+
+    expected = ewma_latency * (1 + in_flight / capacity) / (1 - ewma_error_rate)
+
+Backends without samples use LLM_AUTO_PRIOR_LATENCY_SECONDS, so each gets
+explored. Local backends (gguf, qwen) are only eligible once their model is
+loaded, since a cold load takes minutes.
+
+If the chosen backend fails, the request fails over to the next best one.
+With hedging enabled, a second request is sent to the runner-up once the
+primary has been running longer than its latency percentile, and the first
+successful answer wins.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from service_chat.config import settings
+from service_chat.services import llm_client
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _BackendStats:
+    capacity: int
+    ewma_latency_s: Optional[float] = None
+    ewma_error_rate: float = 0.0
+    in_flight: int = 0
+    requests: int = 0
+    errors: int = 0
+    wins: int = 0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=200))
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.latencies) < 20:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+@dataclass
+class RouteDecision:
+    """Backend chosen for a request and why."""
+    backend: str
+    reason: str
+    expected_s: Dict[str, Optional[float]]
+    hedged_to: Optional[str] = None
+    failed_over_from: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "reason": self.reason,
+            "expected_s": self.expected_s,
+            "hedged_to": self.hedged_to,
+            "failed_over_from": self.failed_over_from,
+        }
+
+
+class NoBackendAvailable(Exception):
+    """Raised when no configured backend is eligible."""
+    pass
+
+
+def _capacity(backend: str) -> int:
+    """Concurrent requests a backend can serve without queueing."""
+    if backend == "gguf":
+        # GGUF_REPLICAS=0 sizes the pool from the core count, so use the slots it actually has
+        pool = llm_client.get_gguf_stats()
+        if pool is not None:
+            return max(1, pool["slots"])
+        return max(1, settings.GGUF_BATCH_SLOTS * max(settings.GGUF_REPLICAS, 1))
+    if backend in ("qwen", "Qwen3-4B-Thinking-2507"):
+        return max(1, settings.QWEN_MAX_BATCH_SIZE)
+    if backend == "hf-qwen2.5":
+        return max(1, settings.HF_MAX_CONNECTIONS)
+    return 1
+
+
+def _is_available(backend: str) -> bool:
+    """Local backends are eligible only once their model is loaded."""
+    if backend == "gguf":
+        return llm_client.get_gguf_stats() is not None
+    if backend in ("qwen", "Qwen3-4B-Thinking-2507"):
+        return llm_client.get_qwen_stats() is not None
+    if backend == "gguf-speculative":
+        return llm_client.get_speculative_stats() is not None
+    if backend == "hf-qwen2.5":
+        return bool(settings.HF_API_TOKEN)
+    return True
+
+
+class LLMRouter:
+    """Routes requests to the backend expected to finish first, with failover and optional hedging."""
+
+    def __init__(
+        self,
+        backends: List[str],
+        prior_latency_s: float,
+        hedge: bool = False,
+        hedge_percentile: float = 0.95,
+        alpha: float = 0.2,
+    ):
+        self.backends = backends
+        self.prior_latency_s = prior_latency_s
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.alpha = alpha
+        self._stats: Dict[str, _BackendStats] = {b: _BackendStats(capacity=_capacity(b)) for b in backends}
+        self.hedges = 0
+        self.failovers = 0
+
+    def _expected_seconds(self, backend: str) -> float:
+        stats = self._stats[backend]
+        stats.capacity = _capacity(backend)  # The GGUF pool may have been (re)started since the last request
+        latency = stats.ewma_latency_s if stats.ewma_latency_s is not None else self.prior_latency_s
+        return latency * (1 + stats.in_flight / stats.capacity) / max(1 - stats.ewma_error_rate, 0.05)
+
+    def rank(self, exclude: Tuple[str, ...] = ()) -> List[Tuple[str, float]]:
+        """Eligible backends ordered by expected completion time."""
+        ranked = [
+            (backend, self._expected_seconds(backend))
+            for backend in self.backends
+            if backend not in exclude and _is_available(backend)
+        ]
+        return sorted(ranked, key=lambda item: item[1])
+
+    def choose(self, exclude: Tuple[str, ...] = ()) -> RouteDecision:
+        """
+        Pick the backend expected to finish first.
+
+        Raises:
+            NoBackendAvailable: If no backend is eligible
+        """
+        ranked = self.rank(exclude)
+        if not ranked:
+            raise NoBackendAvailable(f"No eligible LLM backend among {self.backends}")
+        backend, expected = ranked[0]
+        stats = self._stats[backend]
+        if stats.ewma_latency_s is None:
+            reason = f"unexplored (prior {self.prior_latency_s:.1f}s)"
+        else:
+            reason = (
+                f"lowest expected time {expected:.2f}s (ewma {stats.ewma_latency_s:.2f}s, "
+                f"in_flight {stats.in_flight}/{stats.capacity}, error_rate {stats.ewma_error_rate:.2f})"
+            )
+        if len(ranked) == 1:
+            reason += "; only eligible backend"
+        return RouteDecision(
+            backend=backend,
+            reason=reason,
+            expected_s={b: round(e, 3) for b, e in ranked}
+        )
+
+    def _record(self, backend: str, elapsed_s: float, ok: bool) -> None:
+        stats = self._stats[backend]
+        stats.requests += 1
+        stats.ewma_error_rate += self.alpha * ((0.0 if ok else 1.0) - stats.ewma_error_rate)
+        if ok:
+            stats.latencies.append(elapsed_s)
+            if stats.ewma_latency_s is None:
+                stats.ewma_latency_s = elapsed_s
+            else:
+                stats.ewma_latency_s += self.alpha * (elapsed_s - stats.ewma_latency_s)
+        else:
+            stats.errors += 1
+
+    async def _call(self, backend: str, query: str, patient_summary: Dict[str, Any]) -> str:
+        """Call one backend, tracking in-flight count, latency and errors."""
+        stats = self._stats[backend]
+        stats.in_flight += 1
+        start = time.time()
+        try:
+            response = await llm_client.generate_response(backend, query, patient_summary)
+        except asyncio.CancelledError:
+            # Lost a hedge race: its latency is at least the time it had been running
+            elapsed = time.time() - start
+            if stats.ewma_latency_s is not None and elapsed > stats.ewma_latency_s:
+                stats.ewma_latency_s += self.alpha * (elapsed - stats.ewma_latency_s)
+            raise
+        except Exception:
+            self._record(backend, time.time() - start, ok=False)
+            raise
+        finally:
+            stats.in_flight -= 1
+        self._record(backend, time.time() - start, ok=True)
+        return response
+
+    async def generate(self, query: str, patient_summary: Dict[str, Any]) -> Tuple[str, RouteDecision]:
+        """
+        Generate a response on the best backend, failing over (and optionally hedging) to the next.
+
+        Returns:
+            tuple: (response text, RouteDecision describing the backend that answered)
+
+        Raises:
+            NoBackendAvailable: If no backend is eligible
+            Exception: The last backend error if every attempt failed
+        """
+        decision = self.choose()
+        primary = asyncio.ensure_future(self._call(decision.backend, query, patient_summary))
+        tasks: Dict["asyncio.Future[str]", str] = {primary: decision.backend}
+
+        # Hedge once the primary runs past its latency percentile (needs enough samples)
+        hedge_after = self._stats[decision.backend].percentile(self.hedge_percentile) if self.hedge else None
+        hedge_at = time.time() + hedge_after if hedge_after is not None else None
+        last_error: Optional[BaseException] = None
+        tried = [decision.backend]
+        try:
+            while tasks:
+                timeout = max(hedge_at - time.time(), 0.0) if hedge_at is not None else None
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Primary is slower than its latency percentile: hedge to the runner-up
+                    ranked = self.rank(exclude=tuple(tried))
+                    hedge_at = None
+                    if ranked:
+                        backup = ranked[0][0]
+                        tried.append(backup)
+                        decision.hedged_to = backup
+                        self.hedges += 1
+                        logger.info(f"Hedging LLM request from {decision.backend} to {backup}")
+                        tasks[asyncio.ensure_future(self._call(backup, query, patient_summary))] = backup
+                    continue
+
+                for task in done:
+                    backend = tasks.pop(task)
+                    if task.exception() is None:
+                        self._stats[backend].wins += 1
+                        if backend != decision.backend:
+                            decision.reason += f"; answered by {backend}"
+                            decision.backend = backend
+                        return task.result(), decision
+                    last_error = task.exception()
+                    logger.warning(f"LLM backend {backend} failed: {last_error}")
+
+                if not tasks:
+                    # Everything in flight failed: fail over to the next eligible backend
+                    ranked = self.rank(exclude=tuple(tried))
+                    if not ranked:
+                        break
+                    backup = ranked[0][0]
+                    tried.append(backup)
+                    self.failovers += 1
+                    decision.failed_over_from = decision.failed_over_from or decision.backend
+                    decision.reason += f"; failed over to {backup} after error: {last_error}"
+                    decision.backend = backup
+                    tasks[asyncio.ensure_future(self._call(backup, query, patient_summary))] = backup
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        raise last_error if last_error is not None else NoBackendAvailable("No LLM backend produced a response")
+
+    async def stream(
+        self,
+        decision: RouteDecision,
+        query: str,
+        patient_summary: Dict[str, Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream from the chosen backend, recording its latency and outcome (no hedging or failover)."""
+        stats = self._stats[decision.backend]
+        stats.in_flight += 1
+        start = time.time()
+        ok = False
+        abandoned = False
+        try:
+            async for event in llm_client.stream_response(decision.backend, query, patient_summary):
+                yield event
+            ok = True
+        except (GeneratorExit, asyncio.CancelledError):
+            # Client went away; says nothing about the backend's health
+            abandoned = True
+            raise
+        finally:
+            stats.in_flight -= 1
+            if not abandoned:
+                self._record(decision.backend, time.time() - start, ok=ok)
+            if ok:
+                stats.wins += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-backend routing statistics."""
+        return {
+            "hedge": self.hedge,
+            "hedges": self.hedges,
+            "failovers": self.failovers,
+            "backends": {
+                backend: {
+                    "available": _is_available(backend),
+                    "ewma_latency_ms": round(s.ewma_latency_s * 1000, 2) if s.ewma_latency_s is not None else None,
+                    "ewma_error_rate": round(s.ewma_error_rate, 3),
+                    "in_flight": s.in_flight,
+                    "capacity": s.capacity,
+                    "requests": s.requests,
+                    "errors": s.errors,
+                    "wins": s.wins,
+                    "expected_ms": round(self._expected_seconds(backend) * 1000, 2),
+                }
+                for backend, s in self._stats.items()
+            },
+        }
+
+
+# Global router for llm_mode="auto"
+llm_router = LLMRouter(
+    backends=[b.strip() for b in settings.LLM_AUTO_BACKENDS.split(",") if b.strip()],
+    prior_latency_s=settings.LLM_AUTO_PRIOR_LATENCY_SECONDS,
+    hedge=settings.LLM_AUTO_HEDGE,
+    hedge_percentile=settings.LLM_AUTO_HEDGE_PERCENTILE
+)
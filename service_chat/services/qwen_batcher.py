@@ -0,0 +1,232 @@
+"""Dynamic micro-batching worker for the transformers (Qwen) backend.
+
+``model.generate`` is CPU-bound and blocking. Running it inside an async route
+freezes the whole FastAPI event loop (including /health and /ready). The
+batcher owns the model on a dedicated worker thread instead:
+
+- Callers submit prompts and await a future
+- The worker collects requests arriving within a short window (up to a max
+  batch size), left-pads them into one batched ``model.generate`` call, and
+  routes each decoded output back to its caller
+- Streaming requests (with a ``TextIteratorStreamer``) run on the same worker
+  as a batch of one, since the streamer only supports a single sequence
+- Cancelling a request's future stops its sequence at the next decoding
+  step, so an abandoned request doesn't hold the worker until it finishes
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Request:
+    prompt: str
+    future: Future
+    streamer: Optional[Any] = None
+    on_start: Optional[Callable[[float], None]] = None
+    submitted_at: float = field(default_factory=time.time)
+
+
+def _resolve(future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+    """Resolve a future, tolerating callers that cancelled it concurrently."""
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class QwenBatcher:
+    """Collects concurrent generation requests into batched ``model.generate`` calls."""
+
+    def __init__(
+        self,
+        load_model: Callable[[], Tuple[Any, Any]],
+        max_batch_size: int,
+        window_ms: float,
+        max_new_tokens: int,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+    ):
+        self._load_model = load_model
+        self.max_batch_size = max_batch_size
+        self.window_s = window_ms / 1000
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.top_p = top_p
+        self._pending: "queue.Queue[_Request]" = queue.Queue()
+        self._stopping = False
+        self._busy = False
+
+        self.batches = 0
+        self.requests = 0
+        self.max_batch_seen = 0
+
+        self._thread = threading.Thread(target=self._run, name="qwen-batcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Started Qwen batcher (max_batch_size={max_batch_size}, window={window_ms}ms)")
+
+    def submit(
+        self,
+        prompt: str,
+        streamer: Optional[Any] = None,
+        on_start: Optional[Callable[[float], None]] = None,
+    ) -> Future:
+        """
+        Queue a prompt for generation.
+
+        Args:
+            prompt: Full prompt text
+            streamer: Optional transformers streamer (request then runs unbatched)
+            on_start: Optional callback invoked (on the worker thread) with the
+                queue wait in milliseconds when generation starts
+
+        Returns:
+            Future: Resolves to the generated text (without the prompt)
+        """
+        if self._stopping:
+            raise RuntimeError("Qwen batcher is shut down")
+        future: Future = Future()
+        self._pending.put(_Request(prompt=prompt, future=future, streamer=streamer, on_start=on_start))
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and batching effectiveness."""
+        return {
+            "queued": self._pending.qsize(),
+            "busy": self._busy,
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size_seen": self.max_batch_seen,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker and fail queued requests (ending their streams)."""
+        self._stopping = True
+        self._thread.join(timeout=30)
+        while True:
+            try:
+                request = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            _resolve(request.future, error=RuntimeError("Qwen batcher shut down"))
+            if request.streamer is not None:
+                request.streamer.end()
+
+    # --- Worker ---
+
+    def _run(self) -> None:
+        while not self._stopping:
+            try:
+                first = self._pending.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            batch = self._collect(first)
+            if not batch:
+                continue
+            self._busy = True
+            try:
+                self._generate(batch)
+            except Exception as e:
+                logger.exception(f"Qwen batch generation failed: {e}")
+                for request in batch:
+                    _resolve(request.future, error=e)
+                    if request.streamer is not None:
+                        request.streamer.end()
+            finally:
+                self._busy = False
+
+    def _collect(self, first: _Request) -> List[_Request]:
+        """Gather requests arriving within the batching window (streaming requests run alone)."""
+        if first.future.cancelled():
+            return []
+        if first.streamer is not None:
+            return [first]
+        batch = [first]
+        deadline = time.time() + self.window_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                request = self._pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request.future.cancelled():
+                continue
+            if request.streamer is not None:
+                # Put it back for the next round; it must run unbatched
+                self._pending.put(request)
+                break
+            batch.append(request)
+        return batch
+
+    @staticmethod
+    def _stop_cancelled(batch: List[_Request]) -> Any:
+        """Stopping criterion that ends the sequences of cancelled requests."""
+        import torch
+        from transformers import StoppingCriteria
+
+        class _Cancelled(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                return torch.tensor(
+                    [request.future.cancelled() for request in batch], dtype=torch.bool, device=input_ids.device
+                )
+
+        return _Cancelled()
+
+    def _generate(self, batch: List[_Request]) -> None:
+        import torch
+        from transformers import StoppingCriteriaList
+
+        model, tokenizer = self._load_model()
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        # Left padding keeps every prompt's last token adjacent to its generated tokens
+        tokenizer.padding_side = "left"
+
+        started_at = time.time()
+        for request in batch:
+            if request.on_start is not None:
+                try:
+                    request.on_start(round((started_at - request.submitted_at) * 1000, 2))
+                except Exception as e:
+                    logger.warning(f"Qwen batcher on_start callback failed: {e}")
+
+        inputs = tokenizer([r.prompt for r in batch], return_tensors="pt", padding=True)
+        generate_kwargs = {}
+        if batch[0].streamer is not None:
+            generate_kwargs["streamer"] = batch[0].streamer
+
+        logger.info(f"Generating Qwen batch of {len(batch)} (max_new_tokens={self.max_new_tokens})...")
+        with torch.no_grad():
+            outputs = model.generate(
+                inputs.input_ids,
+                attention_mask=inputs.attention_mask,
+                max_new_tokens=self.max_new_tokens,
+                temperature=self.temperature,
+                top_p=self.top_p,
+                do_sample=True,
+                pad_token_id=tokenizer.pad_token_id,
+                stopping_criteria=StoppingCriteriaList([self._stop_cancelled(batch)]),
+                **generate_kwargs
+            )
+
+        prompt_length = inputs.input_ids.shape[1]
+        for request, output in zip(batch, outputs):
+            text = tokenizer.decode(output[prompt_length:], skip_special_tokens=True).strip()
+            _resolve(request.future, result=text)
+
+        self.batches += 1
+        self.requests += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        logger.info(f"Qwen batch of {len(batch)} generated in {time.time() - started_at:.1f}s")
@@ -1,14 +1,34 @@
 """RAG (Retrieval Augmented Generation) service for building LLM prompts."""
 import json
-from typing import Dict, Any
+from typing import Dict, Any, NamedTuple, Optional
 
+from service_chat.config import settings
+from service_chat.services.context_renderer import TokenCounter, render_patient_context
 
-def build_prompt(query: str, patient_summary: Dict[str, Any]) -> str:
+
+class PromptSegments(NamedTuple):
     """
-    Build a prompt for the LLM by combining patient summary and user query.
+    A prompt split into stable prefix segments and a variable suffix.
+
+    Concatenating the segments gives the full prompt. The system and
+    patient_context segments are identical across questions from the same
+    patient, so the GGUF backend can reuse their evaluated KV state.
+    """
+    system: str
+    patient_context: str
+    question: str
+
+
+def build_prompt_segments(
+    query: str,
+    patient_summary: Dict[str, Any],
+    count_tokens: Optional[TokenCounter] = None
+) -> PromptSegments:
+    """
+    Build the prompt for the LLM as ordered segments (system, patient context, question).
 
     This function is the only place where patient data and query are combined
-    into a prompt string for the LLM.
+    into a prompt for the LLM.
 
     For MVP, we use the patient summary from service_db_api directly.
     In future phases, this could be enhanced with:
@@ -16,12 +36,17 @@ def build_prompt(query: str, patient_summary: Dict[str, Any]) -> str:
     - Relevant document excerpts
     - Additional context from knowledge base
 
+    The patient data is rendered as compact clinical sections within
+    PROMPT_CONTEXT_MAX_TOKENS (PROMPT_CONTEXT_FORMAT=compact), or dumped as
+    indented JSON (PROMPT_CONTEXT_FORMAT=json).
+
     Args:
         query: User's question
         patient_summary: Patient data from service_db_api
+        count_tokens: Token counter of the active model's tokenizer (estimated if None)
 
     Returns:
-        str: Formatted prompt for LLM
+        PromptSegments: Stable prefix segments followed by the question suffix
     """
     # Extract key patient information
     patient = patient_summary.get("patient", {})
@@ -37,24 +62,57 @@ def build_prompt(query: str, patient_summary: Dict[str, Any]) -> str:
     conditions = patient.get("conditions", [])
     condition_list = [c.get("display", "") for c in conditions if c.get("display")]
 
-    # Build the prompt
-    prompt = f"""You are a helpful AI healthcare assistant for CarePath.
+    system = """You are a helpful AI healthcare assistant for CarePath.
+
+"""
+
+    if settings.PROMPT_CONTEXT_FORMAT == "json":
+        summary_heading = "PATIENT SUMMARY DATA"
+        summary_text = json.dumps(patient_summary, indent=2)
+    else:
+        summary_heading = "PATIENT RECORD"
+        summary_text, _ = render_patient_context(
+            patient_summary,
+            settings.PROMPT_CONTEXT_MAX_TOKENS,
+            count_tokens
+        )
 
-PATIENT INFORMATION:
+    patient_context = f"""PATIENT INFORMATION:
 - MRN: {mrn}
 - Name: {patient_name}
 - Date of Birth: {patient.get('dob', 'Unknown')}
 - Medical Conditions: {', '.join(condition_list) if condition_list else 'None recorded'}
 - Recent Encounters: {encounter_count}
 
-PATIENT SUMMARY DATA:
-{json.dumps(patient_summary, indent=2)}
+{summary_heading}:
+{summary_text}
+
+"""
 
-USER QUESTION:
+    question = f"""USER QUESTION:
 {query}
 
 Please provide a helpful, empathetic response to the patient's question based on the information above.
 Keep your response clear, concise, and patient-friendly.
 """
 
-    return prompt
+    return PromptSegments(system=system, patient_context=patient_context, question=question)
+
+
+def build_prompt(
+    query: str,
+    patient_summary: Dict[str, Any],
+    count_tokens: Optional[TokenCounter] = None
+) -> str:
+    """
+    Build a prompt for the LLM by combining patient summary and user query.
+
+    Args:
+        query: User's question
+        patient_summary: Patient data from service_db_api
+        count_tokens: Token counter of the active model's tokenizer (estimated if None)
+
+    Returns:
+        str: Formatted prompt for LLM
+    """
+    return "".join(build_prompt_segments(query, patient_summary, count_tokens))
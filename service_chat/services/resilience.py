@@ -0,0 +1,191 @@
+"""Circuit breaker and retry budget for calls to remote inference providers.
+
+During a provider incident every request otherwise waits out the full
+timeout while holding a pooled connection. A ``CircuitBreaker`` per endpoint
+tracks consecutive failures (5xx, 429, timeouts, transport errors):
+
+- closed: calls go through; ``failure_threshold`` consecutive failures open it
+- open: calls fail immediately with ``CircuitOpenError`` until the reset
+  timeout (or a longer ``Retry-After`` sent by the provider) has passed
+- half-open: a limited number of probe calls go through; a success closes
+  the breaker, a failure opens it again
+
+Retries of 429/503 responses are limited by a ``RetryBudget``, a token
+bucket filled by a fraction of each request (plus a small time-based
+trickle), so retries can add at most that fraction of extra load on top of
+normal traffic instead of multiplying it during an outage.
+"""
+import email.utils
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit breaker for '{name}' is open; retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker for one endpoint."""
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout_s: float, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+        self._half_open_calls = 0
+
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.opened = 0
+
+    def before_call(self) -> None:
+        """
+        Check whether a call may go through.
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with all probes in flight
+        """
+        now = time.monotonic()
+        if self.state == OPEN and now >= self._open_until:
+            self.state = HALF_OPEN
+            self._half_open_calls = 0
+            logger.info(f"Circuit breaker '{self.name}' half-open; probing")
+        if self.state == OPEN or (self.state == HALF_OPEN and self._half_open_calls >= self.half_open_max_calls):
+            self.rejected += 1
+            raise CircuitOpenError(self.name, max(self._open_until - now, 0.0))
+        if self.state == HALF_OPEN:
+            self._half_open_calls += 1
+        self.calls += 1
+
+    def record_abandoned(self) -> None:
+        """Release a half-open probe slot whose call was cancelled before it completed."""
+        if self.state == HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+    def record_success(self) -> None:
+        if self.state == HALF_OPEN:
+            logger.info(f"Circuit breaker '{self.name}' closed")
+        self.state = CLOSED
+        self._consecutive_failures = 0
+
+    def record_failure(self, retry_after: Optional[float] = None) -> None:
+        """
+        Record a failed call.
+
+        Args:
+            retry_after: Seconds the provider asked us to wait (Retry-After);
+                opens the breaker for at least that long
+        """
+        self.failures += 1
+        self._consecutive_failures += 1
+        if (
+            self.state == HALF_OPEN
+            or retry_after is not None
+            or self._consecutive_failures >= self.failure_threshold
+        ):
+            self._open(retry_after)
+
+    def _open(self, retry_after: Optional[float]) -> None:
+        open_for = self.reset_timeout_s if retry_after is None else retry_after
+        until = time.monotonic() + open_for
+        if self.state != OPEN:
+            self.opened += 1
+            logger.warning(
+                f"Circuit breaker '{self.name}' opened for {open_for:.1f}s "
+                f"after {self._consecutive_failures} consecutive failure(s)"
+            )
+        self.state = OPEN
+        self._open_until = max(self._open_until, until)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "open_for_s": round(max(self._open_until - time.monotonic(), 0.0), 2) if self.state == OPEN else 0.0,
+            "calls": self.calls,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "opened": self.opened,
+        }
+
+
+class RetryBudget:
+    """Token bucket limiting retries to a fraction of request volume."""
+
+    def __init__(self, ratio: float, min_per_second: float, max_tokens: float):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._refilled_at = time.monotonic()
+        self.retries = 0
+        self.exhausted = 0
+
+    def _refill(self, amount: float = 0.0) -> None:
+        now = time.monotonic()
+        amount += (now - self._refilled_at) * self.min_per_second
+        self._refilled_at = now
+        self._tokens = min(self.max_tokens, self._tokens + amount)
+
+    def deposit(self) -> None:
+        """Credit the budget for a new (first-attempt) request."""
+        self._refill(self.ratio)
+
+    def try_spend(self) -> bool:
+        """Take a token for a retry; False if the budget is exhausted."""
+        self._refill()
+        if self._tokens < 1.0:
+            self.exhausted += 1
+            return False
+        self._tokens -= 1.0
+        self.retries += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "tokens": round(self._tokens, 2),
+            "max_tokens": self.max_tokens,
+            "retries": self.retries,
+            "exhausted": self.exhausted,
+        }
+
+
+def backoff_seconds(attempt: int, base_s: float, max_s: float) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (0-based)."""
+    return random.uniform(0, min(max_s, base_s * (2 ** attempt)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
@@ -0,0 +1,94 @@
+"""Exact-match cache of triage responses.
+
+Load tests and real traffic repeat the same questions for the same patient
+("What are my current medications?"). Entries are keyed by
+(MRN, normalized query, llm_mode, hash of the patient summary), so any change
+to the patient's data produces a new key and stale answers are never served.
+Eviction is LRU with a TTL and a maximum entry count.
+"""
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from service_chat.config import settings
+
+CacheKey = Tuple[str, str, str, str]
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", query.strip().lower()).rstrip("?!. ")
+
+
+def summary_hash(patient_summary: Dict[str, Any]) -> str:
+    """Stable content hash of a patient summary."""
+    encoded = json.dumps(patient_summary, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU + TTL cache of generated responses with hit/miss counters."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(mrn: str, query: str, llm_mode: str, summary_digest: str) -> CacheKey:
+        """Build the cache key for a request (summary_digest from summary_hash())."""
+        return (mrn, normalize_query(query), llm_mode, summary_digest)
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        """Return the cached response, or None on a miss or expired entry."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_at, response = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.expired += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return response
+
+    def put(self, key: CacheKey, response: str) -> None:
+        """Store a response, evicting the least recently used entries beyond max_entries."""
+        if not response:
+            return
+        self._entries[key] = (time.monotonic(), response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
+
+
+# Global cache instance (None when disabled)
+response_cache: Optional[ResponseCache] = (
+    ResponseCache(settings.RESPONSE_CACHE_MAX_ENTRIES, settings.RESPONSE_CACHE_TTL_SECONDS)
+    if settings.RESPONSE_CACHE_ENABLED else None
+)
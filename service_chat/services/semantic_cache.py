@@ -0,0 +1,208 @@
+"""Semantic answer cache using local CPU embeddings.
+
+Many repeated questions are paraphrases ("what meds am I on" vs "current
+medications") that the exact-match response cache misses. This cache embeds
+each query with a small local embedding model and keeps, per (MRN, llm_mode),
+a matrix of normalized query embeddings for the current patient summary.
+A lookup is a single vectorized dot product over that patient's entries;
+if the best cosine similarity is above the threshold, the cached answer is
+reused and the LLM time it originally took is counted as saved.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from service_chat.config import settings
+from service_chat.services.response_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+# Embedding runs off the event loop on its own thread (model loaded lazily there)
+_embed_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-embedding")
+
+
+class _Embedder:
+    """Mean-pooled sentence embeddings from a small transformers encoder on CPU."""
+
+    def __init__(self, model_name: str):
+        try:
+            import torch
+            from transformers import AutoModel, AutoTokenizer
+        except ImportError:
+            raise ImportError(
+                "transformers and torch are required for the semantic cache. "
+                "Install with: pip install transformers torch"
+            )
+        from .model_manager import download_model_if_needed
+
+        self._torch = torch
+        model_path = download_model_if_needed(model_name)
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_path))
+        self.model = AutoModel.from_pretrained(str(model_path))
+        self.model.eval()
+        logger.info(f"Loaded query embedding model {model_name}")
+
+    def embed(self, text: str) -> np.ndarray:
+        """Return the L2-normalized embedding of text."""
+        with self._torch.no_grad():
+            inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=128)
+            hidden = self.model(**inputs).last_hidden_state
+            mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1)
+        vector = pooled[0].numpy().astype(np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+class _PatientEntries:
+    """Cached queries for one (MRN, llm_mode) and one version of the patient summary."""
+
+    def __init__(self, summary_digest: str):
+        self.summary_digest = summary_digest
+        self.embeddings: Optional[np.ndarray] = None  # (n, dim) float32, rows L2-normalized
+        self.responses: List[str] = []
+        self.llm_ms: List[float] = []
+        self.stored_at: List[float] = []
+
+    def add(self, embedding: np.ndarray, response: str, llm_ms: float, max_entries: int) -> None:
+        row = embedding[np.newaxis, :]
+        self.embeddings = row if self.embeddings is None else np.vstack([self.embeddings, row])
+        self.responses.append(response)
+        self.llm_ms.append(llm_ms)
+        self.stored_at.append(time.monotonic())
+        if len(self.responses) > max_entries:
+            # Drop the oldest entry
+            self.embeddings = self.embeddings[1:]
+            del self.responses[0], self.llm_ms[0], self.stored_at[0]
+
+
+class SemanticCache:
+    """Per-patient nearest-neighbour answer cache, bounded in patients and entries per patient."""
+
+    def __init__(
+        self,
+        model_name: str,
+        threshold: float,
+        ttl_seconds: float,
+        max_patients: int,
+        max_entries_per_patient: int,
+    ):
+        self.model_name = model_name
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_patients = max_patients
+        self.max_entries_per_patient = max_entries_per_patient
+        self._embedder: Optional[_Embedder] = None
+        self._buckets: "OrderedDict[Tuple[str, str], _PatientEntries]" = OrderedDict()
+        self._embedding_memo: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.llm_time_saved_ms = 0.0
+
+    def _embed_sync(self, normalized_query: str) -> np.ndarray:
+        if self._embedder is None:
+            self._embedder = _Embedder(self.model_name)
+        return self._embedder.embed(normalized_query)
+
+    async def _embed(self, query: str) -> np.ndarray:
+        """Embed a query, memoizing recent queries so lookup + store embed only once."""
+        normalized = normalize_query(query)
+        embedding = self._embedding_memo.get(normalized)
+        if embedding is None:
+            loop = asyncio.get_running_loop()
+            embedding = await loop.run_in_executor(_embed_executor, self._embed_sync, normalized)
+            self._embedding_memo[normalized] = embedding
+            while len(self._embedding_memo) > 256:
+                self._embedding_memo.popitem(last=False)
+        return embedding
+
+    async def lookup(self, mrn: str, llm_mode: str, summary_digest: str, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer to a semantically similar question.
+
+        Args:
+            mrn: Patient MRN
+            llm_mode: LLM mode the answer must have been generated with
+            summary_digest: Hash of the current patient summary
+            query: User's question
+
+        Returns:
+            dict with "response", "similarity" and "saved_ms", or None on a miss
+        """
+        bucket = self._buckets.get((mrn, llm_mode))
+        if bucket is None or bucket.summary_digest != summary_digest or bucket.embeddings is None:
+            self.misses += 1
+            return None
+
+        embedding = await self._embed(query)
+        similarities = bucket.embeddings @ embedding
+        expired = (time.monotonic() - np.asarray(bucket.stored_at)) > self.ttl_seconds
+        similarities[expired] = -1.0
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            self.misses += 1
+            return None
+
+        self._buckets.move_to_end((mrn, llm_mode))
+        self.hits += 1
+        saved_ms = bucket.llm_ms[best]
+        self.llm_time_saved_ms += saved_ms
+        return {
+            "response": bucket.responses[best],
+            "similarity": round(float(similarities[best]), 4),
+            "saved_ms": saved_ms,
+        }
+
+    async def store(
+        self,
+        mrn: str,
+        llm_mode: str,
+        summary_digest: str,
+        query: str,
+        response: str,
+        llm_ms: float,
+    ) -> None:
+        """Add an answer; a changed summary digest replaces the patient's stale entries."""
+        if not response:
+            return
+        embedding = await self._embed(query)
+        key = (mrn, llm_mode)
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket.summary_digest != summary_digest:
+            bucket = _PatientEntries(summary_digest)
+            self._buckets[key] = bucket
+        self._buckets.move_to_end(key)
+        bucket.add(embedding, response, llm_ms, self.max_entries_per_patient)
+        while len(self._buckets) > self.max_patients:
+            self._buckets.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, memory footprint and LLM time saved."""
+        lookups = self.hits + self.misses
+        return {
+            "patients": len(self._buckets),
+            "entries": sum(len(b.responses) for b in self._buckets.values()),
+            "embedding_bytes": sum(b.embeddings.nbytes for b in self._buckets.values() if b.embeddings is not None),
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "llm_time_saved_ms": round(self.llm_time_saved_ms, 2),
+        }
+
+
+# Global cache instance (None when disabled)
+semantic_cache: Optional[SemanticCache] = (
+    SemanticCache(
+        model_name=settings.SEMANTIC_CACHE_MODEL,
+        threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+        ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+        max_patients=settings.SEMANTIC_CACHE_MAX_PATIENTS,
+        max_entries_per_patient=settings.SEMANTIC_CACHE_MAX_PER_PATIENT,
+    )
+    if settings.SEMANTIC_CACHE_ENABLED else None
+)
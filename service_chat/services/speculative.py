@@ -0,0 +1,197 @@
+"""Speculative decoding support for the GGUF backend.
+
+A cheap draft proposes several tokens and the target model verifies them in a
+single batched evaluation, accepting the longest matching run. Two drafts are
+supported:
+
+- ``prompt-lookup``: n-gram lookup against the prompt itself. Triage answers
+  often quote the patient summary (medication names, lab values), which is
+  part of the prompt.
+- ``model``: a tiny GGUF model (e.g. Qwen2.5-0.5B) proposing tokens greedily.
+
+Each request logs its draft acceptance rate and decode speed (prompt
+evaluation excluded) so the mode can be compared with plain ``gguf`` mode.
+"""
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import numpy.typing as npt
+import llama_cpp
+from llama_cpp.llama_speculative import LlamaDraftModel
+
+logger = logging.getLogger(__name__)
+
+
+class LlamaSmallModelDraft(LlamaDraftModel):
+    """Draft tokens proposed greedily by a small llama.cpp model sharing the target's tokenizer."""
+
+    def __init__(self, draft_llm: Any, num_pred_tokens: int):
+        self.draft_llm = draft_llm
+        self.num_pred_tokens = num_pred_tokens
+
+    def __call__(self, input_ids: npt.NDArray[np.intc], /, **kwargs: Any) -> npt.NDArray[np.intc]:
+        draft = self.draft_llm
+        tokens = input_ids.tolist()
+
+        # Reuse the draft's KV cache for the prefix it has already evaluated
+        cached = draft.input_ids[:draft.n_tokens].tolist()
+        n_common = 0
+        for cached_token, token in zip(cached, tokens):
+            if cached_token != token:
+                break
+            n_common += 1
+        # Always evaluate at least one token so fresh logits are available
+        n_common = min(n_common, len(tokens) - 1)
+        draft.n_tokens = n_common
+        draft.eval(tokens[n_common:])
+
+        proposed: List[int] = []
+        eos = draft.token_eos()
+        n_vocab = draft.n_vocab()
+        for _ in range(self.num_pred_tokens):
+            # Logits of the last evaluated token (eval requests logits for the last position only)
+            logits = np.ctypeslib.as_array(llama_cpp.llama_get_logits_ith(draft.ctx, -1), shape=(n_vocab,))
+            token = int(np.argmax(logits))
+            if token == eos:
+                break
+            proposed.append(token)
+            draft.eval([token])
+        return np.array(proposed, dtype=np.intc)
+
+
+class CountingDraft(LlamaDraftModel):
+    """
+    Wraps a draft model to count verification steps and proposed and accepted tokens.
+
+    llama.cpp calls the draft after each verification with the accepted
+    history, so the tokens that follow the previous call's input show how many
+    of its proposals the target kept. The last proposal of a generation is
+    never verified and is left out of ``verified``/``accepted``. The first call
+    comes right after prompt evaluation and marks the start of decoding.
+    """
+
+    def __init__(self, inner: LlamaDraftModel):
+        self.inner = inner
+        self.reset()
+
+    def reset(self) -> None:
+        self.calls = 0
+        self.proposed = 0
+        self.verified = 0
+        self.accepted = 0
+        self.first_call_at: Optional[float] = None
+        self._last_length = 0
+        self._last_drafts: List[int] = []
+
+    def __call__(self, input_ids: npt.NDArray[np.intc], /, **kwargs: Any) -> npt.NDArray[np.intc]:
+        if self.first_call_at is None:
+            self.first_call_at = time.time()
+        if self._last_drafts:
+            kept = input_ids[self._last_length:self._last_length + len(self._last_drafts)].tolist()
+            accepted = 0
+            for proposed, token in zip(self._last_drafts, kept):
+                if proposed != token:
+                    break
+                accepted += 1
+            self.verified += len(self._last_drafts)
+            self.accepted += accepted
+
+        drafts = self.inner(input_ids, **kwargs)
+        self.calls += 1
+        self.proposed += len(drafts)
+        self._last_length = len(input_ids)
+        self._last_drafts = drafts.tolist()
+        return drafts
+
+
+class SpeculativeStats:
+    """Aggregate speculative decoding metrics across requests."""
+
+    def __init__(self, draft_mode: str):
+        self.draft_mode = draft_mode
+        self.requests = 0
+        self.completion_tokens = 0
+        self.proposed = 0
+        self.verified = 0
+        self.accepted = 0
+        self.prefill_seconds = 0.0
+        self.decode_tokens = 0
+        self.decode_seconds = 0.0
+
+    def record(
+        self,
+        completion_tokens: int,
+        draft: CountingDraft,
+        prefill_seconds: float,
+        decode_tokens: int,
+        decode_seconds: float,
+    ) -> None:
+        self.requests += 1
+        self.completion_tokens += completion_tokens
+        self.proposed += draft.proposed
+        self.verified += draft.verified
+        self.accepted += draft.accepted
+        self.prefill_seconds += prefill_seconds
+        self.decode_tokens += decode_tokens
+        self.decode_seconds += decode_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "draft_mode": self.draft_mode,
+            "requests": self.requests,
+            "completion_tokens": self.completion_tokens,
+            "draft_tokens_proposed": self.proposed,
+            "draft_tokens_verified": self.verified,
+            "draft_tokens_accepted": self.accepted,
+            "acceptance_rate": round(self.accepted / self.verified, 3) if self.verified else 0.0,
+            "prefill_seconds": round(self.prefill_seconds, 3),
+            "decode_tokens_per_second": round(self.decode_tokens / self.decode_seconds, 2) if self.decode_seconds else 0.0,
+        }
+
+
+def generate_speculative(
+    llm: Any,
+    draft: CountingDraft,
+    stats: SpeculativeStats,
+    prompt: str,
+    **generate_kwargs: Any,
+) -> str:
+    """
+    Run one speculative generation and log its acceptance metrics.
+
+    Must be called from a single worker thread (the draft counters are per request).
+
+    Args:
+        llm: Target ``Llama`` instance constructed with ``draft_model=draft``
+        draft: The counting wrapper passed as the target's draft model
+        stats: Aggregate stats to update
+        prompt: Full prompt text
+        **generate_kwargs: Sampling arguments passed to ``llm(...)``
+
+    Returns:
+        str: Generated text
+    """
+    draft.reset()
+    start = time.time()
+    output = llm(prompt, **generate_kwargs)
+    end = time.time()
+
+    completion_tokens = output["usage"]["completion_tokens"]
+    # The first token is sampled right after prompt evaluation, before the first draft call
+    decode_started = draft.first_call_at or end
+    prefill_seconds = decode_started - start
+    decode_tokens = max(completion_tokens - 1, 0)
+    decode_seconds = end - decode_started
+    stats.record(completion_tokens, draft, prefill_seconds, decode_tokens, decode_seconds)
+
+    logger.info(
+        f"Speculative generation ({stats.draft_mode}): completion_tokens={completion_tokens}, "
+        f"target_steps={draft.calls}, draft_proposed={draft.proposed}, draft_verified={draft.verified}, "
+        f"draft_accepted={draft.accepted}, "
+        f"acceptance_rate={draft.accepted / draft.verified if draft.verified else 0.0:.2f}, "
+        f"prefill={prefill_seconds:.2f}s, "
+        f"decode_tokens/s={decode_tokens / decode_seconds if decode_seconds > 0 else 0.0:.1f}"
+    )
+    return output["choices"][0]["text"].strip()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+"""
+Local stand-in for the Hugging Face inference endpoints used by hf_client.
+
+Serves the two request shapes service_chat sends to huggingface.co, with
+synthetic text and configurable latency and failures, so the HTTP client
+pool, retries, circuit breaker and streaming paths can be load-tested
+offline and reproducibly:
+
+- POST /v1/chat/completions (OpenAI-compatible, with or without "stream": true)
+- POST /hf-inference/models/{model_id} (text generation, [{"generated_text": ...}])
+
+Usage:
+    python -m service_chat.utils.mock_hf_server
+    python -m service_chat.utils.mock_hf_server --port 8010 --ttft-ms 500 --tokens-per-second 30
+    python -m service_chat.utils.mock_hf_server --error-rate 0.05 --rate-limit-rate 0.1 --retry-after 2
+
+Then point service_chat at it:
+    HF_BASE_URL=http://localhost:8010 HF_API_TOKEN=mock DEFAULT_LLM_MODE=hf-qwen2.5 make run-chat
+
+Counters for requests served and failures injected are at GET /stats.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+from dataclasses import dataclass, asdict
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+_WORDS = (
+    "Based on your records, your current medications and recent visits suggest "
+    "that you should follow up with your primary care provider and keep taking "
+    "your medication as prescribed while monitoring your symptoms closely"
+).split()
+
+
+@dataclass
+class MockConfig:
+    """Latency and failure injection settings."""
+    ttft_ms: float = 300.0  # Delay before the first token (or the whole response, non-streaming)
+    tokens_per_second: float = 40.0  # Generation speed after the first token
+    response_tokens: int = 128  # Tokens generated when the request doesn't ask for fewer
+    error_rate: float = 0.0  # Fraction of requests answered with 503
+    rate_limit_rate: float = 0.0  # Fraction of requests answered with 429
+    retry_after: int = 1  # Retry-After seconds sent with injected 429/503 responses
+    seed: int = 0  # Random seed for reproducible failure injection (0 = unseeded)
+
+
+def _tokens(n: int) -> List[str]:
+    """n synthetic tokens (words with leading spaces, like a BPE stream)."""
+    return [(" " if i else "") + _WORDS[i % len(_WORDS)] for i in range(n)]
+
+
+def create_app(config: MockConfig) -> FastAPI:
+    """Build the mock server app for a given configuration."""
+    app = FastAPI(title="Mock HF Inference")
+    rng = random.Random(config.seed or None)
+    stats = {"requests": 0, "streams": 0, "injected_429": 0, "injected_503": 0, "tokens": 0}
+
+    def injected_failure() -> Optional[JSONResponse]:
+        """Return an injected 429/503 response, or None to serve the request."""
+        roll = rng.random()
+        headers = {"Retry-After": str(config.retry_after)}
+        if roll < config.rate_limit_rate:
+            stats["injected_429"] += 1
+            return JSONResponse({"error": "Rate limit reached (mock)"}, status_code=429, headers=headers)
+        if roll < config.rate_limit_rate + config.error_rate:
+            stats["injected_503"] += 1
+            return JSONResponse(
+                {"error": "Model is currently loading (mock)", "estimated_time": config.retry_after},
+                status_code=503,
+                headers=headers
+            )
+        return None
+
+    async def generate(n: int) -> str:
+        await asyncio.sleep((config.ttft_ms + 1000 * max(n - 1, 0) / config.tokens_per_second) / 1000)
+        stats["tokens"] += n
+        return "".join(_tokens(n))
+
+    async def stream_chunks(model: str, n: int) -> AsyncIterator[str]:
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        await asyncio.sleep(config.ttft_ms / 1000)
+        for i, token in enumerate(_tokens(n)):
+            if i:
+                await asyncio.sleep(1 / config.tokens_per_second)
+            stats["tokens"] += 1
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        final = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "length"}]
+        }
+        yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        stats["requests"] += 1
+        failure = injected_failure()
+        if failure is not None:
+            return failure
+
+        body: Dict[str, Any] = await request.json()
+        model = body.get("model", "mock")
+        n = min(int(body.get("max_tokens") or config.response_tokens), config.response_tokens)
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in body.get("messages") or [])
+
+        if body.get("stream"):
+            stats["streams"] += 1
+            return StreamingResponse(stream_chunks(model, n), media_type="text/event-stream")
+
+        text = await generate(n)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "length"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": n, "total_tokens": prompt_tokens + n}
+        }
+
+    @app.post("/hf-inference/models/{model_id:path}")
+    async def text_generation(model_id: str, request: Request):
+        stats["requests"] += 1
+        failure = injected_failure()
+        if failure is not None:
+            return failure
+
+        body: Dict[str, Any] = await request.json()
+        parameters = body.get("parameters") or {}
+        n = min(int(parameters.get("max_new_tokens") or config.response_tokens), config.response_tokens)
+        return [{"generated_text": await generate(n)}]
+
+    @app.get("/stats")
+    async def get_stats():
+        return {"config": asdict(config), **stats}
+
+    return app
+
+
+def main():
+    """Main entry point for the mock server CLI."""
+    defaults = MockConfig()
+    parser = argparse.ArgumentParser(description="Local mock of the Hugging Face inference endpoints")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8010, help="Port (default: 8010)")
+    parser.add_argument("--ttft-ms", type=float, default=defaults.ttft_ms, help="Time to first token in ms")
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second,
+                        help="Generation speed after the first token")
+    parser.add_argument("--response-tokens", type=int, default=defaults.response_tokens,
+                        help="Maximum tokens per response")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate,
+                        help="Fraction of requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=defaults.rate_limit_rate,
+                        help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=defaults.retry_after,
+                        help="Retry-After seconds on injected failures")
+    parser.add_argument("--seed", type=int, default=defaults.seed,
+                        help="Random seed for failure injection (0 = unseeded)")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+    logger.info(f"Starting mock HF server on http://{args.host}:{args.port} with {config}")
+
+    import uvicorn
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,28 @@ class Settings(BaseSettings):
     MONGODB_URI: str = "mongodb://localhost:27017"
     MONGODB_DB_NAME: str = "carepath"
 
+    # Patient summary query strategy: "aggregate" (one $lookup round trip),
+    # "concurrent" (child queries in parallel) or "sequential" (baseline)
+    PATIENT_SUMMARY_STRATEGY: str = "aggregate"
+    # Document text length kept by the summary's compact view (view=compact)
+    SUMMARY_COMPACT_TEXT_CHARS: int = 2000
+
+    # Materialized summaries (patient_summaries collection, see db/summaries.py).
+    # PATIENT_SUMMARY_SOURCE: "auto" (serve them while a change stream worker, in this
+    # process or another, is following changes), "materialized" (always) or "live"
+    PATIENT_SUMMARY_SOURCE: str = "auto"
+    SUMMARY_WORKER_ENABLED: bool = True  # Follow changes and keep patient_summaries current
+    SUMMARY_WORKER_RETRY_SECONDS: float = 5.0  # Wait before reopening a failed change stream
+    SUMMARY_WORKER_HEARTBEAT_SECONDS: float = 10.0  # Worker heartbeat interval (missing 3 falls back to live)
+    SUMMARY_REBUILD_BATCH_SIZE: int = 500  # Patients per bulk write when rebuilding all summaries
+
+    # Largest number of MRNs per batch lookup (POST /patients:batchGet, /patients/summaries:batchGet)
+    BATCH_GET_MAX_MRNS: int = 100
+
+    # Bulk export (GET /export/{collection})
+    EXPORT_BATCH_SIZE: int = 500  # Default records per cursor batch and per streamed chunk
+    EXPORT_MAX_BATCH_SIZE: int = 5000  # Largest batch_size a client may request
+
     # API settings
     API_PORT_DB_API: int = 8001
     LOG_LEVEL: str = "INFO"
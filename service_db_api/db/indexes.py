@@ -0,0 +1,73 @@
+"""Index specifications and the query shapes they serve.
+
+The index set is applied by the migration command
+(``python -m service_db_api.db.migrate``) and by
+``scripts/load_synthetic_data.py``, not at app startup. The sort orders the
+routers use live here too, so each list query can be answered by walking an
+index instead of scanning the collection and sorting in memory. The
+migration command verifies that with ``explain()``.
+
+Per-patient queries use compound indexes on ``patient_mrn`` followed by the
+sort key and ``_id`` as a tie-breaker. ``patient_mrn`` is their prefix, so
+they replace the old single-field ``patient_mrn`` indexes.
+"""
+from typing import Any, Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+SortSpec = List[Tuple[str, int]]
+
+# Sort for per-patient queries on each child collection (matches the compound index below)
+PATIENT_SORTS: Dict[str, SortSpec] = {
+    "encounters": [("start", DESCENDING), ("_id", DESCENDING)],
+    "claims": [("service_date", DESCENDING), ("_id", DESCENDING)],
+    "documents": [("source_type", ASCENDING), ("_id", ASCENDING)],
+    "chat_logs": [("started_at", DESCENDING), ("_id", DESCENDING)],
+}
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "patients": [
+        IndexModel([("mrn", ASCENDING)], unique=True),
+    ],
+    "encounters": [
+        IndexModel([("encounter_id", ASCENDING)], unique=True),
+        IndexModel([("patient_mrn", ASCENDING), *PATIENT_SORTS["encounters"]]),
+    ],
+    "claims": [
+        IndexModel([("claim_id", ASCENDING)], unique=True),
+        IndexModel([("patient_mrn", ASCENDING), *PATIENT_SORTS["claims"]]),
+    ],
+    "documents": [
+        IndexModel([("doc_id", ASCENDING)], unique=True),
+        IndexModel([("patient_mrn", ASCENDING), *PATIENT_SORTS["documents"]]),
+    ],
+    "chat_logs": [
+        IndexModel([("conversation_id", ASCENDING)], unique=True),
+        IndexModel([("patient_mrn", ASCENDING), *PATIENT_SORTS["chat_logs"]]),
+    ],
+    "providers": [
+        IndexModel([("provider_id", ASCENDING)], unique=True),
+    ],
+    "audit_logs": [
+        IndexModel([("event_id", ASCENDING)], unique=True),
+    ],
+    "patient_summaries": [
+        IndexModel([("mrn", ASCENDING)], unique=True),
+        # Finds the summaries containing a changed or deleted record
+        IndexModel([("source_ids", ASCENDING)]),
+    ],
+}
+
+
+def list_sort(collection: str, query: Dict[str, Any]) -> SortSpec:
+    """
+    Sort order of a list endpoint for a given filter.
+
+    Per-patient listings come newest first from the compound index; other
+    listings follow ``_id`` (insertion order), and patients follow MRN.
+    """
+    if collection == "patients":
+        return [("mrn", ASCENDING)]
+    if "patient_mrn" in query and collection in PATIENT_SORTS:
+        return PATIENT_SORTS[collection]
+    return [("_id", ASCENDING)]
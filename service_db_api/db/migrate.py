@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+"""
+Apply the index specification and verify the router queries with explain().
+
+Indexes are managed here instead of at every app startup, so deploys and
+restarts don't block on index builds. After creating the indexes in
+``indexes.py``, every query shape the routers issue is explained, and the
+command fails if any winning plan contains a COLLSCAN or an in-memory SORT.
+
+Usage:
+    python -m service_db_api.db.migrate              # create indexes, then verify
+    python -m service_db_api.db.migrate --check      # verify only
+    python -m service_db_api.db.migrate --prune      # also drop indexes not in the spec
+
+Environment variables:
+    MONGODB_URI, MONGODB_DB_NAME: Same as service_db_api
+"""
+import argparse
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pymongo import MongoClient
+from pymongo.database import Database
+from pymongo.errors import OperationFailure
+
+from service_db_api.config import settings
+from service_db_api.db.indexes import INDEXES, PATIENT_SORTS, list_sort
+from service_db_api.db.pagination import decode_cursor, encode_cursor, keyset_filter
+from service_db_api.db.patient_summary import CLAIM_LIMIT, ENCOUNTER_LIMIT, summary_pipeline_stages
+from service_db_api.db.projection import SUMMARY_VIEWS
+
+# Plan stages that mean a query isn't served by an index
+FORBIDDEN_STAGES = ("COLLSCAN", "SORT")
+
+
+def apply_indexes(db: Database, prune: bool = False) -> None:
+    """Create every index in the spec; with prune, drop indexes that aren't in it."""
+    for collection, models in INDEXES.items():
+        names = db[collection].create_indexes(models)
+        print(f"\t {collection}: {', '.join(names)}")
+
+        wanted = {model.document["name"] for model in models} | {"_id_"}
+        for existing in db[collection].index_information():
+            if existing in wanted:
+                continue
+            if prune:
+                db[collection].drop_index(existing)
+                print(f"\t {collection}: dropped {existing}")
+            else:
+                print(f"\t {collection}: {existing} is not in the spec (use --prune to drop it)")
+
+
+def _sample(db: Database, collection: str, field: str, default: str) -> str:
+    """A real value for a field, so explain() sees realistic selectivity."""
+    doc = db[collection].find_one({field: {"$exists": True}}, {field: 1})
+    return doc[field] if doc else default
+
+
+def router_queries(db: Database) -> List[Tuple[str, str, Dict[str, Any], Optional[list], Optional[int]]]:
+    """(name, collection, filter, sort, limit) for every find() the routers issue."""
+    mrn = _sample(db, "patients", "mrn", "P000001")
+    source_type = _sample(db, "documents", "source_type", "care_plan")
+    queries = [
+        ("GET /patients/{mrn}", "patients", {"mrn": mrn}, None, None),
+        ("GET /patients/{mrn}/encounters", "encounters", {"patient_mrn": mrn}, PATIENT_SORTS["encounters"], None),
+        ("GET /patients/{mrn}/documents", "documents", {"patient_mrn": mrn}, None, None),
+        ("summary: encounters", "encounters", {"patient_mrn": mrn}, PATIENT_SORTS["encounters"], ENCOUNTER_LIMIT),
+        ("summary: claims", "claims", {"patient_mrn": mrn}, PATIENT_SORTS["claims"], CLAIM_LIMIT),
+        ("GET /encounters/{id}", "encounters", {"encounter_id": _sample(db, "encounters", "encounter_id", "E1")}, None, None),
+        ("GET /claims/{id}", "claims", {"claim_id": _sample(db, "claims", "claim_id", "C1")}, None, None),
+        ("GET /documents/{id}", "documents", {"doc_id": _sample(db, "documents", "doc_id", "D1")}, None, None),
+        ("GET /chat-logs/{id}", "chat_logs",
+         {"conversation_id": _sample(db, "chat_logs", "conversation_id", "CONV-1")}, None, None),
+        ("GET /patients/{mrn}/summary (materialized)", "patient_summaries", {"mrn": mrn}, None, None),
+        ("POST /patients:batchGet", "patients", {"mrn": {"$in": [mrn, "P999999"]}}, None, None),
+        ("POST /patients/summaries:batchGet (materialized)", "patient_summaries",
+         {"mrn": {"$in": [mrn, "P999999"]}}, None, None),
+        ("summary worker: summaries containing a record", "patient_summaries",
+         {"source_ids": _sample(db, "encounters", "_id", "E1")}, None, None),
+        ("GET /export/encounters?patient_mrn&since", "encounters",
+         {"patient_mrn": mrn, "start": {"$gte": "2000-01-01"}}, PATIENT_SORTS["encounters"], None),
+        ("GET /export/claims?patient_mrn&since&until", "claims",
+         {"patient_mrn": mrn, "service_date": {"$gte": "2000-01-01", "$lt": "2100-01-01"}}, PATIENT_SORTS["claims"], None),
+    ]
+    list_filters = {
+        "patients": [{}],
+        "encounters": [{}, {"patient_mrn": mrn}],
+        "claims": [{}, {"patient_mrn": mrn}],
+        "documents": [{}, {"patient_mrn": mrn}, {"patient_mrn": mrn, "source_type": source_type},
+                      {"source_type": source_type}],
+        "chat_logs": [{}, {"patient_mrn": mrn}],
+    }
+    for collection, filters in list_filters.items():
+        for query in filters:
+            name = f"GET /{collection.replace('_', '-')}" + (f"?{'&'.join(query)}" if query else "")
+            sort = list_sort(collection, query)
+            queries.append((name, collection, query, sort, 10))
+
+            # The next page, resumed from a cursor on the first document
+            first = next(iter(db[collection].find(query).sort(sort).limit(1)), None)
+            if first is not None:
+                keyset = keyset_filter(sort, decode_cursor(encode_cursor(first, sort), sort))
+                queries.append((
+                    name + (" after=" if not query else "&after="), collection,
+                    {"$and": [query, keyset]} if query else keyset, sort, 10
+                ))
+    return queries
+
+
+def _plan_stages(plan: Any) -> Iterator[str]:
+    """Every stage name in a (possibly nested) winning plan."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+def _winning_plans(explain: Any) -> Iterator[Dict[str, Any]]:
+    """Winning plans anywhere in an explain() result (find or aggregate)."""
+    if isinstance(explain, dict):
+        for key, value in explain.items():
+            if key == "winningPlan":
+                yield value
+            elif key != "rejectedPlans":
+                yield from _winning_plans(value)
+    elif isinstance(explain, list):
+        for item in explain:
+            yield from _winning_plans(item)
+
+
+def explain_find(db: Database, collection: str, query: Dict[str, Any], sort: Optional[list], limit: Optional[int]) -> List[str]:
+    """Forbidden stages in the winning plan of a find()."""
+    cursor = db[collection].find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    if limit:
+        cursor = cursor.limit(limit)
+    stages = [s for plan in _winning_plans(cursor.explain()) for s in _plan_stages(plan)]
+    return [s for s in stages if s in FORBIDDEN_STAGES]
+
+
+def explain_summary_pipeline(db: Database, view: str = "full") -> List[str]:
+    """Problems in the summary aggregation for a view: forbidden stages or $lookup collection scans."""
+    mrn = _sample(db, "patients", "mrn", "P000001")
+    pipeline = [{"$match": {"mrn": mrn}}, {"$limit": 1}, *summary_pipeline_stages(SUMMARY_VIEWS[view])]
+    explain = db.command(
+        "explain",
+        {"aggregate": "patients", "pipeline": pipeline, "cursor": {}},
+        verbosity="executionStats"
+    )
+    problems = [s for plan in _winning_plans(explain) for s in _plan_stages(plan) if s in FORBIDDEN_STAGES]
+    for stage in explain.get("stages", []):
+        lookup = stage.get("$lookup")
+        if lookup is not None and stage.get("collectionScans", 0) > 0:
+            problems.append(f"$lookup from {lookup['from']}: {stage['collectionScans']} collection scan(s)")
+    return problems
+
+
+def verify(db: Database) -> bool:
+    """Explain every router query; True if none scans a collection or sorts in memory."""
+    ok = True
+    for name, collection, query, sort, limit in router_queries(db):
+        problems = explain_find(db, collection, query, sort, limit)
+        print(f"\t {'FAIL' if problems else 'ok  '} {name}" + (f": {', '.join(problems)}" if problems else ""))
+        ok = ok and not problems
+
+    for view in SUMMARY_VIEWS:
+        try:
+            problems = explain_summary_pipeline(db, view)
+        except OperationFailure as e:
+            problems = [f"explain failed: {e}"]
+        print(f"\t {'FAIL' if problems else 'ok  '} GET /patients/{{mrn}}/summary?view={view} (aggregate)"
+              + (f": {', '.join(problems)}" if problems else ""))
+        ok = ok and not problems
+    return ok
+
+
+def main():
+    """Main entry point for the migration CLI."""
+    parser = argparse.ArgumentParser(description="Apply MongoDB indexes and verify query plans")
+    parser.add_argument("--uri", default=settings.MONGODB_URI, help="MongoDB URI")
+    parser.add_argument("--db", default=settings.MONGODB_DB_NAME, help="Database name")
+    parser.add_argument("--check", action="store_true", help="Only verify query plans, don't change indexes")
+    parser.add_argument("--prune", action="store_true", help="Drop indexes that are not in the spec")
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri)
+    db = client[args.db]
+    print(f"Database: {args.db}")
+
+    if not args.check:
+        print("\nApplying indexes...")
+        apply_indexes(db, prune=args.prune)
+
+    print("\nVerifying query plans...")
+    ok = verify(db)
+    client.close()
+
+    if not ok:
+        print("\nSome queries are not fully served by indexes.")
+        sys.exit(1)
+    print("\nAll queries use indexes.")
+
+
+if __name__ == "__main__":
+    main()
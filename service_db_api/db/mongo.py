@@ -20,7 +20,7 @@ class MongoConnection:
         if self.client is None:
             self.client = AsyncIOMotorClient(settings.MONGODB_URI)
             self.db = self.client[settings.MONGODB_DB_NAME]
-            await self._create_indexes()
+            # Indexes are applied by `python -m service_db_api.db.migrate`, not at startup
 
     async def close(self):
         """Close MongoDB connection."""
@@ -48,36 +48,6 @@ class MongoConnection:
         except ConnectionFailure as e:
             return {"success": False, "error": str(e), "latency_ms": 0}
 
-    async def _create_indexes(self):
-        """Create indexes for all collections."""
-        if self.db is None:
-            return
-
-        # patients collection
-        await self.db.patients.create_index("mrn", unique=True)
-
-        # encounters collection
-        await self.db.encounters.create_index("patient_mrn")
-        await self.db.encounters.create_index("encounter_id", unique=True)
-
-        # claims collection
-        await self.db.claims.create_index("patient_mrn")
-        await self.db.claims.create_index("claim_id", unique=True)
-
-        # documents collection
-        await self.db.documents.create_index("doc_id", unique=True)
-        await self.db.documents.create_index("patient_mrn")
-
-        # chat_logs collection
-        await self.db.chat_logs.create_index("conversation_id", unique=True)
-        await self.db.chat_logs.create_index("patient_mrn")
-
-        # providers collection (optional)
-        await self.db.providers.create_index("provider_id", unique=True)
-
-        # audit_logs collection (optional)
-        await self.db.audit_logs.create_index("event_id", unique=True)
-
 
 # Global connection instance
 mongo = MongoConnection()
@@ -0,0 +1,176 @@
+"""Keyset (cursor) pagination for the list endpoints.
+
+``skip`` makes the server walk and discard every earlier document, and an
+exact ``count_documents`` on every page scans the whole match, so both get
+slower the deeper a client pages. Keyset pagination instead resumes from
+the sort key of the last document returned:
+
+- Each list endpoint sorts by an indexed key ending in a unique field
+  (``indexes.list_sort``), so the order is total and index-provided
+- ``next_cursor`` is an opaque token holding that sort key; passing it back
+  as ``after=`` turns into a range condition on the same index, so every
+  page costs the same as the first
+- Null or missing sort keys (an encounter without ``start``) sort before
+  every value. Range operators never match null, so the conditions spell
+  out where nulls fall: first in ascending order, last in descending order
+- The total is optional: ``total=exact`` (``count_documents``),
+  ``estimated`` (collection metadata, only for unfiltered lists) or ``none``
+- A ``fields``/``exclude`` projection is applied on the server; sort keys it
+  leaves out are still fetched for the cursor, then dropped
+"""
+import base64
+from typing import Any, Dict, List, Optional
+
+from bson import json_util
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from service_db_api.db.indexes import SortSpec
+from service_db_api.db.projection import Projection, drop_fields, require_fields
+
+# Accepted values of the list endpoints' ``total`` query parameter
+TOTAL_PATTERN = "^(exact|estimated|none)$"
+
+
+class InvalidCursorError(ValueError):
+    """Raised when an ``after`` token is malformed or was issued for a different sort."""
+    pass
+
+
+def _sort_value(doc: Dict[str, Any], field: str) -> Any:
+    value: Any = doc
+    for part in field.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def encode_cursor(doc: Dict[str, Any], sort: SortSpec) -> str:
+    """Opaque token for the position just after doc in the given sort order."""
+    payload = json_util.dumps({"s": [f for f, _ in sort], "v": [_sort_value(doc, f) for f, _ in sort]})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, sort: SortSpec) -> List[Any]:
+    """
+    Sort-key values from a cursor token.
+
+    Raises:
+        InvalidCursorError: If the token is malformed or doesn't match the sort
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        fields, values = payload["s"], payload["v"]
+    except Exception:
+        raise InvalidCursorError("Malformed pagination cursor")
+    if fields != [f for f, _ in sort] or len(values) != len(sort):
+        raise InvalidCursorError("Pagination cursor does not match this query; restart from the first page")
+    return values
+
+
+def _after(field: str, direction: int, value: Any, inclusive: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Condition on one sort field matching the values after ``value`` (or equal to it, if inclusive).
+
+    Returns:
+        dict: The condition ({} for no restriction), or None if nothing comes after
+    """
+    if value is None:
+        if direction > 0:
+            # Nulls come first; every non-null value follows
+            return {} if inclusive else {field: {"$ne": None}}
+        # Nulls come last; only ties remain
+        return {field: None} if inclusive else None
+    if direction > 0:
+        return {field: {"$gte" if inclusive else "$gt": value}}
+    # $not also matches the null and missing values that follow in descending order
+    return {field: {"$not": {"$gt" if inclusive else "$gte": value}}}
+
+
+def keyset_filter(sort: SortSpec, values: List[Any]) -> Dict[str, Any]:
+    """
+    Condition selecting documents strictly after the given sort-key values.
+
+    The first sort field also gets an inclusive range, which becomes the
+    index bounds; the $or only discards ties on it. Ties compare with
+    equality, where null also matches a missing field, as in the sort.
+    """
+    first_field, first_direction = sort[0]
+    if len(sort) == 1:
+        after = _after(first_field, first_direction, values[0])
+        return after if after is not None else {first_field: {"$in": []}}
+
+    branches = []
+    for i, (field, direction) in enumerate(sort):
+        after = _after(field, direction, values[i])
+        if after is None:
+            continue
+        branches.append({**{f: v for (f, _), v in zip(sort[:i], values[:i])}, **after})
+    if not branches:
+        return {first_field: {"$in": []}}
+    return {**_after(first_field, first_direction, values[0], inclusive=True), "$or": branches}
+
+
+async def paginate(
+    collection: AsyncIOMotorCollection,
+    query: Dict[str, Any],
+    sort: SortSpec,
+    skip: int,
+    limit: int,
+    after: Optional[str] = None,
+    total: Optional[str] = None,
+    projection: Optional[Projection] = None
+) -> Dict[str, Any]:
+    """
+    Fetch one page of a list endpoint.
+
+    Args:
+        collection: Collection to read
+        query: Filter from the endpoint's query parameters
+        sort: Index-backed sort order ending in a unique field
+        skip: Offset (legacy paging; prefer ``after``)
+        limit: Page size
+        after: Cursor from a previous page's ``next_cursor``
+        total: "exact", "estimated" or "none" (default: "exact" for offset
+            paging, "none" when paging by cursor)
+        projection: Fields to return (from ``parse_projection``; None for whole documents)
+
+    Returns:
+        dict: items (raw BSON documents, for ``BSONJSONResponse``), total, skip, limit and
+            next_cursor (None on the last page)
+
+    Raises:
+        InvalidCursorError: If ``after`` is invalid for this query
+    """
+    total = total or ("none" if after else "exact")
+
+    find_query = query
+    if after:
+        keyset = keyset_filter(sort, decode_cursor(after, sort))
+        find_query = {"$and": [query, keyset]} if query else keyset
+
+    # The cursor needs the sort keys even if the caller didn't ask for them
+    projection, hidden = require_fields(projection, [f for f, _ in sort])
+
+    # One extra document tells us whether there is a next page
+    cursor = collection.find(find_query, projection).sort(sort).skip(skip).limit(limit + 1)
+    items = await cursor.to_list(length=limit + 1)
+    has_more = len(items) > limit
+    items = items[:limit]
+    next_cursor = encode_cursor(items[-1], sort) if has_more else None
+    drop_fields(items, hidden)
+
+    if total == "exact":
+        count = await collection.count_documents(query)
+    elif total == "estimated":
+        # Collection metadata is only an estimate of the whole collection, so filtered lists count exactly
+        count = await collection.estimated_document_count() if not query else await collection.count_documents(query)
+    else:
+        count = None
+
+    return {
+        "items": items,
+        "total": count,
+        "skip": skip,
+        "limit": limit,
+        "next_cursor": next_cursor
+    }
@@ -0,0 +1,202 @@
+"""Query strategies for building a patient summary.
+
+The summary is the patient record plus their 10 most recent encounters, 10
+most recent claims and up to 20 documents. There are three ways to fetch it:
+
+- ``aggregate``: one ``$match`` + ``$lookup`` aggregation on ``patients``, so
+  the whole summary comes back in a single round trip (default)
+- ``concurrent``: the patient and the three child queries issued at once,
+  so the latency is that of the slowest query rather than the sum
+- ``sequential``: the four queries one after another (the original path,
+  kept as the baseline for ``scripts/benchmark_patient_summary.py``)
+
+All three return the same document (raw BSON values, encoded by
+``responses.BSONJSONResponse``), or None if the MRN doesn't exist. A
+view from ``projection.SUMMARY_VIEWS`` narrows each section to its fields
+on the server (a find projection, or a ``$project`` inside each ``$lookup``).
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from service_db_api.db.indexes import PATIENT_SORTS
+from service_db_api.db.projection import SummaryView
+
+ENCOUNTER_LIMIT = 10
+CLAIM_LIMIT = 10
+DOCUMENT_LIMIT = 20
+
+
+def _build_summary(
+    mrn: str,
+    patient: Dict[str, Any],
+    encounters: List[Dict[str, Any]],
+    claims: List[Dict[str, Any]],
+    documents: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    return {
+        "patient": patient,
+        "recent_encounters": encounters,
+        "recent_claims": claims,
+        "documents": documents,
+        "summary_metadata": {
+            "mrn": mrn,
+            "encounter_count": len(encounters),
+            "claim_count": len(claims),
+            "document_count": len(documents)
+        }
+    }
+
+
+def _child_queries(
+    db: AsyncIOMotorDatabase,
+    mrn: str,
+    view: Optional[SummaryView]
+) -> List[Callable[[], Awaitable[List[Dict[str, Any]]]]]:
+    """Encounter, claim and document queries (as factories, since Motor starts an operation when it is called)."""
+    view = view or {}
+    return [
+        lambda: db.encounters.find({"patient_mrn": mrn}, view.get("encounters")).sort(PATIENT_SORTS["encounters"]).limit(ENCOUNTER_LIMIT).to_list(length=ENCOUNTER_LIMIT),
+        lambda: db.claims.find({"patient_mrn": mrn}, view.get("claims")).sort(PATIENT_SORTS["claims"]).limit(CLAIM_LIMIT).to_list(length=CLAIM_LIMIT),
+        lambda: db.documents.find({"patient_mrn": mrn}, view.get("documents")).limit(DOCUMENT_LIMIT).to_list(length=DOCUMENT_LIMIT),
+    ]
+
+
+async def fetch_summary_sequential(
+    db: AsyncIOMotorDatabase,
+    mrn: str,
+    view: Optional[SummaryView] = None
+) -> Optional[Dict[str, Any]]:
+    """Patient, then encounters, claims and documents, one query at a time."""
+    patient = await db.patients.find_one({"mrn": mrn}, (view or {}).get("patient"))
+    if not patient:
+        return None
+    encounters, claims, documents = [await query() for query in _child_queries(db, mrn, view)]
+    return _build_summary(mrn, patient, encounters, claims, documents)
+
+
+async def fetch_summary_concurrent(
+    db: AsyncIOMotorDatabase,
+    mrn: str,
+    view: Optional[SummaryView] = None
+) -> Optional[Dict[str, Any]]:
+    """All four queries in flight at once (child results are discarded for an unknown MRN)."""
+    patient, encounters, claims, documents = await asyncio.gather(
+        db.patients.find_one({"mrn": mrn}, (view or {}).get("patient")),
+        *(query() for query in _child_queries(db, mrn, view))
+    )
+    if not patient:
+        return None
+    return _build_summary(mrn, patient, encounters, claims, documents)
+
+
+def _lookup(
+    collection: str,
+    sort: Optional[Dict[str, int]],
+    limit: int,
+    as_field: str,
+    projection: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    # $expr equality on patient_mrn can use the patient_mrn index (MongoDB 5.0+)
+    pipeline: List[Dict[str, Any]] = [{"$match": {"$expr": {"$eq": ["$patient_mrn", "$$mrn"]}}}]
+    if sort:
+        pipeline.append({"$sort": sort})
+    pipeline.append({"$limit": limit})
+    if projection:
+        pipeline.append({"$project": projection})
+    return {"$lookup": {"from": collection, "let": {"mrn": "$mrn"}, "pipeline": pipeline, "as": as_field}}
+
+
+def summary_pipeline_stages(view: Optional[SummaryView] = None) -> List[Dict[str, Any]]:
+    """The stages after the patient $match: an optional patient $project, then one $lookup per section."""
+    view = view or {}
+    stages: List[Dict[str, Any]] = []
+    if view.get("patient"):
+        # The $lookups join on mrn, so it stays even if the view leaves it out
+        stages.append({"$project": {**view["patient"], "mrn": 1}})
+    stages += [
+        _lookup("encounters", dict(PATIENT_SORTS["encounters"]), ENCOUNTER_LIMIT, "_encounters", view.get("encounters")),
+        _lookup("claims", dict(PATIENT_SORTS["claims"]), CLAIM_LIMIT, "_claims", view.get("claims")),
+        _lookup("documents", None, DOCUMENT_LIMIT, "_documents", view.get("documents")),
+    ]
+    return stages
+
+
+SUMMARY_PIPELINE_STAGES = summary_pipeline_stages()
+
+
+async def fetch_summary_aggregate(
+    db: AsyncIOMotorDatabase,
+    mrn: str,
+    view: Optional[SummaryView] = None
+) -> Optional[Dict[str, Any]]:
+    """The whole summary from one aggregation (a single round trip)."""
+    stages = summary_pipeline_stages(view) if view else SUMMARY_PIPELINE_STAGES
+    pipeline = [{"$match": {"mrn": mrn}}, {"$limit": 1}, *stages]
+    results = await db.patients.aggregate(pipeline).to_list(length=1)
+    if not results:
+        return None
+    return assemble_summary(results[0])
+
+
+async def fetch_patient_summaries(
+    db: AsyncIOMotorDatabase,
+    mrns: List[str],
+    view: Optional[SummaryView] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Summaries of many patients from one aggregation.
+
+    The ``$in`` match finds the patients and each ``$lookup`` still takes
+    only that patient's most recent records (through the patient_mrn
+    indexes), so the whole batch costs one round trip.
+
+    Returns:
+        dict: Summaries keyed by MRN (unknown MRNs are absent)
+    """
+    pipeline = [{"$match": {"mrn": {"$in": mrns}}}, *summary_pipeline_stages(view)]
+    results = await db.patients.aggregate(pipeline).to_list(length=None)
+    return {patient["mrn"]: assemble_summary(patient) for patient in results}
+
+
+def assemble_summary(patient: Dict[str, Any]) -> Dict[str, Any]:
+    """Summary from a patient document that went through ``summary_pipeline_stages``."""
+    encounters = patient.pop("_encounters")
+    claims = patient.pop("_claims")
+    documents = patient.pop("_documents")
+    return _build_summary(patient["mrn"], patient, encounters, claims, documents)
+
+
+SUMMARY_STRATEGIES: Dict[str, Callable[..., Awaitable[Optional[Dict[str, Any]]]]] = {
+    "aggregate": fetch_summary_aggregate,
+    "concurrent": fetch_summary_concurrent,
+    "sequential": fetch_summary_sequential,
+}
+
+
+async def fetch_patient_summary(
+    db: AsyncIOMotorDatabase,
+    mrn: str,
+    strategy: str = "aggregate",
+    view: Optional[SummaryView] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Build the patient summary with the given query strategy.
+
+    Args:
+        db: Database handle
+        mrn: Patient Medical Record Number
+        strategy: "aggregate", "concurrent" or "sequential"
+        view: Section projections (from ``projection.summary_view``; None for everything)
+
+    Returns:
+        dict: The summary, or None if no patient has this MRN
+
+    Raises:
+        ValueError: If the strategy is unknown
+    """
+    fetch = SUMMARY_STRATEGIES.get(strategy)
+    if fetch is None:
+        raise ValueError(f"Unknown summary strategy '{strategy}'. Use one of: {', '.join(SUMMARY_STRATEGIES)}")
+    return await fetch(db, mrn, view)
@@ -0,0 +1,163 @@
+"""Field projections and named summary views.
+
+Read endpoints return whole documents by default. ``fields=`` (fields to
+return) or ``exclude=`` (fields to drop) turns into a MongoDB projection, so
+unwanted fields, such as a document's ``text``, are never read off the
+server, sent over the network or JSON-encoded.
+
+The patient summary has named views instead, because it spans four
+collections:
+
+- ``full``: every field of every record (default)
+- ``compact``: only the fields service_chat's prompt renderer uses, with
+  document text cut to ``SUMMARY_COMPACT_TEXT_CHARS`` characters
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from service_db_api.config import settings
+
+Projection = Dict[str, Any]
+
+# Per-section projections of the summary ("patient", "encounters", "claims", "documents")
+SummaryView = Dict[str, Projection]
+
+
+class InvalidProjectionError(ValueError):
+    """Raised when a fields/exclude parameter or a view name is invalid."""
+    pass
+
+
+def _split(value: str) -> List[str]:
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    for name in names:
+        if name.startswith("$") or ".$" in name or name.startswith(".") or name.endswith(".") or ".." in name:
+            raise InvalidProjectionError(f"Invalid field name '{name}'")
+    for name in names:
+        for other in names:
+            if other.startswith(name + "."):
+                raise InvalidProjectionError(f"Field '{other}' overlaps with '{name}'")
+    return names
+
+
+def parse_projection(fields: Optional[str], exclude: Optional[str]) -> Optional[Projection]:
+    """
+    MongoDB projection for comma-separated ``fields``/``exclude`` parameters.
+
+    Dotted names select nested fields. ``_id`` is returned unless listed in
+    ``exclude`` (or ``fields`` names other fields and ``exclude`` is unset,
+    in which case MongoDB still includes it).
+
+    Returns:
+        dict: The projection, or None to return whole documents
+
+    Raises:
+        InvalidProjectionError: If both parameters are given or a name is invalid
+    """
+    if fields and exclude:
+        raise InvalidProjectionError("Use either fields or exclude, not both")
+    if fields:
+        return {name: 1 for name in _split(fields)} or None
+    if exclude:
+        return {name: 0 for name in _split(exclude)} or None
+    return None
+
+
+def _includes(projection: Projection, field: str) -> bool:
+    """Whether a projection returns a (possibly nested) field."""
+    if field == "_id":
+        return projection.get("_id", 1) != 0
+    inclusion = any(v != 0 for k, v in projection.items() if k != "_id")
+    parts = field.split(".")
+    covered = any(".".join(parts[:i]) in projection for i in range(1, len(parts) + 1))
+    return covered if inclusion else not covered
+
+
+def require_fields(projection: Optional[Projection], fields: List[str]) -> Tuple[Optional[Projection], List[str]]:
+    """
+    Extend a projection so it returns the given fields.
+
+    The list endpoints need their sort keys to build the next-page cursor
+    even when the caller didn't ask for them.
+
+    Returns:
+        tuple: (projection to query with, fields to drop from the results afterwards)
+    """
+    if projection is None:
+        return None, []
+    extended = dict(projection)
+    inclusion = any(v != 0 for k, v in projection.items() if k != "_id")
+    hidden: List[str] = []
+    for field in fields:
+        if _includes(extended, field):
+            continue
+        if field == "_id" and "_id" in extended and not inclusion:
+            del extended["_id"]
+            hidden.append("_id")
+        elif field == "_id" or inclusion:
+            extended[field] = 1
+            hidden.append(field)
+        else:
+            # Excluded directly or through a parent: stop excluding that path and drop it afterwards
+            for key in [k for k in extended if field == k or field.startswith(k + ".")]:
+                del extended[key]
+                hidden.append(key)
+    return extended or None, hidden
+
+
+def drop_fields(docs: List[Dict[str, Any]], fields: List[str]) -> None:
+    """Remove (possibly nested) fields from documents in place."""
+    for doc in docs:
+        for field in fields:
+            *parents, leaf = field.split(".")
+            target: Any = doc
+            for part in parents:
+                target = target.get(part) if isinstance(target, dict) else None
+            if isinstance(target, dict):
+                target.pop(leaf, None)
+
+
+def _compact_view() -> SummaryView:
+    return {
+        "patient": {
+            "_id": 0, "mrn": 1, "name": 1, "dob": 1, "gender": 1,
+            "allergies.substance": 1, "allergies.reaction": 1, "allergies.severity": 1,
+            "medications.name": 1, "medications.start_date": 1, "medications.end_date": 1, "medications.sig": 1,
+            "conditions.code": 1, "conditions.display": 1, "conditions.onset_date": 1,
+        },
+        "encounters": {
+            "_id": 0, "start": 1, "type": 1, "location": 1, "notes": 1,
+            "diagnoses.code": 1, "diagnoses.display": 1,
+            "vitals.bp_systolic": 1, "vitals.bp_diastolic": 1, "vitals.heart_rate": 1, "vitals.weight_kg": 1,
+            "labs.loinc": 1, "labs.name": 1, "labs.value": 1, "labs.unit": 1, "labs.collected_at": 1,
+        },
+        "claims": {
+            "_id": 0, "service_date": 1, "payer": 1, "status": 1, "cpt_codes": 1, "icd10_codes": 1,
+            "billed_amount": 1, "allowed_amount": 1, "patient_responsibility": 1,
+        },
+        "documents": {
+            "_id": 0, "title": 1, "source_type": 1, "metadata.created_at": 1,
+            # The renderer only ever uses an excerpt, so the server cuts the text
+            "text": {"$substrCP": [{"$ifNull": ["$text", ""]}, 0, settings.SUMMARY_COMPACT_TEXT_CHARS]},
+        },
+    }
+
+
+SUMMARY_VIEWS: Dict[str, Optional[SummaryView]] = {
+    "full": None,
+    "compact": _compact_view(),
+}
+
+# Accepted values of the summary endpoint's ``view`` query parameter
+VIEW_PATTERN = "^(" + "|".join(SUMMARY_VIEWS) + ")$"
+
+
+def summary_view(name: str) -> Optional[SummaryView]:
+    """
+    Section projections of a named summary view (None for the full summary).
+
+    Raises:
+        InvalidProjectionError: If the view is unknown
+    """
+    if name not in SUMMARY_VIEWS:
+        raise InvalidProjectionError(f"Unknown view '{name}'. Use one of: {', '.join(SUMMARY_VIEWS)}")
+    return SUMMARY_VIEWS[name]
@@ -0,0 +1,410 @@
+#!/usr/bin/env python
+"""
+Materialized patient summaries.
+
+``GET /patients/{mrn}/summary`` joins four collections on every call,
+though the source data rarely changes. The ``patient_summaries``
+collection holds the finished summary of each patient (every view from
+``projection.SUMMARY_VIEWS``), so serving it is one indexed ``find_one``:
+
+    {"mrn": ..., "views": {"full": {...}, "compact": {...}},
+     "version": 3, "source_ids": [...], "source_time": Timestamp, "updated_at": ...}
+
+- ``version`` counts the rebuilds of that summary
+- ``source_ids`` are the ``_id`` values of the patient and of every record in
+  the summary. They map a change to a record (even a delete, whose event has
+  no ``patient_mrn``) back to the summaries it appears in
+- ``source_time`` is the cluster time of the data a summary was built from.
+  A write only lands if it is newer, so a slow rebuild can't overwrite the
+  result of a later one
+
+``SummaryWorker`` follows a change stream on the source collections and
+rebuilds the summaries each change touches. It stores its resume token, so
+a restart picks up where it stopped; with no token it rebuilds everything
+first. While following changes it also writes a heartbeat, so API processes
+without a worker of their own (``--watch`` running separately) know the
+stored summaries are current. Change streams need a replica set; on a
+standalone server the worker stops and, with no heartbeat, the endpoint
+computes summaries live (``PATIENT_SUMMARY_SOURCE=auto``).
+
+The "only over an older copy" guard relies on the unique ``mrn`` index: when
+a newer copy exists the upsert's filter matches nothing, and only the index
+stops it from inserting a second copy. The worker and ``rebuild_all``
+create the indexes before writing.
+
+Usage:
+    python -m service_db_api.db.summaries              # rebuild every summary
+    python -m service_db_api.db.summaries --watch      # follow changes (a standalone worker)
+
+Environment variables:
+    MONGODB_URI, MONGODB_DB_NAME: Same as service_db_api
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from bson import Timestamp
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+from service_db_api.config import settings
+from service_db_api.db.indexes import INDEXES
+from service_db_api.db.patient_summary import assemble_summary, fetch_patient_summary, summary_pipeline_stages
+from service_db_api.db.projection import SUMMARY_VIEWS
+
+logger = logging.getLogger(__name__)
+
+SUMMARIES_COLLECTION = "patient_summaries"
+# Holds the worker's change stream resume token and heartbeat
+WORKER_STATE_COLLECTION = "patient_summaries_state"
+SOURCE_COLLECTIONS = ("patients", "encounters", "claims", "documents")
+
+# Server error codes of a change stream that can't be (re)opened
+_CHANGE_STREAMS_UNSUPPORTED = 40573
+_RESUME_POINT_LOST = (260, 280, 286)
+_DUPLICATE_KEY = 11000
+
+# A worker counts as following changes until this many heartbeat intervals pass without one
+_HEARTBEAT_MISSES = 3
+
+# Last heartbeat check of serve_materialized(): (time.monotonic(), worker alive)
+_heartbeat_check: Tuple[float, bool] = (float("-inf"), False)
+
+
+def _source_ids(summary: Dict[str, Any]) -> List[Any]:
+    records = [summary["patient"], *summary["recent_encounters"], *summary["recent_claims"], *summary["documents"]]
+    return [record["_id"] for record in records if "_id" in record]
+
+
+def _older_than(source_time: Timestamp) -> Dict[str, Any]:
+    return {"$or": [{"source_time": {"$lt": source_time}}, {"source_time": {"$exists": False}}]}
+
+
+def _upsert(mrn: str, views: Dict[str, Dict[str, Any]], source_time: Timestamp) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """(filter, update) writing a rebuilt summary only over an older copy (or none)."""
+    return (
+        {"mrn": mrn, **_older_than(source_time)},
+        {
+            "$set": {"views": views, "source_ids": _source_ids(views["full"]), "source_time": source_time},
+            "$inc": {"version": 1},
+            "$currentDate": {"updated_at": True},
+        }
+    )
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    """
+    Create the patient_summaries indexes if they are missing.
+
+    If copies were already duplicated without the unique index, the
+    collection is dropped (it only holds derived data) along with the resume
+    token, so the worker rebuilds everything.
+    """
+    collection = db[SUMMARIES_COLLECTION]
+    try:
+        await collection.create_indexes(INDEXES[SUMMARIES_COLLECTION])
+    except OperationFailure as e:
+        if e.code != _DUPLICATE_KEY:
+            raise
+        logger.warning("Duplicate patient summaries found; dropping them to rebuild")
+        await collection.drop()
+        await db[WORKER_STATE_COLLECTION].delete_one({"_id": "resume_token"})
+        await collection.create_indexes(INDEXES[SUMMARIES_COLLECTION])
+
+
+async def cluster_time(db: AsyncIOMotorDatabase) -> Timestamp:
+    """Current cluster time (server clock on a standalone server)."""
+    hello = await db.command("hello")
+    current = (hello.get("$clusterTime") or {}).get("clusterTime")
+    return current or Timestamp(int(hello["localTime"].timestamp()), 0)
+
+
+async def get_materialized_summary(
+    db: AsyncIOMotorDatabase,
+    mrn: str,
+    view: str
+) -> Optional[Tuple[Dict[str, Any], int]]:
+    """The stored summary view and its version, or None if it hasn't been materialized."""
+    doc = await db[SUMMARIES_COLLECTION].find_one({"mrn": mrn}, {f"views.{view}": 1, "version": 1, "_id": 0})
+    if doc is None or view not in doc.get("views", {}):
+        return None
+    return doc["views"][view], doc["version"]
+
+
+async def get_materialized_summaries(
+    db: AsyncIOMotorDatabase,
+    mrns: List[str],
+    view: str
+) -> Dict[str, Tuple[Dict[str, Any], int]]:
+    """Stored summary views and versions keyed by MRN (MRNs without a stored copy are absent)."""
+    cursor = db[SUMMARIES_COLLECTION].find(
+        {"mrn": {"$in": mrns}}, {"mrn": 1, f"views.{view}": 1, "version": 1, "_id": 0}
+    )
+    return {
+        doc["mrn"]: (doc["views"][view], doc["version"])
+        async for doc in cursor
+        if view in doc.get("views", {})
+    }
+
+
+async def rebuild_summary(db: AsyncIOMotorDatabase, mrn: str, source_time: Timestamp) -> bool:
+    """
+    Recompute one patient's summary, or delete it if the patient is gone.
+
+    Args:
+        db: Database handle
+        mrn: Patient Medical Record Number
+        source_time: Cluster time the source data is at least as new as
+
+    Returns:
+        bool: True if the stored summary changed
+    """
+    summaries = await asyncio.gather(*(
+        fetch_patient_summary(db, mrn, "aggregate", view) for view in SUMMARY_VIEWS.values()
+    ))
+    collection = db[SUMMARIES_COLLECTION]
+    if any(summary is None for summary in summaries):
+        result = await collection.delete_one({"mrn": mrn, **_older_than(source_time)})
+        return result.deleted_count > 0
+
+    try:
+        await collection.update_one(*_upsert(mrn, dict(zip(SUMMARY_VIEWS, summaries)), source_time), upsert=True)
+    except DuplicateKeyError:
+        # A newer copy is already stored
+        return False
+    return True
+
+
+async def rebuild_all(db: AsyncIOMotorDatabase, batch_size: Optional[int] = None) -> int:
+    """
+    Rebuild every patient's summary in bulk and drop summaries of deleted patients.
+
+    Each view is one aggregation over all patients in MRN order, read in
+    lockstep, and the summaries are written with unordered bulk upserts.
+
+    Returns:
+        int: Number of summaries written
+    """
+    batch_size = batch_size or settings.SUMMARY_REBUILD_BATCH_SIZE
+    await ensure_indexes(db)
+    started = await cluster_time(db)
+    cursors = [
+        db.patients.aggregate([{"$sort": {"mrn": 1}}, *summary_pipeline_stages(view)], batchSize=batch_size)
+        for view in SUMMARY_VIEWS.values()
+    ]
+    collection = db[SUMMARIES_COLLECTION]
+    written = 0
+    while True:
+        chunks = [await cursor.to_list(length=batch_size) for cursor in cursors]
+        if not chunks[0]:
+            break
+        operations = []
+        for docs in zip(*chunks):
+            mrns = {doc["mrn"] for doc in docs}
+            if len(mrns) != 1:
+                raise RuntimeError("Patients changed during the rebuild; run it again")
+            views = {name: assemble_summary(doc) for name, doc in zip(SUMMARY_VIEWS, docs)}
+            operations.append(UpdateOne(*_upsert(mrns.pop(), views, started), upsert=True))
+        try:
+            result = await collection.bulk_write(operations, ordered=False)
+            written += result.upserted_count + result.modified_count
+        except BulkWriteError as e:
+            # Duplicate keys are summaries a worker already stored from newer data
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+            written += e.details["nUpserted"] + e.details["nModified"]
+
+    await collection.delete_many({"source_time": {"$lt": started}})
+    return written
+
+
+class SummaryWorker:
+    """Change stream consumer that rebuilds the summaries affected by each change."""
+
+    def __init__(self, retry_seconds: float, heartbeat_seconds: float):
+        self.retry_seconds = retry_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self._task: Optional["asyncio.Task[None]"] = None
+
+        # True while following the change stream (summaries are current)
+        self.running = False
+        self.unsupported = False
+        self.events = 0
+        self.rebuilt = 0
+        self.full_rebuilds = 0
+        self.errors = 0
+
+    def start(self, db: AsyncIOMotorDatabase) -> None:
+        """Start following changes on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(db))
+
+    async def stop(self) -> None:
+        """Stop following changes."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.running = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Worker state and event/rebuild counters."""
+        return {
+            "running": self.running,
+            "change_streams_unsupported": self.unsupported,
+            "events": self.events,
+            "rebuilt": self.rebuilt,
+            "full_rebuilds": self.full_rebuilds,
+            "errors": self.errors,
+        }
+
+    async def _run(self, db: AsyncIOMotorDatabase) -> None:
+        while True:
+            try:
+                await self._follow(db)
+            except OperationFailure as e:
+                self.running = False
+                if e.code == _CHANGE_STREAMS_UNSUPPORTED:
+                    self.unsupported = True
+                    logger.warning("Change streams need a replica set; patient summaries will be computed live")
+                    return
+                self.errors += 1
+                if e.code in _RESUME_POINT_LOST:
+                    logger.warning(f"Summary worker can't resume ({e}); rebuilding all summaries")
+                    await db[WORKER_STATE_COLLECTION].delete_one({"_id": "resume_token"})
+                else:
+                    logger.error(f"Summary worker failed: {e}")
+                    await asyncio.sleep(self.retry_seconds)
+            except Exception as e:
+                self.running = False
+                self.errors += 1
+                logger.exception(f"Summary worker failed: {e}")
+                await asyncio.sleep(self.retry_seconds)
+
+    async def _follow(self, db: AsyncIOMotorDatabase) -> None:
+        await ensure_indexes(db)
+        state = db[WORKER_STATE_COLLECTION]
+        saved = await state.find_one({"_id": "resume_token"})
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": list(SOURCE_COLLECTIONS)},
+            "operationType": {"$in": ["insert", "update", "replace", "delete"]},
+        }}]
+        # try_next() returns at least once per heartbeat interval, even without changes
+        options: Dict[str, Any] = {
+            "full_document": "updateLookup",
+            "max_await_time_ms": int(self.heartbeat_seconds * 1000),
+        }
+        if saved:
+            options["resume_after"] = saved["token"]
+
+        async with db.watch(pipeline, **options) as stream:
+            if not saved:
+                # The stream is open first, so changes made during the rebuild are replayed after it
+                written = await rebuild_all(db)
+                self.full_rebuilds += 1
+                logger.info(f"Rebuilt {written} patient summaries")
+            self.running = True
+            logger.info("Summary worker following changes to " + ", ".join(SOURCE_COLLECTIONS))
+
+            last_beat = float("-inf")
+            while stream.alive:
+                if time.monotonic() - last_beat >= self.heartbeat_seconds:
+                    await state.update_one({"_id": "heartbeat"}, {"$currentDate": {"at": True}}, upsert=True)
+                    last_beat = time.monotonic()
+                event = await stream.try_next()
+                if event is not None:
+                    self.events += 1
+                    for mrn in await self._affected(db, event):
+                        if await rebuild_summary(db, mrn, event["clusterTime"]):
+                            self.rebuilt += 1
+                if stream.resume_token is not None:
+                    await state.update_one(
+                        {"_id": "resume_token"}, {"$set": {"token": stream.resume_token}}, upsert=True
+                    )
+
+    async def _affected(self, db: AsyncIOMotorDatabase, event: Dict[str, Any]) -> Set[str]:
+        """MRNs of the summaries a change can alter."""
+        key = "mrn" if event["ns"]["coll"] == "patients" else "patient_mrn"
+        mrns = set()
+        document = event.get("fullDocument") or {}
+        if document.get(key):
+            mrns.add(document[key])
+        # Summaries that already contain the record: covers deletes and records moved to another patient
+        cursor = db[SUMMARIES_COLLECTION].find({"source_ids": event["documentKey"]["_id"]}, {"mrn": 1})
+        async for summary in cursor:
+            mrns.add(summary["mrn"])
+        return mrns
+
+
+async def serve_materialized(db: AsyncIOMotorDatabase) -> bool:
+    """
+    Whether the summary endpoint should read from patient_summaries.
+
+    In auto mode: while this process's worker follows changes, or while
+    another worker (``--watch``, another replica) keeps writing heartbeats.
+    The heartbeat is read at most once per heartbeat interval.
+    """
+    global _heartbeat_check
+
+    if settings.PATIENT_SUMMARY_SOURCE != "auto":
+        return settings.PATIENT_SUMMARY_SOURCE == "materialized"
+    if summary_worker.running:
+        return True
+
+    checked_at, alive = _heartbeat_check
+    if time.monotonic() - checked_at >= settings.SUMMARY_WORKER_HEARTBEAT_SECONDS:
+        stale_ms = _HEARTBEAT_MISSES * settings.SUMMARY_WORKER_HEARTBEAT_SECONDS * 1000
+        # Compared with the server clock ($$NOW), as the worker writes it with $currentDate
+        heartbeat = await db[WORKER_STATE_COLLECTION].find_one({
+            "_id": "heartbeat",
+            "$expr": {"$gt": ["$at", {"$subtract": ["$$NOW", stale_ms]}]},
+        })
+        alive = heartbeat is not None
+        _heartbeat_check = (time.monotonic(), alive)
+    return alive
+
+
+# Global worker (started by the app when SUMMARY_WORKER_ENABLED)
+summary_worker = SummaryWorker(
+    retry_seconds=settings.SUMMARY_WORKER_RETRY_SECONDS,
+    heartbeat_seconds=settings.SUMMARY_WORKER_HEARTBEAT_SECONDS
+)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    client = AsyncIOMotorClient(args.uri)
+    db = client[args.db]
+    print(f"Database: {args.db}")
+    try:
+        if args.watch:
+            logging.basicConfig(level=settings.LOG_LEVEL)
+            summary_worker.start(db)
+            try:
+                await asyncio.Event().wait()
+            finally:
+                await summary_worker.stop()
+        else:
+            written = await rebuild_all(db)
+            print(f"\t Rebuilt {written} patient summaries")
+    finally:
+        client.close()
+
+
+def main():
+    """Main entry point for the summary rebuild CLI."""
+    parser = argparse.ArgumentParser(description="Rebuild materialized patient summaries")
+    parser.add_argument("--uri", default=settings.MONGODB_URI, help="MongoDB URI")
+    parser.add_argument("--db", default=settings.MONGODB_DB_NAME, help="Database name")
+    parser.add_argument("--watch", action="store_true", help="Keep running and apply changes as they happen")
+    args = parser.parse_args()
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
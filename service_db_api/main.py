@@ -1,16 +1,23 @@
 """Main FastAPI application for CarePath DB API."""
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from service_db_api.config import settings
 from service_db_api.db.mongo import mongo
+from service_db_api.db.pagination import InvalidCursorError
+from service_db_api.db.projection import InvalidProjectionError
+from service_db_api.db.summaries import summary_worker
+from service_db_api.responses import BSONJSONResponse
 from service_db_api.routers import (
     health,
     patients,
     encounters,
     claims,
     documents,
-    chat_logs
+    chat_logs,
+    export
 )
 
 
@@ -28,9 +35,13 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f" Error connecting to MongoDB: {e}")
 
+    if settings.SUMMARY_WORKER_ENABLED:
+        summary_worker.start(mongo.get_database())
+
     yield
 
     # Shutdown
+    await summary_worker.stop()
     await mongo.close()
     print(" MongoDB connection closed")
 
@@ -40,6 +51,7 @@ app = FastAPI(
     title="CarePath DB API",
     version="0.1.0",
     description="MongoDB-backed data service for CarePath AI",
+    default_response_class=BSONJSONResponse,
     lifespan=lifespan
 )
 
@@ -52,6 +64,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursorError):
+    """Reject a bad or mismatched pagination cursor with 400."""
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+@app.exception_handler(InvalidProjectionError)
+async def invalid_projection_handler(request: Request, exc: InvalidProjectionError):
+    """Reject an invalid fields/exclude parameter or view name with 400."""
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
 # Include routers
 app.include_router(health.router, tags=["health"])
 app.include_router(patients.router, tags=["patients"])
@@ -59,6 +83,7 @@ app.include_router(encounters.router, tags=["encounters"])
 app.include_router(claims.router, tags=["claims"])
 app.include_router(documents.router, tags=["documents"])
 app.include_router(chat_logs.router, tags=["chat-logs"])
+app.include_router(export.router, tags=["export"])
 
 
 @app.get("/")
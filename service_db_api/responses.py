@@ -0,0 +1,41 @@
+"""JSON responses serialized straight from Motor results.
+
+Returning a dict from a route makes FastAPI walk it with ``jsonable_encoder``
+and then encode it with ``json.dumps``. That is slow for large nested
+clinical documents, and ObjectId values must first be converted by hand.
+``BSONJSONResponse`` instead encodes the documents Motor returns in one
+orjson call. orjson handles datetimes natively and falls back to
+``_bson_default`` for ObjectId and Decimal128, so routers return query
+results unchanged.
+
+Routes must return the response object itself (``return BSONJSONResponse(doc)``).
+A plain return value still goes through ``jsonable_encoder`` first.
+``scripts/benchmark_serialization.py`` compares both paths on
+summary-sized payloads.
+"""
+from typing import Any
+
+import orjson
+from bson import Decimal128, ObjectId
+from fastapi.responses import JSONResponse
+
+
+def _bson_default(value: Any) -> Any:
+    """orjson fallback for BSON types it doesn't know."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return float(value.to_decimal())
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode Motor results (ObjectId, datetime and Decimal128 included) to JSON bytes."""
+    return orjson.dumps(content, default=_bson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class BSONJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson, accepting raw BSON documents."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -5,8 +5,13 @@ from typing import Optional, List
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError
 
+from service_db_api.db.indexes import list_sort
 from service_db_api.db.mongo import get_database
+from service_db_api.db.pagination import TOTAL_PATTERN, paginate
+from service_db_api.db.projection import parse_projection
+from service_db_api.responses import BSONJSONResponse
 
 router = APIRouter()
 
@@ -20,6 +25,7 @@ class MessageCreate(BaseModel):
     timestamp: Optional[str] = None  # ISO format, auto-set if not provided
     model_name: Optional[str] = None  # For assistant messages
     latency_ms: Optional[float] = None  # For assistant messages
+    routing: Optional[dict] = None  # For assistant messages with llm_mode="auto": backend and reason
 
 
 class RetrievalEventCreate(BaseModel):
@@ -43,6 +49,19 @@ class ChatLogCreate(BaseModel):
     conversation_id: Optional[str] = None  # Auto-generated if not provided
 
 
+class ChatLogBulkCreate(BaseModel):
+    """Request body for creating many chat logs at once."""
+    chat_logs: List[ChatLogCreate] = Field(min_length=1, max_length=1000)
+
+
+class ChatLogBulkResponse(BaseModel):
+    """Response after a bulk insert."""
+    inserted: int
+    duplicates: int  # Already stored (e.g. a retried batch); conversation_id is unique
+    conversation_ids: List[str]
+    errors: List[dict] = []  # {"index": int, "error": str} for rejected entries
+
+
 class ChatLogResponse(BaseModel):
     """Response after creating a chat log."""
     id: str = Field(alias="_id")
@@ -66,23 +85,8 @@ def _generate_conversation_id(patient_mrn: str) -> str:
     return f"CONV-{date_str}-{patient_mrn}-{short_uuid}"
 
 
-@router.post("/chat-logs", response_model=ChatLogResponse, status_code=201)
-async def create_chat_log(chat_log: ChatLogCreate):
-    """
-    Create a new chat log entry.
-
-    This endpoint stores a conversation (single query/response) with metadata
-    including messages and retrieval events.
-    """
-    db: AsyncIOMotorDatabase = await get_database()
-
-    # Validate messages are not empty
-    if not chat_log.messages:
-        raise HTTPException(
-            status_code=400,
-            detail="Messages array cannot be empty"
-        )
-
+def _build_chat_log_doc(chat_log: ChatLogCreate) -> dict:
+    """Build the MongoDB document for a chat log."""
     # Generate conversation_id if not provided
     conversation_id = chat_log.conversation_id or _generate_conversation_id(chat_log.patient_mrn)
 
@@ -103,7 +107,7 @@ async def create_chat_log(chat_log: ChatLogCreate):
         retrieval_events = [evt.model_dump(exclude_none=True) for evt in chat_log.retrieval_events]
 
     # Build the document
-    chat_log_doc = {
+    return {
         "conversation_id": conversation_id,
         "patient_mrn": chat_log.patient_mrn,
         "channel": chat_log.channel,
@@ -114,6 +118,26 @@ async def create_chat_log(chat_log: ChatLogCreate):
         "trace_id": chat_log.trace_id
     }
 
+
+@router.post("/chat-logs", response_model=ChatLogResponse, status_code=201)
+async def create_chat_log(chat_log: ChatLogCreate):
+    """
+    Create a new chat log entry.
+
+    This endpoint stores a conversation (single query/response) with metadata
+    including messages and retrieval events.
+    """
+    db: AsyncIOMotorDatabase = await get_database()
+
+    # Validate messages are not empty
+    if not chat_log.messages:
+        raise HTTPException(
+            status_code=400,
+            detail="Messages array cannot be empty"
+        )
+
+    chat_log_doc = _build_chat_log_doc(chat_log)
+
     # Insert into MongoDB
     result = await db.chat_logs.insert_one(chat_log_doc)
 
@@ -123,11 +147,58 @@ async def create_chat_log(chat_log: ChatLogCreate):
     return ChatLogResponse(**chat_log_doc)
 
 
+@router.post("/chat-logs/bulk", response_model=ChatLogBulkResponse, status_code=201)
+async def create_chat_logs_bulk(body: ChatLogBulkCreate):
+    """
+    Create many chat log entries with a single unordered insert_many.
+
+    Used by service_chat's background chat log writer. Entries with empty
+    messages are reported in ``errors`` and skipped. Entries whose
+    conversation_id already exists (a retried batch) are counted as
+    ``duplicates``, so retries are idempotent.
+    """
+    db: AsyncIOMotorDatabase = await get_database()
+
+    docs = []
+    indexes = []
+    errors = []
+    for index, chat_log in enumerate(body.chat_logs):
+        if not chat_log.messages:
+            errors.append({"index": index, "error": "Messages array cannot be empty"})
+            continue
+        docs.append(_build_chat_log_doc(chat_log))
+        indexes.append(index)
+
+    inserted = len(docs)
+    duplicates = 0
+    if docs:
+        try:
+            await db.chat_logs.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            inserted = e.details.get("nInserted", 0)
+            for write_error in e.details.get("writeErrors", []):
+                if write_error.get("code") == 11000:
+                    duplicates += 1
+                else:
+                    errors.append({"index": indexes[write_error["index"]], "error": write_error.get("errmsg", "")})
+
+    return ChatLogBulkResponse(
+        inserted=inserted,
+        duplicates=duplicates,
+        conversation_ids=[doc["conversation_id"] for doc in docs],
+        errors=errors
+    )
+
+
 @router.get("/chat-logs")
 async def list_chat_logs(
     patient_mrn: Optional[str] = None,
     skip: int = Query(0, ge=0),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    after: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
+    total: Optional[str] = Query(None, pattern=TOTAL_PATTERN, description="exact, estimated or none"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    exclude: Optional[str] = Query(None, description="Comma-separated fields to leave out")
 ):
     """List chat logs with optional filtering by patient MRN."""
     db: AsyncIOMotorDatabase = await get_database()
@@ -136,30 +207,21 @@ async def list_chat_logs(
     if patient_mrn:
         query["patient_mrn"] = patient_mrn
 
-    cursor = db.chat_logs.find(query).skip(skip).limit(limit)
-    chat_logs = await cursor.to_list(length=limit)
-
-    # Convert ObjectId to string
-    for log in chat_logs:
-        if "_id" in log:
-            log["_id"] = str(log["_id"])
-
-    total = await db.chat_logs.count_documents(query)
-
-    return {
-        "items": chat_logs,
-        "total": total,
-        "skip": skip,
-        "limit": limit
-    }
+    page = await paginate(db.chat_logs, query, list_sort("chat_logs", query), skip, limit, after, total,
+                          parse_projection(fields, exclude))
+    return BSONJSONResponse(page)
 
 
 @router.get("/chat-logs/{conversation_id}")
-async def get_chat_log(conversation_id: str):
+async def get_chat_log(
+    conversation_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    exclude: Optional[str] = Query(None, description="Comma-separated fields to leave out")
+):
     """Get a single chat log by conversation_id."""
     db: AsyncIOMotorDatabase = await get_database()
 
-    chat_log = await db.chat_logs.find_one({"conversation_id": conversation_id})
+    chat_log = await db.chat_logs.find_one({"conversation_id": conversation_id}, parse_projection(fields, exclude))
 
     if not chat_log:
         raise HTTPException(
@@ -167,8 +229,4 @@ async def get_chat_log(conversation_id: str):
             detail=f"Chat log with conversation ID {conversation_id} not found"
         )
 
-    # Convert ObjectId to string
-    if "_id" in chat_log:
-        chat_log["_id"] = str(chat_log["_id"])
-
-    return chat_log
+    return BSONJSONResponse(chat_log)
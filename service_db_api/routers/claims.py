@@ -3,7 +3,11 @@ from typing import Optional
 from fastapi import APIRouter, HTTPException, Query
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from service_db_api.db.indexes import list_sort
 from service_db_api.db.mongo import get_database
+from service_db_api.db.pagination import TOTAL_PATTERN, paginate
+from service_db_api.db.projection import parse_projection
+from service_db_api.responses import BSONJSONResponse
 
 router = APIRouter()
 
@@ -12,7 +16,11 @@ router = APIRouter()
 async def list_claims(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    patient_mrn: Optional[str] = None
+    patient_mrn: Optional[str] = None,
+    after: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
+    total: Optional[str] = Query(None, pattern=TOTAL_PATTERN, description="exact, estimated or none"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    exclude: Optional[str] = Query(None, description="Comma-separated fields to leave out")
 ):
     """List claims with optional filtering by patient MRN."""
     db: AsyncIOMotorDatabase = await get_database()
@@ -21,30 +29,21 @@ async def list_claims(
     if patient_mrn:
         query["patient_mrn"] = patient_mrn
 
-    cursor = db.claims.find(query).skip(skip).limit(limit)
-    claims = await cursor.to_list(length=limit)
-
-    # Convert ObjectId to string
-    for claim in claims:
-        if "_id" in claim:
-            claim["_id"] = str(claim["_id"])
-
-    total = await db.claims.count_documents(query)
-
-    return {
-        "items": claims,
-        "total": total,
-        "skip": skip,
-        "limit": limit
-    }
+    page = await paginate(db.claims, query, list_sort("claims", query), skip, limit, after, total,
+                          parse_projection(fields, exclude))
+    return BSONJSONResponse(page)
 
 
 @router.get("/claims/{claim_id}")
-async def get_claim(claim_id: str):
+async def get_claim(
+    claim_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    exclude: Optional[str] = Query(None, description="Comma-separated fields to leave out")
+):
     """Get a single claim by claim_id."""
     db: AsyncIOMotorDatabase = await get_database()
 
-    claim = await db.claims.find_one({"claim_id": claim_id})
+    claim = await db.claims.find_one({"claim_id": claim_id}, parse_projection(fields, exclude))
 
     if not claim:
         raise HTTPException(
@@ -52,8 +51,4 @@ async def get_claim(claim_id: str):
             detail=f"Claim with ID {claim_id} not found"
         )
 
-    # Convert ObjectId to string
-    if "_id" in claim:
-        claim["_id"] = str(claim["_id"])
-
-    return claim
+    return BSONJSONResponse(claim)
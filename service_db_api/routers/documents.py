@@ -3,7 +3,11 @@ from typing import Optional
 from fastapi import APIRouter, HTTPException, Query
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from service_db_api.db.indexes import list_sort
 from service_db_api.db.mongo import get_database
+from service_db_api.db.pagination import TOTAL_PATTERN, paginate
+from service_db_api.db.projection import parse_projection
+from service_db_api.responses import BSONJSONResponse
 
 router = APIRouter()
 
@@ -13,7 +17,11 @@ async def list_documents(
     patient_mrn: Optional[str] = None,
     source_type: Optional[str] = None,
     skip: int = Query(0, ge=0),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    after: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
+    total: Optional[str] = Query(None, pattern=TOTAL_PATTERN, description="exact, estimated or none"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    exclude: Optional[str] = Query(None, description="Comma-separated fields to leave out")
 ):
     """List documents with optional filtering by patient MRN and source type."""
     db: AsyncIOMotorDatabase = await get_database()
@@ -24,30 +32,21 @@ async def list_documents(
     if source_type:
         query["source_type"] = source_type
 
-    cursor = db.documents.find(query).skip(skip).limit(limit)
-    documents = await cursor.to_list(length=limit)
-
-    # Convert ObjectId to string
-    for doc in documents:
-        if "_id" in doc:
-            doc["_id"] = str(doc["_id"])
-
-    total = await db.documents.count_documents(query)
-
-    return {
-        "items": documents,
-        "total": total,
-        "skip": skip,
-        "limit": limit
-    }
+    page = await paginate(db.documents, query, list_sort("documents", query), skip, limit, after, total,
+                          parse_projection(fields, exclude))
+    return BSONJSONResponse(page)
 
 
 @router.get("/documents/{doc_id}")
-async def get_document(doc_id: str):
+async def get_document(
+    doc_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    exclude: Optional[str] = Query(None, description="Comma-separated fields to leave out")
+):
     """Get a single document by doc_id."""
     db: AsyncIOMotorDatabase = await get_database()
 
-    document = await db.documents.find_one({"doc_id": doc_id})
+    document = await db.documents.find_one({"doc_id": doc_id}, parse_projection(fields, exclude))
 
     if not document:
         raise HTTPException(
@@ -55,28 +54,23 @@ async def get_document(doc_id: str):
             detail=f"Document with ID {doc_id} not found"
         )
 
-    # Convert ObjectId to string
-    if "_id" in document:
-        document["_id"] = str(document["_id"])
-
-    return document
+    return BSONJSONResponse(document)
 
 
 @router.get("/patients/{mrn}/documents")
-async def list_patient_documents(mrn: str):
+async def list_patient_documents(
+    mrn: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    exclude: Optional[str] = Query(None, description="Comma-separated fields to leave out")
+):
     """Get all documents for a specific patient."""
     db: AsyncIOMotorDatabase = await get_database()
 
-    cursor = db.documents.find({"patient_mrn": mrn})
+    cursor = db.documents.find({"patient_mrn": mrn}, parse_projection(fields, exclude))
     documents = await cursor.to_list(length=None)
 
-    # Convert ObjectId to string
-    for doc in documents:
-        if "_id" in doc:
-            doc["_id"] = str(doc["_id"])
-
-    return {
+    return BSONJSONResponse({
         "patient_mrn": mrn,
         "documents": documents,
         "count": len(documents)
-    }
+    })
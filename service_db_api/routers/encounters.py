@@ -3,7 +3,11 @@ from typing import Optional
 from fastapi import APIRouter, HTTPException, Query
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from service_db_api.db.indexes import PATIENT_SORTS, list_sort
 from service_db_api.db.mongo import get_database
+from service_db_api.db.pagination import TOTAL_PATTERN, paginate
+from service_db_api.db.projection import parse_projection
+from service_db_api.responses import BSONJSONResponse
 
 router = APIRouter()
 
@@ -12,7 +16,11 @@ router = APIRouter()
 async def list_encounters(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    patient_mrn: Optional[str] = None
+    patient_mrn: Optional[str] = None,
+    after: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
+    total: Optional[str] = Query(None, pattern=TOTAL_PATTERN, description="exact, estimated or none"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    exclude: Optional[str] = Query(None, description="Comma-separated fields to leave out")
 ):
     """List encounters with optional filtering by patient MRN."""
     db: AsyncIOMotorDatabase = await get_database()
@@ -21,30 +29,21 @@ async def list_encounters(
     if patient_mrn:
         query["patient_mrn"] = patient_mrn
 
-    cursor = db.encounters.find(query).skip(skip).limit(limit)
-    encounters = await cursor.to_list(length=limit)
-
-    # Convert ObjectId to string
-    for encounter in encounters:
-        if "_id" in encounter:
-            encounter["_id"] = str(encounter["_id"])
-
-    total = await db.encounters.count_documents(query)
-
-    return {
-        "items": encounters,
-        "total": total,
-        "skip": skip,
-        "limit": limit
-    }
+    page = await paginate(db.encounters, query, list_sort("encounters", query), skip, limit, after, total,
+                          parse_projection(fields, exclude))
+    return BSONJSONResponse(page)
 
 
 @router.get("/encounters/{encounter_id}")
-async def get_encounter(encounter_id: str):
+async def get_encounter(
+    encounter_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    exclude: Optional[str] = Query(None, description="Comma-separated fields to leave out")
+):
     """Get a single encounter by encounter_id."""
     db: AsyncIOMotorDatabase = await get_database()
 
-    encounter = await db.encounters.find_one({"encounter_id": encounter_id})
+    encounter = await db.encounters.find_one({"encounter_id": encounter_id}, parse_projection(fields, exclude))
 
     if not encounter:
         raise HTTPException(
@@ -52,28 +51,23 @@ async def get_encounter(encounter_id: str):
             detail=f"Encounter with ID {encounter_id} not found"
         )
 
-    # Convert ObjectId to string
-    if "_id" in encounter:
-        encounter["_id"] = str(encounter["_id"])
-
-    return encounter
+    return BSONJSONResponse(encounter)
 
 
 @router.get("/patients/{mrn}/encounters")
-async def list_patient_encounters(mrn: str):
+async def list_patient_encounters(
+    mrn: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    exclude: Optional[str] = Query(None, description="Comma-separated fields to leave out")
+):
     """Get all encounters for a specific patient, sorted by start date descending."""
     db: AsyncIOMotorDatabase = await get_database()
 
-    cursor = db.encounters.find({"patient_mrn": mrn}).sort("start", -1)
+    cursor = db.encounters.find({"patient_mrn": mrn}, parse_projection(fields, exclude)).sort(PATIENT_SORTS["encounters"])
     encounters = await cursor.to_list(length=None)
 
-    # Convert ObjectId to string
-    for encounter in encounters:
-        if "_id" in encounter:
-            encounter["_id"] = str(encounter["_id"])
-
-    return {
+    return BSONJSONResponse({
         "patient_mrn": mrn,
         "encounters": encounters,
         "count": len(encounters)
-    }
+    })
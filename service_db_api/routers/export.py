@@ -0,0 +1,82 @@
+"""Bulk export endpoints (newline-delimited JSON)."""
+from typing import Any, AsyncIterator, Dict, Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorCursor, AsyncIOMotorDatabase
+
+from service_db_api.config import settings
+from service_db_api.db.indexes import list_sort
+from service_db_api.db.mongo import get_database
+from service_db_api.db.projection import parse_projection
+from service_db_api.responses import dumps
+
+router = APIRouter()
+
+# Exportable collections and the date field their since/until range applies to
+EXPORT_COLLECTIONS: Dict[str, Optional[str]] = {
+    "patients": None,
+    "encounters": "start",
+    "claims": "service_date",
+    "documents": "metadata.created_at",
+    "chat_logs": "started_at",
+}
+
+
+async def _ndjson(cursor: AsyncIOMotorCursor, batch_size: int) -> AsyncIterator[bytes]:
+    """One JSON document per line, flushed once per cursor batch (so memory stays at one batch)."""
+    lines = []
+    try:
+        async for doc in cursor:
+            lines.append(dumps(doc))
+            if len(lines) >= batch_size:
+                yield b"\n".join(lines) + b"\n"
+                lines = []
+        if lines:
+            yield b"\n".join(lines) + b"\n"
+    finally:
+        # Also runs when the client disconnects mid-export
+        await cursor.close()
+
+
+@router.get("/export/{collection}")
+async def export_collection(
+    collection: str,
+    patient_mrn: Optional[str] = None,
+    since: Optional[str] = Query(None, description="ISO 8601 date/time; records on or after it"),
+    until: Optional[str] = Query(None, description="ISO 8601 date/time; records before it"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    exclude: Optional[str] = Query(None, description="Comma-separated fields to leave out"),
+    limit: Optional[int] = Query(None, ge=1, description="Stop after this many records"),
+    batch_size: int = Query(settings.EXPORT_BATCH_SIZE, ge=1, le=settings.EXPORT_MAX_BATCH_SIZE)
+):
+    """
+    Stream a collection as newline-delimited JSON.
+
+    Records come straight from a Motor cursor in batches of ``batch_size``,
+    so memory use doesn't grow with the size of the export, unlike the
+    ``/patients/{mrn}/...`` listings, which build the whole result first.
+    Records follow the same index-backed order as the list endpoints.
+    """
+    if collection not in EXPORT_COLLECTIONS:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown collection '{collection}'. Use one of: {', '.join(EXPORT_COLLECTIONS)}"
+        )
+    date_field = EXPORT_COLLECTIONS[collection]
+
+    query: Dict[str, Any] = {}
+    if patient_mrn:
+        query["mrn" if collection == "patients" else "patient_mrn"] = patient_mrn
+    if since or until:
+        if date_field is None:
+            raise HTTPException(status_code=400, detail=f"'{collection}' has no date field to filter on")
+        # Dates are stored as ISO 8601 strings, which sort chronologically
+        query[date_field] = {**({"$gte": since} if since else {}), **({"$lt": until} if until else {})}
+
+    db: AsyncIOMotorDatabase = await get_database()
+    cursor = db[collection].find(query, parse_projection(fields, exclude)).sort(list_sort(collection, query))
+    cursor = cursor.batch_size(batch_size)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    return StreamingResponse(_ndjson(cursor, batch_size), media_type="application/x-ndjson")
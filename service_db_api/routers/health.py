@@ -2,6 +2,7 @@
 from fastapi import APIRouter
 
 from service_db_api.db.mongo import mongo
+from service_db_api.db.summaries import summary_worker
 
 router = APIRouter()
 
@@ -26,5 +27,6 @@ async def health_db():
         "database": "mongodb",
         "connected": ping_result["success"],
         "latency_ms": ping_result.get("latency_ms", 0),
-        "error": ping_result.get("error")
+        "error": ping_result.get("error"),
+        "summary_worker": summary_worker.stats()
     }
@@ -1,58 +1,142 @@
 """Patient endpoints."""
-from typing import Optional
-from fastapi import APIRouter, HTTPException, Query
+import hashlib
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Response
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import BaseModel, Field
 
+from service_db_api.config import settings
+from service_db_api.db.indexes import list_sort
 from service_db_api.db.mongo import get_database
+from service_db_api.db.pagination import TOTAL_PATTERN, paginate
+from service_db_api.db.patient_summary import fetch_patient_summaries, fetch_patient_summary
+from service_db_api.db.projection import VIEW_PATTERN, drop_fields, parse_projection, require_fields, summary_view
+from service_db_api.db.summaries import get_materialized_summaries, get_materialized_summary, serve_materialized
+from service_db_api.responses import BSONJSONResponse, dumps
 
 router = APIRouter()
 
 
+class BatchGetRequest(BaseModel):
+    """Request body for the batch lookup endpoints."""
+    mrns: List[str] = Field(min_length=1, max_length=settings.BATCH_GET_MAX_MRNS)
+
+
+def _batch_result(mrns: List[str], found: Dict[str, Any], **extra: Any) -> BSONJSONResponse:
+    """Map of every requested MRN to its record, or None (also listed in not_found)."""
+    return BSONJSONResponse({
+        "results": {mrn: found.get(mrn) for mrn in mrns},
+        "not_found": [mrn for mrn in mrns if mrn not in found],
+        **extra
+    })
+
+
 @router.get("/patients")
 async def list_patients(
     skip: int = Query(0, ge=0),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    after: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
+    total: Optional[str] = Query(None, pattern=TOTAL_PATTERN, description="exact, estimated or none"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    exclude: Optional[str] = Query(None, description="Comma-separated fields to leave out")
 ):
     """List all patients with pagination."""
     db: AsyncIOMotorDatabase = await get_database()
 
-    cursor = db.patients.find().skip(skip).limit(limit)
-    patients = await cursor.to_list(length=limit)
-
-    # Convert ObjectId to string for JSON serialization
-    for patient in patients:
-        if "_id" in patient:
-            patient["_id"] = str(patient["_id"])
-
-    total = await db.patients.count_documents({})
-
-    return {
-        "items": patients,
-        "total": total,
-        "skip": skip,
-        "limit": limit
-    }
+    page = await paginate(db.patients, {}, list_sort("patients", {}), skip, limit, after, total,
+                          parse_projection(fields, exclude))
+    return BSONJSONResponse(page)
 
 
 @router.get("/patients/{mrn}")
-async def get_patient(mrn: str):
+async def get_patient(
+    mrn: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    exclude: Optional[str] = Query(None, description="Comma-separated fields to leave out")
+):
     """Get a single patient by MRN."""
     db: AsyncIOMotorDatabase = await get_database()
 
-    patient = await db.patients.find_one({"mrn": mrn})
+    patient = await db.patients.find_one({"mrn": mrn}, parse_projection(fields, exclude))
 
     if not patient:
         raise HTTPException(status_code=404, detail=f"Patient with MRN {mrn} not found")
 
-    # Convert ObjectId to string
-    if "_id" in patient:
-        patient["_id"] = str(patient["_id"])
+    return BSONJSONResponse(patient)
 
-    return patient
+
+@router.post("/patients:batchGet")
+async def batch_get_patients(
+    body: BatchGetRequest,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    exclude: Optional[str] = Query(None, description="Comma-separated fields to leave out")
+):
+    """
+    Get many patients by MRN in one request.
+
+    The MRNs are resolved with a single ``$in`` query. The response maps
+    each requested MRN to its patient, or to null if there is none.
+    """
+    db: AsyncIOMotorDatabase = await get_database()
+    mrns = list(dict.fromkeys(body.mrns))
+
+    # Results are keyed by MRN, so it is fetched even when not requested
+    projection, hidden = require_fields(parse_projection(fields, exclude), ["mrn"])
+    patients = await db.patients.find({"mrn": {"$in": mrns}}, projection).to_list(length=len(mrns))
+    found = {patient["mrn"]: patient for patient in patients}
+    drop_fields(patients, hidden)
+
+    return _batch_result(mrns, found)
+
+
+@router.post("/patients/summaries:batchGet")
+async def batch_get_patient_summaries(
+    body: BatchGetRequest,
+    view: str = Query("full", pattern=VIEW_PATTERN, description="full, or compact (only the fields used for RAG prompts)")
+):
+    """
+    Get the summaries of many patients in one request.
+
+    Materialized summaries are read with one ``$in`` query. The rest are
+    computed by one aggregation over all of them (an ``$in`` match, then
+    the usual per-patient ``$lookup`` stages). The response maps each
+    requested MRN to its summary, or to null if there is no such patient.
+    """
+    db: AsyncIOMotorDatabase = await get_database()
+    mrns = list(dict.fromkeys(body.mrns))
+
+    materialized = await get_materialized_summaries(db, mrns, view) if await serve_materialized(db) else {}
+    found: Dict[str, Any] = {mrn: summary for mrn, (summary, _) in materialized.items()}
+    missing = [mrn for mrn in mrns if mrn not in found]
+    if missing:
+        found.update(await fetch_patient_summaries(db, missing, summary_view(view)))
+
+    return _batch_result(
+        mrns, found,
+        versions={mrn: version for mrn, (_, version) in materialized.items()},
+        sources={"materialized": len(materialized), "live": len(found) - len(materialized)}
+    )
+
+
+def _summary_etag(body: bytes) -> str:
+    """Strong ETag derived from the encoded summary."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (possibly a list or "*") against an ETag."""
+    if not if_none_match:
+        return False
+    candidates = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
 
 
 @router.get("/patients/{mrn}/summary")
-async def get_patient_summary(mrn: str):
+async def get_patient_summary(
+    mrn: str,
+    view: str = Query("full", pattern=VIEW_PATTERN, description="full, or compact (only the fields used for RAG prompts)"),
+    if_none_match: Optional[str] = Header(None)
+):
     """
     Get comprehensive patient summary including:
     - Patient base record
@@ -61,51 +145,37 @@ async def get_patient_summary(mrn: str):
     - Key documents (care plans, etc.)
 
     This summary is designed to be used by service_chat for RAG context.
+    By default it is fetched with a single aggregation (see
+    PATIENT_SUMMARY_STRATEGY and db/patient_summary.py). ``view=compact``
+    returns only the fields service_chat renders into its prompt (see
+    db/projection.py), projected on the server.
+
+    The summary is read from the materialized patient_summaries collection
+    (one indexed find_one) while it is kept current, and computed live
+    otherwise or if the patient's copy is missing (see db/summaries.py). The
+    X-Summary-Source header tells which, and X-Summary-Version carries the
+    materialized copy's version.
+
+    The response carries an ETag of the summary content. A request whose
+    If-None-Match matches it gets an empty 304, so a client holding a cached
+    copy can revalidate without receiving the summary again.
     """
     db: AsyncIOMotorDatabase = await get_database()
 
-    # Get patient base record
-    patient = await db.patients.find_one({"mrn": mrn})
-    if not patient:
-        raise HTTPException(status_code=404, detail=f"Patient with MRN {mrn} not found")
-
-    # Convert ObjectId to string
-    if "_id" in patient:
-        patient["_id"] = str(patient["_id"])
-
-    # Get recent encounters (last 10, sorted by start date descending)
-    encounters_cursor = db.encounters.find({"patient_mrn": mrn}).sort("start", -1).limit(10)
-    encounters = await encounters_cursor.to_list(length=10)
-    for enc in encounters:
-        if "_id" in enc:
-            enc["_id"] = str(enc["_id"])
-
-    # Get recent claims (last 10, sorted by service date descending)
-    claims_cursor = db.claims.find({"patient_mrn": mrn}).sort("service_date", -1).limit(10)
-    claims = await claims_cursor.to_list(length=10)
-    for claim in claims:
-        if "_id" in claim:
-            claim["_id"] = str(claim["_id"])
-
-    # Get key documents (care plans, visit notes, etc.)
-    documents_cursor = db.documents.find({"patient_mrn": mrn}).limit(20)
-    documents = await documents_cursor.to_list(length=20)
-    for doc in documents:
-        if "_id" in doc:
-            doc["_id"] = str(doc["_id"])
-
-    # Build comprehensive summary
-    summary = {
-        "patient": patient,
-        "recent_encounters": encounters,
-        "recent_claims": claims,
-        "documents": documents,
-        "summary_metadata": {
-            "mrn": mrn,
-            "encounter_count": len(encounters),
-            "claim_count": len(claims),
-            "document_count": len(documents)
-        }
-    }
-
-    return summary
+    headers = {"X-Summary-Source": "live"}
+    materialized = await get_materialized_summary(db, mrn, view) if await serve_materialized(db) else None
+    if materialized is not None:
+        summary, version = materialized
+        headers = {"X-Summary-Source": "materialized", "X-Summary-Version": str(version)}
+    else:
+        summary = await fetch_patient_summary(db, mrn, settings.PATIENT_SUMMARY_STRATEGY, summary_view(view))
+        if summary is None:
+            raise HTTPException(status_code=404, detail=f"Patient with MRN {mrn} not found")
+
+    # Encoded once: the same bytes are hashed for the ETag and sent as the body
+    body = dumps(summary)
+    etag = _summary_etag(body)
+    headers.update({"ETag": etag, "Cache-Control": "no-cache"})
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)